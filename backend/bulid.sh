@@ -6,6 +6,7 @@ pip install -r requirements.txt
 
 echo "Running database migrations..."
 python manage.py migrate --noinput
+python manage.py migrate_shards
 
 echo "Collecting static files..."
 python manage.py collectstatic --noinput
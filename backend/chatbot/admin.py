@@ -1,14 +1,188 @@
-from django.contrib import admin
-from .models import Conversation, Lead
+import itertools
+
+from django.conf import settings
+from django.contrib import admin, messages
+from django.contrib.admin.views.main import ChangeList
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import QuerySet
+from django.http import QueryDict
+from django.utils.http import urlencode
+from django.utils.functional import cached_property
+from .models import Conversation, ConversationRollup, Lead
+from .search import full_text_available, search
+from .sharding import conversation_shards, fan_out, fan_out_count, fan_out_map, is_sharded
+
+
+class ShardFilter(admin.SimpleListFilter):
+    """Narrows the Conversation changelist to one shard (default: all); hidden when not sharded."""
+    title = 'shard'
+    parameter_name = 'shard'
+
+    def lookups(self, request, model_admin):
+        return [(alias, alias) for alias in conversation_shards()] if is_sharded() else []
+
+    def queryset(self, request, queryset):
+        # ConversationAdmin.get_queryset already switched databases
+        return queryset
+
+
+class EstimatedCountPaginator(Paginator):
+    """Uses the planner's row estimate for unfiltered changelists on PostgreSQL.
+
+    Filtered or small querysets, and other databases, get the exact count.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.where:
+            estimate = estimated_count(queryset.model, queryset.db)
+            if estimate is not None and estimate > settings.CHATBOT_ADMIN_EXACT_COUNT_LIMIT:
+                return estimate
+        return super().count
+
+
+class FanOutPaginator(EstimatedCountPaginator):
+    """Pages through the changelist queryset on every shard, merged in its ordering."""
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.where:
+            estimates = fan_out_map(lambda alias: estimated_count(queryset.model, alias))
+            if None not in estimates.values() and sum(estimates.values()) > settings.CHATBOT_ADMIN_EXACT_COUNT_LIMIT:
+                return sum(estimates.values())
+        return fan_out_count(queryset)
+
+    def page(self, number):
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        top = bottom + self.per_page
+        if top + self.orphans >= self.count:
+            top = self.count
+        rows = list(itertools.islice(fan_out(self.object_list, limit=top), bottom, top))
+        return self._get_page(rows, number, self)
+
+
+class FanOutChangeList(ChangeList):
+    """Lists the rows of every shard; each change link names the row's shard."""
+
+    def get_results(self, request):
+        super().get_results(request)
+        # Single-page and "show all" lists skip the paginator
+        if isinstance(self.result_list, QuerySet):
+            self.result_list = list(fan_out(self.result_list, limit=self.list_max_show_all))
+
+    def url_for_result(self, result):
+        return f"{super().url_for_result(result)}?{urlencode({'shard': result._state.db})}"
+
+
+def estimated_count(model, alias):
+    connection = connections[alias]
+    if connection.vendor != 'postgresql':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass", [model._meta.db_table])
+        row = cursor.fetchone()
+    # reltuples is -1 until the table is first vacuumed or analyzed
+    return row[0] if row and row[0] >= 0 else None
+
+
+class CachedValuesFilter(admin.AllValuesFieldListFilter):
+    """AllValuesFieldListFilter whose DISTINCT scan is cached per database."""
+
+    def __init__(self, field, request, params, model, model_admin, field_path):
+        super().__init__(field, request, params, model, model_admin, field_path)
+        queryset = self.lookup_choices
+        key = f"admin-facets:{model._meta.label_lower}:{field_path}:{queryset.db}"
+        choices = cache.get(key)
+        if choices is None:
+            choices = list(queryset)
+            cache.set(key, choices, settings.CHATBOT_ADMIN_FACET_TTL)
+        self.lookup_choices = choices
+
+
+def requested_shard(request):
+    """The shard named in the request, or None."""
+    shard = request.GET.get('shard')
+    if shard is None and '_changelist_filters' in request.GET:
+        # Change views carry the changelist filters along
+        shard = QueryDict(request.GET['_changelist_filters']).get('shard')
+    return shard if shard in conversation_shards() else None
+
+
+def selected_shard(request):
+    return requested_shard(request) or conversation_shards()[0]
+
 
 @admin.register(Conversation)
 class ConversationAdmin(admin.ModelAdmin):
     list_display = ['user_message', 'language', 'timestamp']
-    list_filter = ['language', 'timestamp']
+    list_filter = [ShardFilter, ('language', CachedValuesFilter)]
     search_fields = ['user_message', 'bot_response']
+    date_hierarchy = 'timestamp'
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def fans_out(self, request):
+        return is_sharded() and requested_shard(request) is None
+
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request)
+        if is_sharded():
+            # When fanning out, filters and search are built here and run on every shard
+            queryset = queryset.using(selected_shard(request))
+        return queryset
+
+    def get_changelist(self, request, **kwargs):
+        return FanOutChangeList if self.fans_out(request) else super().get_changelist(request, **kwargs)
+
+    def get_paginator(self, request, queryset, per_page, orphans=0, allow_empty_first_page=True):
+        paginator = FanOutPaginator if self.fans_out(request) else self.paginator
+        return paginator(queryset, per_page, orphans, allow_empty_first_page)
+
+    def get_actions(self, request):
+        # Selected ids are ambiguous across shards
+        return {} if self.fans_out(request) else super().get_actions(request)
+
+    def get_object(self, request, object_id, from_field=None):
+        if not is_sharded() or requested_shard(request) is not None:
+            return super().get_object(request, object_id, from_field)
+        # Ids repeat across shards: only open a row that exists on exactly one of them
+        queryset = super().get_queryset(request)
+        found = [obj for obj in fan_out_map(lambda alias: queryset.using(alias).filter(pk=object_id).first()).values()
+                 if obj is not None]
+        if len(found) > 1:
+            messages.warning(request, f"Conversation {object_id} exists on {len(found)} shards; "
+                                      "open it from the list with the shard filter set.")
+            return None
+        return found[0] if found else None
+
+    def get_search_results(self, request, queryset, search_term):
+        # Use the database's full-text index instead of LIKE '%term%'
+        if search_term.strip() and full_text_available(queryset.model, queryset.db):
+            return search(queryset, search_term), False
+        return super().get_search_results(request, queryset, search_term)
 
 @admin.register(Lead)
 class LeadAdmin(admin.ModelAdmin):
     list_display = ['name', 'phone', 'interest', 'status', 'timestamp']
-    list_filter = ['status', 'interest', 'language', 'timestamp']
-    search_fields = ['name', 'phone', 'location']
\ No newline at end of file
+    list_filter = ['status', ('interest', CachedValuesFilter), ('language', CachedValuesFilter)]
+    search_fields = ['name', 'phone', 'location']
+    date_hierarchy = 'timestamp'
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+@admin.register(ConversationRollup)
+class ConversationRollupAdmin(admin.ModelAdmin):
+    list_display = ['bucket', 'intent', 'language', 'provider', 'count']
+    list_filter = ['intent', 'language', 'provider']
+    date_hierarchy = 'bucket'
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
\ No newline at end of file
@@ -0,0 +1,86 @@
+"""
+Monthly archive files for old Conversation rows.
+
+Rows are written to ``<archive dir>/<database>/conversations-YYYY-MM.jsonl.gz``
+(month of the UTC timestamp), one JSON object per line. Each chunk is
+appended as its own gzip member and synced before its rows are deleted, so a
+crash can at worst archive one chunk twice, never lose it.
+"""
+import gzip
+import json
+import os
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Sequence
+
+from django.conf import settings
+from django.db import transaction
+
+from .models import Conversation
+from .sharding import conversation_shards
+
+ARCHIVE_FIELDS = ['id', 'session_id', 'language', 'user_message', 'bot_response', 'timestamp']
+
+
+def archive_dir() -> str:
+    return settings.CHATBOT_ARCHIVE_DIR
+
+
+def archive_path(source: str, month: str, directory: Optional[str] = None) -> str:
+    return os.path.join(directory or archive_dir(), source, f"conversations-{month}.jsonl.gz")
+
+
+def _append(path: str, rows: List[Dict]) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    lines = ''.join(json.dumps(row, ensure_ascii=False, default=str) + '\n' for row in rows)
+    with open(path, 'ab') as f:
+        f.write(gzip.compress(lines.encode('utf-8')))
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def archive_chunk(source: str, cutoff: datetime, chunk_size: int = 5000, delete_batch: int = 500,
+                  directory: Optional[str] = None) -> int:
+    """Archive and delete up to ``chunk_size`` of the oldest rows before ``cutoff``."""
+    rows = list(
+        Conversation.objects.using(source)
+        .filter(timestamp__lt=cutoff)
+        .order_by('timestamp', 'id')
+        .values(*ARCHIVE_FIELDS)[:chunk_size]
+    )
+    by_month = defaultdict(list)
+    for row in rows:
+        row['timestamp'] = row['timestamp'].isoformat()
+        by_month[row['timestamp'][:7]].append(row)
+    for month, month_rows in by_month.items():
+        _append(archive_path(source, month, directory), month_rows)
+
+    ids = [row['id'] for row in rows]
+    for start in range(0, len(ids), delete_batch):
+        # Short transactions keep row locks brief on the hot table
+        with transaction.atomic(using=source):
+            Conversation.objects.using(source).filter(id__in=ids[start:start + delete_batch]).delete()
+    return len(rows)
+
+
+def read_archive(month: str, shards: Optional[Sequence[str]] = None,
+                 directory: Optional[str] = None) -> Iterator[Dict]:
+    """Stream the archived rows of ``month`` ("YYYY-MM") from every shard's file."""
+    for source in shards or conversation_shards():
+        path = archive_path(source, month, directory)
+        if not os.path.exists(path):
+            continue
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            for line in f:
+                yield json.loads(line)
+
+
+def archived_months(directory: Optional[str] = None) -> List[str]:
+    months = set()
+    root = directory or archive_dir()
+    for source in conversation_shards():
+        folder = os.path.join(root, source)
+        if os.path.isdir(folder):
+            months.update(name[len('conversations-'):-len('.jsonl.gz')]
+                          for name in os.listdir(folder) if name.endswith('.jsonl.gz'))
+    return sorted(months)
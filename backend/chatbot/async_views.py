@@ -0,0 +1,107 @@
+"""
+Async versions of the chat and health views, used when the API is served
+through frecha_api.asgi (see CHATBOT_ASYNC_VIEWS).
+
+They share the bot, session store and write-behind queue with the sync views,
+so a worker never holds a thread while it waits on the database.
+"""
+import json
+
+from asgiref.sync import sync_to_async
+from django.http import HttpResponseNotAllowed, JsonResponse
+
+from . import metrics
+from .models import Conversation
+from .views import chatbot, conversation_log, health_report, prober, sessions
+from .writebehind import BLOCK
+
+
+def _request_data(request) -> dict:
+    if request.content_type == 'application/json':
+        try:
+            data = json.loads(request.body or b'{}')
+        except ValueError:
+            return {}
+        return data if isinstance(data, dict) else {}
+    return request.POST
+
+
+def _shared_replies() -> bool:
+    return chatbot.response_cache is not None and chatbot.response_cache.shared
+
+
+async def _log_conversation(conversation: Conversation) -> None:
+    if not conversation_log.enabled:
+        await conversation.asave()
+    elif conversation_log.policy == BLOCK:
+        # A full queue blocks the caller; keep that off the event loop
+        await sync_to_async(conversation_log.submit, thread_sensitive=False)(conversation)
+    else:
+        conversation_log.submit(conversation)
+
+
+# Django 4.2's view decorators wrap async views in sync functions, so the
+# method checks are inline and CSRF exemption is set as an attribute below.
+
+async def health(request):
+    """Health check with database connection test, served from the background prober"""
+    if request.method != 'GET':
+        return HttpResponseNotAllowed(['GET'])
+    if prober.report is None:
+        # The first check probes the databases inline; keep that off the event loop
+        report = await sync_to_async(prober.readiness, thread_sensitive=False)()
+    else:
+        report = prober.readiness()
+    body, code = health_report(report)
+    return JsonResponse(body, status=code)
+
+
+async def chat(request):
+    if request.method != 'POST':
+        return HttpResponseNotAllowed(['POST'])
+    with metrics.stage('parse'):
+        data = _request_data(request)
+        user_message = data.get('message', '')
+        session_id = data.get('session_id')
+        language = data.get('language')
+
+    if not user_message:
+        return JsonResponse({'error': 'No message provided'}, status=400)
+
+    try:
+        state = await sessions.aget(session_id)
+        if state.lead_step is not None or _shared_replies():
+            # The lead sink writes to the database and a shared response cache is a
+            # network round trip; keep both off the event loop
+            bot_response = await sync_to_async(chatbot.get_response, thread_sensitive=False)(
+                user_message, state, language
+            )
+        else:
+            bot_response = chatbot.get_response(user_message, state, language)
+        await sessions.asave(state)
+
+        with metrics.stage('write'):
+            conversation = Conversation(
+                user_message=user_message,
+                bot_response=bot_response,
+                language=state.language,
+                session_id=session_id or 'default'
+            )
+            await _log_conversation(conversation)
+
+        with metrics.stage('serialize'):
+            return JsonResponse({
+                'response': bot_response,
+                'language': state.language,
+                # None while the row waits in the write-behind queue
+                'conversation_id': conversation.id,
+                'catalog_version': chatbot.catalog.snapshot.version,
+            })
+    except Exception as e:
+        return JsonResponse({
+            'error': 'Service temporarily unavailable',
+            'message': str(e)
+        }, status=503)
+
+
+chat.csrf_exempt = True
@@ -0,0 +1,488 @@
+"""
+Benchmarks for the chat path.
+
+Run with ``python manage.py benchmark [name ...]``. Every benchmark returns
+stats per variant: ``seconds`` per message, plus ``throughput`` (messages/s)
+and ``p50``/``p95``/``p99`` latency (seconds) where requests are timed one by
+one. In the COMPARISONS benchmarks the first variant is the baseline.
+"""
+import contextlib
+import json
+import os
+import re
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Sequence
+
+from .chatbot_logic import (
+    FUZZY_KEYWORDS, INTENT_KEYWORDS, NEUTRAL_WORDS, WHOLE_WORDS, FrechaServicesChatbot,
+)
+from .fuzzy import FuzzyKeywordIndex, osa_distance
+from .language import LanguageDetector
+from .matcher import whole_word_pattern
+from .response_cache import ResponseCache
+from .sessions import SessionState
+from .warmup import QUICK_ACTIONS
+
+# Quick actions plus typical free-text messages.
+MESSAGE_CORPUS = QUICK_ACTIONS + (
+    "Mambo vipi",
+    "Hello, I need internet for my home",
+    "Naomba bei ya router ya airtel kwa nyumbani",
+    "Je, mnauza vifurushi vya halotel hapa Dodoma?",
+    "Nataka data ya kutosha kwa mwezi mzima",
+    "I want to know about your business internet packages please",
+    "Ofisi yetu ina wafanyakazi kumi, mna huduma ya biashara?",
+    "Yas home inagharimu kiasi gani?",
+    "naomba msaada",
+    "Can someone call me back tomorrow morning",
+    "asante sana kwa huduma nzuri",
+    "ok",
+)
+
+
+def scan_intent(text: str) -> Optional[str]:
+    """The per-intent ``any(word in text ...)`` scans that the matcher replaced."""
+    text = text.lower().strip()
+    for intent, words in INTENT_KEYWORDS.items():
+        if any(re.search(whole_word_pattern(word), text) if word in WHOLE_WORDS else word in text for word in words):
+            return intent
+    return None
+
+
+# One typical message per intent of get_response ("other" falls back to help)
+INTENT_MESSAGES = {
+    "english": "english",
+    "swahili": "kiswahili",
+    "lead": "Nataka kununua router",
+    "budget": "under 50,000",
+    "capacity": "at least 60GB",
+    "cheapest": "bei nafuu",
+    "greeting": "Habari",
+    "help": "naomba msaada",
+    "bundle": "bundle",
+    "sme": "SME",
+    "provider": "vodacom",
+    "contact": "wasiliana",
+    "other": "asante sana kwa huduma nzuri",
+}
+
+
+def percentile(sorted_values: Sequence[float], fraction: float) -> float:
+    return sorted_values[min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))]
+
+
+def summarize(latencies: List[float], wall: Optional[float] = None) -> Dict[str, float]:
+    """Stats of individually timed requests; ``wall`` is the elapsed time when they ran concurrently."""
+    ordered = sorted(latencies)
+    wall = sum(latencies) if wall is None else wall
+    return {
+        "seconds": wall / len(latencies),
+        "throughput": len(latencies) / wall,
+        "p50": percentile(ordered, 0.50),
+        "p95": percentile(ordered, 0.95),
+        "p99": percentile(ordered, 0.99),
+    }
+
+
+def time_per_message(func: Callable[[str], object], messages: Sequence[str], rounds: int, repeat: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(rounds):
+            for message in messages:
+                func(message)
+        best = min(best, time.perf_counter() - start)
+    return best / (rounds * len(messages))
+
+
+def bench_matcher(rounds: int) -> Dict[str, float]:
+    chatbot = FrechaServicesChatbot()
+    matcher = chatbot.matcher
+
+    def match_intent(text: str) -> Optional[str]:
+        return matcher.match(text.lower().strip())[0]
+
+    for message in MESSAGE_CORPUS:
+        assert scan_intent(message) == match_intent(message), message
+
+    return {
+        "scan": {"seconds": time_per_message(scan_intent, MESSAGE_CORPUS, rounds)},
+        "matcher": {"seconds": time_per_message(match_intent, MESSAGE_CORPUS, rounds)},
+    }
+
+
+def bench_intents(rounds: int) -> Dict[str, Dict[str, float]]:
+    """get_response per intent, each call on a fresh session."""
+    chatbot = FrechaServicesChatbot()
+    results = {}
+    for intent, message in INTENT_MESSAGES.items():
+        assert chatbot.classify(message)[0] == intent, message
+        latencies = []
+        for _ in range(rounds):
+            start = time.perf_counter()
+            chatbot.get_response(message, SessionState(None))
+            latencies.append(time.perf_counter() - start)
+        results[intent] = summarize(latencies)
+    return results
+
+
+# Typo -> the keyword it must be corrected to (None: left alone)
+TYPO_CORPUS = {
+    "vodakom": "vodacom",
+    "halotell": "halotel",
+    "bundel": "bundle",
+    "msada": "msaada",
+    "airtell": "airtel",
+    "kiingreza": "kiingereza",
+    "biashra": "biashara",
+    "contcat": "contact",
+    "wasiliana": "wasiliana",
+    "tafadhali": None,
+    "nyumbani": None,
+    "asante": None,
+    "internet": None,
+}
+
+
+def bench_fuzzy(rounds: int) -> Dict[str, Dict[str, float]]:
+    """Keyword correction: edit distance to every keyword vs. the deletion index, uncached and cached."""
+    keywords = list(FUZZY_KEYWORDS)
+    index = FuzzyKeywordIndex(keywords, cache_size=0)
+    cached = FuzzyKeywordIndex(keywords)
+
+    def scan(word):
+        if len(word) < FuzzyKeywordIndex.MIN_LENGTH:
+            return None
+        limit = min(index.max_distance, 1 if len(word) <= 5 else 2)
+        best = min((osa_distance(word, keyword), rank) for rank, keyword in enumerate(keywords))
+        return keywords[best[1]] if best[0] <= limit else None
+
+    for word, expected in TYPO_CORPUS.items():
+        assert scan(word) == index.correct(word) == cached.correct(word) == expected, word
+
+    rounds = max(rounds // 20, 1)
+    return {
+        "scan": {"seconds": time_per_message(scan, TYPO_CORPUS, rounds)},
+        "index": {"seconds": time_per_message(index.correct, TYPO_CORPUS, rounds)},
+        "cached": {"seconds": time_per_message(cached.correct, TYPO_CORPUS, rounds)},
+    }
+
+
+def bench_language(rounds: int) -> Dict[str, Dict[str, float]]:
+    """Language detection alone, and whole replies with detection off and on."""
+    detector = LanguageDetector.load(ignore=NEUTRAL_WORDS)
+    results = {"detect": {"seconds": time_per_message(detector.detect, MESSAGE_CORPUS, rounds)}}
+    for label, detection in (("reply-off", False), ("reply-on", True)):
+        chatbot = FrechaServicesChatbot(language_detection=detection)
+        reply = lambda message: chatbot.get_response(message, SessionState(None))
+        results[label] = {"seconds": time_per_message(reply, MESSAGE_CORPUS, rounds)}
+    return results
+
+
+PLAN_QUERIES = ((15000, 10), (40000, 50), (50000, 60), (100000, 100), (250000, 500))
+
+
+def bench_plans(rounds: int) -> Dict[str, Dict[str, float]]:
+    """Price and data range queries: filtering and sorting the parsed plans per message vs. the sorted indexes."""
+    index = FrechaServicesChatbot().catalog.snapshot.plans
+    records = index.by_price
+
+    def scan(query):
+        amount, gigabytes = query
+        return ([plan for plan in sorted(records, key=lambda plan: plan.price) if plan.price <= amount],
+                min((plan for plan in records if plan.data_gb >= gigabytes),
+                    key=lambda plan: (plan.price, -plan.data_gb), default=None))
+
+    def indexed(query):
+        amount, gigabytes = query
+        return list(index.under(amount)), index.cheapest_at_least(gigabytes)
+
+    for query in PLAN_QUERIES:
+        assert scan(query) == indexed(query), query
+
+    return {
+        "scan": {"seconds": time_per_message(scan, PLAN_QUERIES, rounds)},
+        "index": {"seconds": time_per_message(indexed, PLAN_QUERIES, rounds)},
+    }
+
+
+def bench_cache(rounds: int) -> Dict[str, Dict[str, float]]:
+    """get_response for the quick-action buttons without and with the response cache (all hits)."""
+    results = {}
+    for label, response_cache in (("uncached", None), ("cached", ResponseCache())):
+        chatbot = FrechaServicesChatbot(response_cache=response_cache)
+        reply = lambda message: chatbot.get_response(message, SessionState(None))
+        results[label] = {"seconds": time_per_message(reply, QUICK_ACTIONS, rounds)}
+    return results
+
+
+def build_all_bundles(bundle_plans: dict) -> str:
+    """The per-request ``+=`` listing builders that the rendered table replaced."""
+    response = "📦 BUNDLE ROUTER PLANS:\n\n"
+    for provider, plans in bundle_plans.items():
+        response += f"**{provider.upper()}**\n"
+        for plan in plans:
+            response += f"• {plan['name']}: {plan['price']} - {plan['data']}\n"
+        response += "\n"
+    return response
+
+
+def build_provider_bundles(bundle_plans: dict, provider: str) -> str:
+    response = f"📦 {provider.upper()} PLANS:\n\n"
+    for plan in bundle_plans[provider]:
+        response += f"• {plan['name']}: {plan['price']} - {plan['data']}\n"
+    return response
+
+
+def build_sme(sme_services: dict) -> str:
+    response = "🏢 SME BUSINESS SOLUTIONS:\n\n"
+    for package in sme_services.values():
+        response += f"• {package['name']}: {package['price']}\n"
+        response += f"  Features: {', '.join(package['features'])}\n\n"
+    return response
+
+
+def bench_listings(rounds: int) -> Dict[str, float]:
+    chatbot = FrechaServicesChatbot()
+    plans, sme = chatbot.bundle_plans, chatbot.sme_services
+    assert build_all_bundles(plans) == chatbot.show_all_bundles("english")
+    assert build_sme(sme) == chatbot.handle_sme_inquiry("english")
+
+    # One "message" renders every listing the bundle and SME intents can return.
+    def build(_):
+        build_all_bundles(plans)
+        build_sme(sme)
+        for provider in plans:
+            build_provider_bundles(plans, provider)
+
+    def lookup(_):
+        chatbot.show_all_bundles("english")
+        chatbot.handle_sme_inquiry("english")
+        for provider in plans:
+            chatbot.show_provider_bundles(provider, "english")
+
+    return {
+        "build": {"seconds": time_per_message(build, ("",), rounds)},
+        "rendered": {"seconds": time_per_message(lookup, ("",), rounds)},
+    }
+
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+FRONTEND_DIR = BACKEND_DIR.parent / "frontend"
+
+# Each profile is one gunicorn worker; the chat view inserts inline so the
+# comparison includes a database round trip per request.
+SERVER_PROFILES = {
+    "wsgi-sync": ["frecha_api.wsgi:application"],
+    "wsgi-gthread": ["frecha_api.wsgi:application", "--worker-class", "gthread", "--threads", "8"],
+    "asgi-uvicorn": ["frecha_api.asgi:application", "--worker-class", "uvicorn.workers.UvicornWorker"],
+}
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@contextlib.contextmanager
+def gunicorn(args: List[str], cwd: Path, env: Dict[str, str], ready_path: str):
+    """Run one gunicorn worker with ``args`` and yield its base URL once ``ready_path`` answers."""
+    port = _free_port()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "--workers", "1", "--bind", f"127.0.0.1:{port}", *args],
+        cwd=cwd, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    url = f"http://127.0.0.1:{port}"
+    try:
+        deadline = time.monotonic() + 30
+        while True:
+            try:
+                urllib.request.urlopen(url + ready_path, timeout=1).read()
+                break
+            except OSError:
+                if time.monotonic() > deadline or server.poll() is not None:
+                    raise RuntimeError(f"Server {' '.join(args)} did not start")
+                time.sleep(0.1)
+        yield url
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+@contextlib.contextmanager
+def serve(args: List[str], env: Optional[Dict[str, str]] = None, ready_path: str = "/api/health/"):
+    """Run the backend under gunicorn with ``args`` against a scratch SQLite database."""
+    with tempfile.TemporaryDirectory() as scratch:
+        env = {
+            **os.environ,
+            "DEBUG": "True",
+            "DATABASE_URL": f"sqlite:///{scratch}/bench.sqlite3",
+            "CHATBOT_WRITE_BEHIND": "False",
+            **(env or {}),
+        }
+        subprocess.run([sys.executable, "manage.py", "migrate", "--noinput", "-v0"], cwd=BACKEND_DIR, env=env, check=True)
+        with gunicorn(args, BACKEND_DIR, env, ready_path) as url:
+            yield url
+
+
+def post_json(url: str, payload: dict) -> dict:
+    request = urllib.request.Request(
+        url, data=json.dumps(payload).encode(), headers={"Content-Type": "application/json"},
+    )
+    with urllib.request.urlopen(request, timeout=30) as response:
+        return json.loads(response.read())
+
+
+def drive(send: Callable[[dict], object], total: int, concurrency: int) -> Dict[str, float]:
+    """Send ``total`` chat messages from ``concurrency`` threads through ``send``."""
+    def timed(i):
+        message = MESSAGE_CORPUS[i % len(MESSAGE_CORPUS)]
+        start = time.perf_counter()
+        send({"message": message, "session_id": f"bench-{i % concurrency}"})
+        return time.perf_counter() - start
+
+    with ThreadPoolExecutor(concurrency) as pool:
+        start = time.perf_counter()
+        latencies = list(pool.map(timed, range(total)))
+        return summarize(latencies, time.perf_counter() - start)
+
+
+def http_sender(url: str) -> Callable[[dict], object]:
+    return lambda payload: post_json(url, payload)
+
+
+def bench_servers(rounds: int, concurrency: int = 32) -> Dict[str, Dict[str, float]]:
+    total = max(rounds // 4, concurrency)
+    results = {}
+    for name, args in SERVER_PROFILES.items():
+        with serve(args) as url:
+            send = http_sender(url + "/api/chat/")
+            drive(send, concurrency, concurrency)  # warm up
+            results[name] = drive(send, total, concurrency)
+    return results
+
+
+def bench_client(rounds: int, concurrency: int = 8) -> Dict[str, Dict[str, float]]:
+    """/api/chat/ in this process through the Django test client, on throwaway test databases."""
+    from django.test import Client
+    from django.test.utils import setup_databases, setup_test_environment, teardown_databases, teardown_test_environment
+
+    from .views import conversation_log
+
+    setup_test_environment()
+    databases = setup_databases(verbosity=0, interactive=False)
+    local = threading.local()
+
+    def send(payload):
+        if not hasattr(local, "client"):
+            local.client = Client()
+        response = local.client.post("/api/chat/", payload, content_type="application/json")
+        assert response.status_code == 200, response.content
+
+    try:
+        drive(send, concurrency, concurrency)  # warm up
+        results = {"test-client": drive(send, max(rounds // 2, concurrency), concurrency)}
+        conversation_log.flush()
+    finally:
+        teardown_databases(databases, verbosity=0)
+        teardown_test_environment()
+    return results
+
+
+# Gunicorn runs without a config file, or with the preloading gunicorn.conf.py
+STARTUP_PROFILES = {
+    "default": ["frecha_api.wsgi:application", "--config", os.devnull],
+    "preload": ["frecha_api.wsgi:application", "--config", str(BACKEND_DIR / "gunicorn.conf.py")],
+}
+
+
+def worker_pids(master: int) -> List[int]:
+    with open(f"/proc/{master}/task/{master}/children") as f:
+        return [int(pid) for pid in f.read().split()]
+
+
+def bench_startup(rounds: int) -> Dict[str, Dict[str, float]]:
+    """First /api/chat/ request after the worker is killed and replaced, per profile (Linux only).
+
+    The request is sent right after the kill, so it waits for the new
+    worker to boot, as a request does after a crash, restart or scale-up.
+    """
+    rounds = max(rounds // 400, 3)
+    results = {}
+    for name, args in STARTUP_PROFILES.items():
+        with tempfile.TemporaryDirectory() as scratch:
+            pidfile = os.path.join(scratch, "gunicorn.pid")
+            with serve([*args, "--pid", pidfile]) as url:
+                with open(pidfile) as f:
+                    master = int(f.read())
+                latencies = []
+                for i in range(rounds):
+                    os.kill(worker_pids(master)[0], signal.SIGKILL)
+                    start = time.perf_counter()
+                    post_json(url + "/api/chat/", {"message": "bundle", "session_id": f"startup-{i}"})
+                    latencies.append(time.perf_counter() - start)
+                results[name] = summarize(latencies)
+    return results
+
+
+def bench_proxy(rounds: int, concurrency: int = 16) -> Dict[str, Dict[str, float]]:
+    """Flask /chat proxy in front of a local backend, against hitting the backend directly."""
+    if not (FRONTEND_DIR / "app.py").exists():
+        raise RuntimeError(f"No frontend checkout at {FRONTEND_DIR}")
+    total = max(rounds // 4, concurrency)
+    results = {}
+    with serve(SERVER_PROFILES["wsgi-gthread"]) as backend_url:
+        frontend_env = {**os.environ, "DJANGO_BACKEND_URL": backend_url}
+        frontend_args = ["app:app", "--worker-class", "gthread", "--threads", "8"]
+        with gunicorn(frontend_args, FRONTEND_DIR, frontend_env, "/health") as frontend_url:
+            for name, url in (("direct", backend_url + "/api/chat/"), ("flask-proxy", frontend_url + "/chat")):
+                send = http_sender(url)
+                drive(send, concurrency, concurrency)  # warm up
+                results[name] = drive(send, total, concurrency)
+    return results
+
+
+BENCHMARKS = {
+    "matcher": bench_matcher,
+    "listings": bench_listings,
+    "fuzzy": bench_fuzzy,
+    "language": bench_language,
+    "plans": bench_plans,
+    "cache": bench_cache,
+    "intents": bench_intents,
+    "client": bench_client,
+    "servers": bench_servers,
+    "proxy": bench_proxy,
+    "startup": bench_startup,
+}
+
+# Benchmarks whose variants are alternatives to the first one
+COMPARISONS = {"matcher", "listings", "fuzzy", "plans", "cache", "servers", "proxy", "startup"}
+
+
+def run(names: Iterable[str], rounds: int) -> Dict[str, Dict[str, Dict[str, float]]]:
+    return {name: BENCHMARKS[name](rounds) for name in names}
+
+
+def regressions(results: Dict, baseline: Dict, threshold: float) -> List[str]:
+    """Variants in ``results`` slower than in ``baseline`` by more than ``threshold`` (0.2 = 20%)."""
+    failures = []
+    for name, variants in results.items():
+        for label, stats in variants.items():
+            before = baseline.get(name, {}).get(label)
+            if not before:
+                continue
+            for key in ("seconds", "p95"):
+                if key in stats and before.get(key) and stats[key] > before[key] * (1 + threshold):
+                    failures.append(f"{name}/{label} {key}: {before[key] * 1e6:.2f} -> {stats[key] * 1e6:.2f} µs")
+    return failures
@@ -0,0 +1,108 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from types import MappingProxyType
+from typing import Any, Mapping, NamedTuple, Optional, Tuple
+
+from .plans import PlanIndex
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CATALOG_PATH = Path(__file__).resolve().parent / "data" / "catalog.json"
+
+
+class CatalogSnapshot(NamedTuple):
+    """One immutable version of the product catalog, its plan indexes and rendered listings."""
+
+    version: str
+    bundle_plans: Mapping[str, Tuple[Mapping[str, Any], ...]]
+    sme_services: Mapping[str, Mapping[str, Any]]
+    responses: Mapping[Tuple[str, str], str]
+    plans: PlanIndex
+
+
+def freeze(value):
+    """Recursively turn dicts into read-only mappings and lists into tuples."""
+    if isinstance(value, dict):
+        return MappingProxyType({key: freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(freeze(item) for item in value)
+    return value
+
+
+class CatalogFile:
+    """JSON catalog file that is re-read when its mtime changes.
+
+    ``poll()`` stats the file at most once per ``poll_interval`` seconds, so
+    calling it on every request costs a clock read. The version is the
+    file's declared ``version`` plus a digest of its bytes, so every content
+    change produces a new version even if the declared one is not bumped.
+    """
+
+    def __init__(self, path=None, poll_interval: float = 5.0):
+        self.path = Path(path or DEFAULT_CATALOG_PATH)
+        self.poll_interval = poll_interval
+        self._mtime: Optional[int] = None
+        self._next_poll = 0.0
+
+    def load(self) -> Tuple[str, dict]:
+        mtime = os.stat(self.path).st_mtime_ns
+        raw = self.path.read_bytes()
+        data = json.loads(raw)
+        digest = hashlib.sha1(raw).hexdigest()[:8]
+        declared = data.get("version")
+        version = f"{declared}.{digest}" if declared is not None else digest
+        self._mtime = mtime
+        return version, data
+
+    def poll(self) -> bool:
+        """Return True when the file changed since the last ``load()``."""
+        now = time.monotonic()
+        if now < self._next_poll:
+            return False
+        self._next_poll = now + self.poll_interval
+        try:
+            return os.stat(self.path).st_mtime_ns != self._mtime
+        except OSError:
+            return False
+
+
+class CatalogHolder:
+    """Holds the current CatalogSnapshot and swaps it when the file changes.
+
+    Readers take ``current()`` once per request and use that snapshot
+    throughout, so they never lock and never see a half-built catalog. The
+    reload runs in whichever thread notices the change first; other threads
+    keep serving the previous snapshot meanwhile.
+    """
+
+    def __init__(self, source: CatalogFile, build):
+        self.source = source
+        self.build = build
+        self._reload_lock = threading.Lock()
+        version, data = source.load()
+        self.snapshot: CatalogSnapshot = build(version, data)
+
+    def current(self) -> CatalogSnapshot:
+        if self.source.poll():
+            self.reload()
+        return self.snapshot
+
+    def reload(self) -> CatalogSnapshot:
+        if not self._reload_lock.acquire(blocking=False):
+            return self.snapshot
+        try:
+            version, data = self.source.load()
+            if version != self.snapshot.version:
+                self.snapshot = self.build(version, data)
+                logger.info("Loaded catalog version %s from %s", version, self.source.path)
+        except (OSError, ValueError, KeyError, TypeError) as exc:
+            # Keep serving the last good snapshot, e.g. while the file is half written.
+            logger.warning("Could not reload catalog from %s: %s", self.source.path, exc)
+        finally:
+            self._reload_lock.release()
+        return self.snapshot
@@ -1,14 +1,90 @@
+import logging
 import random
-from typing import Dict, List, Optional
+import re
+from types import MappingProxyType
+from typing import Callable, Dict, List, Mapping, Optional, Tuple
+
+from .catalog import CatalogFile, CatalogHolder, CatalogSnapshot, freeze
+from .fuzzy import FuzzyKeywordIndex
+from .language import LanguageDetector
+from .matcher import KeywordMatcher
+from .metrics import MESSAGES, stage
+from .phones import normalize_phone
+from .plans import PlanIndex, PlanRecord, find_amount, find_gigabytes, plan_records
+from .response_cache import normalize_message
+from .sessions import DEFAULT_LANGUAGE, SessionState
+
+logger = logging.getLogger(__name__)
+
+PROVIDERS = ("vodacom", "yas", "airtel", "halotel")
+
+# Checked in this order; the first intent with a keyword in the message wins.
+INTENT_KEYWORDS = {
+    "english": ["english", "kiingereza"],
+    "swahili": ["swahili", "kiswahili"],
+    "lead": ["buy", "place an order", "want to order", "like to order", "subscribe",
+             "nunua", "kununua", "agiza", "kuagiza", "jiunge", "kujiunga"],
+    "cheapest": ["cheap", "lowest price", "nafuu", "bei rahisi"],
+    "greeting": ["hello", "hi", "mambo", "habari"],
+    "help": ["help", "msaada"],
+    # Above bundle and provider, which they filter: "airtel bundle under 50,000"
+    "budget": ["under", "below", "less than", "chini ya", "isiyozidi", "budget", "bajeti"],
+    "capacity": ["at least", "or more", "angalau", "kuanzia", "gb", "tb"],
+    "bundle": ["bundle", "router", "data"],
+    "sme": ["sme", "business", "biashara"],
+    "provider": list(PROVIDERS),
+    "contact": ["contact", "call", "simu", "wasiliana"],
+}
+
+# Only matched as whole words or phrases: "border" or "unsubscribe" must not
+# start a lead capture, "understand" is no budget and "chini" no greeting
+WHOLE_WORDS = frozenset(INTENT_KEYWORDS["lead"] + INTENT_KEYWORDS["budget"] + INTENT_KEYWORDS["capacity"] + ["hi"])
+
+# Typos are only corrected towards the other keywords: near misses of
+# whole-word keywords are ordinary words ("unsubscribe", "wonder")
+FUZZY_KEYWORDS = tuple(dict.fromkeys(
+    word for words in INTENT_KEYWORDS.values() for word in words if word not in WHOLE_WORDS
+))
+
+# Language switches are replayed on a cache hit; a lead capture is never cached
+LANGUAGE_INTENTS = frozenset({"english", "swahili"})
+UNCACHED_INTENTS = frozenset({"lead"})
+
+# Lead-capture questions, asked in this order; the keys are Lead fields.
+LEAD_STEPS = ("name", "phone", "location", "current_provider", "interest")
+LEAD_CANCEL_WORDS = frozenset({"cancel", "stop", "acha", "sitisha"})
+
+# Plans listed for "cheapest"
+CHEAPEST_COUNT = 3
+
+# Smaller numbers next to a provider or bundle are not prices ("4g router")
+MIN_PRICE = 1000
+
+WORDS = re.compile(r"[^\W\d_]+")
+
+# Said the same way in both languages, so they carry no language signal
+NEUTRAL_WORDS = PROVIDERS + ("bundle", "router", "data", "sme", "internet", "wifi", "ok", "okay", "mb", "gb", "tb", "tzs", "sh")
 
 class FrechaServicesChatbot:
-    def __init__(self):
+    def __init__(self, catalog_path=None, catalog_poll_interval: float = 5.0,
+                 lead_sink: Optional[Callable[[dict], object]] = None,
+                 fuzzy_max_distance: int = 2, fuzzy_cache_size: int = 1024,
+                 language_detection: bool = True, response_cache=None):
         self.company_name = "Frecha iotech"
-        self.current_language = "swahili"
+        self.default_language = DEFAULT_LANGUAGE
+        # Receives the Lead fields of every completed capture
+        self.lead_sink = lead_sink
+        # Optional ResponseCache shared by workers
+        self.response_cache = response_cache
         
-        self.translations = self.load_translations()
-        self.bundle_plans = self.load_bundle_plans()
-        self.sme_services = self.load_sme_services()
+        # Read-only, so workers forked from a preloaded master never write to (and copy) it
+        self.translations = freeze(self.load_translations())
+        self.catalog = CatalogHolder(CatalogFile(catalog_path, catalog_poll_interval), self.build_catalog)
+        self.matcher = KeywordMatcher(INTENT_KEYWORDS, whole_words=WHOLE_WORDS)
+        self.fuzzy = None
+        if fuzzy_max_distance > 0:
+            self.fuzzy = FuzzyKeywordIndex(FUZZY_KEYWORDS, fuzzy_max_distance, fuzzy_cache_size)
+        self.detector = LanguageDetector.load(ignore=NEUTRAL_WORDS) if language_detection else None
 
     def load_translations(self):
         return {
@@ -17,115 +93,345 @@ class FrechaServicesChatbot:
                 "help": "I can help with:\n• Bundle router plans\n• SME services\n• Provider comparisons\n• Contact information",
                 "contact_info": "📞 Phone: +255 757 315 593\n✉️ Email: frechaiotech@gmail.com\n📍 Location: Dodoma",
                 "language_switched": "🌍 Switched to English!",
-                "providers": "Our providers: 🟥 Vodacom, 🟦 Yas, 🟥Airtel, 🟨 Halotel"
+                "providers": "Our providers: 🟥 Vodacom, 🟦 Yas, 🟥Airtel, 🟨 Halotel",
+                "bundles_title": "📦 BUNDLE ROUTER PLANS:",
+                "provider_bundles_title": "📦 {provider} PLANS:",
+                "sme_title": "🏢 SME BUSINESS SOLUTIONS:",
+                "features": "Features",
+                "cheapest_title": "💰 CHEAPEST PLANS:",
+                "best_value": "Best value per GB: {plan} ({price} per GB)",
+                "budget_title": "💰 PLANS UP TO TZS {amount}:",
+                "provider_budget_title": "💰 {provider} PLANS UP TO TZS {amount}:",
+                "budget_none": "No plan costs TZS {amount} or less. The cheapest is:",
+                "budget_ask": "What is your budget? For example: \"under 50,000\".",
+                "capacity_title": "📶 PLANS WITH AT LEAST {gb}GB:",
+                "provider_capacity_title": "📶 {provider} PLANS WITH AT LEAST {gb}GB:",
+                "capacity_cheapest": "Cheapest of these: {plan}",
+                "capacity_none": "No plan offers {gb}GB or more.",
+                "capacity_ask": "How much data do you need? For example: \"at least 50GB\".",
+                "provider_not_found": "Provider not found.",
+                "lead_ask_name": "Great! Let's get you connected. What is your name? (type 'cancel' to stop)",
+                "lead_ask_phone": "Which phone number should our team call you on?",
+                "lead_bad_phone": "That doesn't look like a phone number. Please send it like 0757 315 593.",
+                "lead_ask_location": "Where are you located?",
+                "lead_ask_current_provider": "Which provider do you use now? (Vodacom, Yas, Airtel, Halotel or none)",
+                "lead_ask_interest": "What are you interested in? (bundle router or SME services)",
+                "lead_done": "✅ Thank you {name}! Our team will call you on {phone} soon.",
+                "lead_failed": "Sorry, we could not save your details just now. Send your last answer again to retry, or call +255 757 315 593.",
+                "lead_cancelled": "Okay, cancelled. How else can I help?"
             },
             "swahili": {
                 "greeting": f"Karibu {self.company_name}! Mshirika wako wa kuaminika kwa bundle router na huduma za SME.",
                 "help": "Naweza kukusaidia kuhusu:\n• Mipango ya bundle router\n• Huduma za SME\n• Kulinganisha watoa huduma\n• Mawasiliano",
                 "contact_info": "📞 Simu: +255 757 315 593\n✉️ Barua pepe: frechaiotech@gmail.com\n📍 Mahali: Dodoma",
                 "language_switched": "🌍 Nimebadilisha lugha kwa Kiswahili!",
-                "providers": "Watoa huduma wetu: 🟥 Vodacom, 🟦 Yas, 🟥 Airtel, 🟨Halotel"
+                "providers": "Watoa huduma wetu: 🟥 Vodacom, 🟦 Yas, 🟥 Airtel, 🟨Halotel",
+                "bundles_title": "📦 MIPANGO YA BUNDLE ROUTER:",
+                "provider_bundles_title": "📦 MIPANGO YA {provider}:",
+                "sme_title": "🏢 HUDUMA ZA SME KWA BIASHARA:",
+                "features": "Vipengele",
+                "cheapest_title": "💰 MIPANGO YA BEI NAFUU:",
+                "best_value": "Thamani bora kwa GB: {plan} ({price} kwa GB)",
+                "budget_title": "💰 MIPANGO HADI TZS {amount}:",
+                "provider_budget_title": "💰 MIPANGO YA {provider} HADI TZS {amount}:",
+                "budget_none": "Hakuna mpango wa TZS {amount} au chini. Wa bei nafuu zaidi ni:",
+                "budget_ask": "Bajeti yako ni kiasi gani? Kwa mfano: \"chini ya 50,000\".",
+                "capacity_title": "📶 MIPANGO YENYE ANGALAU {gb}GB:",
+                "provider_capacity_title": "📶 MIPANGO YA {provider} YENYE ANGALAU {gb}GB:",
+                "capacity_cheapest": "Wa bei nafuu zaidi kati ya hii: {plan}",
+                "capacity_none": "Hakuna mpango wenye {gb}GB au zaidi.",
+                "capacity_ask": "Unahitaji data kiasi gani? Kwa mfano: \"angalau 50GB\".",
+                "provider_not_found": "Mtoa huduma hajapatikana.",
+                "lead_ask_name": "Vizuri! Tukuunganishe na timu yetu. Jina lako ni nani? (andika 'acha' kusitisha)",
+                "lead_ask_phone": "Timu yetu ikupigie kwa namba gani ya simu?",
+                "lead_bad_phone": "Hiyo si namba ya simu. Tafadhali tuma kama 0757 315 593.",
+                "lead_ask_location": "Uko wapi (mahali)?",
+                "lead_ask_current_provider": "Unatumia mtoa huduma gani sasa? (Vodacom, Yas, Airtel, Halotel au hakuna)",
+                "lead_ask_interest": "Unavutiwa na nini? (bundle router au huduma za SME)",
+                "lead_done": "✅ Asante {name}! Timu yetu itakupigia kwa {phone} hivi karibuni.",
+                "lead_failed": "Samahani, hatukuweza kuhifadhi taarifa zako sasa hivi. Tuma jibu lako la mwisho tena, au piga +255 757 315 593.",
+                "lead_cancelled": "Sawa, nimesitisha. Nikusaidie nini kingine?"
             }
         }
 
-    def load_bundle_plans(self):
-        return {
-            "vodacom": [
-                {"name": "DATA PLAN", "price": "TZS 15,000", "data": "10GB"},
-                {"name": "UNLIMITED HOME", "price": "TZS 240,000", "data": "Unlimited"}
-            ],
-            "yas": [
-                {"name": "Yas Home", "price": "TZS 50,000", "data": "60GB"},
-                {"name": "Yas Business", "price": "TZS 100,000", "data": "125GB"}
-            ],
-            "airtel": [
-                {"name": "Airtel Home", "price": "TZS 60,000", "data": "75GB"},
-                {"name": "Airtel Business", "price": "TZS 100,000", "data": "Unlimited"}
-            ],
-            "halotel": [
-                {"name": "Halo Home", "price": "TZS 46,000", "data": "60GB"},
-                {"name": "Halo Business", "price": "TZS 38,000", "data": "50GB"}
-            ]
-        }
+    def build_catalog(self, version: str, data: dict) -> CatalogSnapshot:
+        bundle_plans = freeze(data["bundle_plans"])
+        sme_services = freeze(data["sme_services"])
+        plans = PlanIndex(plan_records(bundle_plans))
+        responses = self.render_listings(bundle_plans, sme_services, plans)
+        return CatalogSnapshot(version, bundle_plans, sme_services, responses, plans)
 
-    def load_sme_services(self):
-        return {
-            "startup": {
-                "name": "Startup Special",
-                "price": "TZS 120,000/month",
-                "features": ["Shared 10Mbps", "Business router", "Basic support"]
-            },
-            "premium": {
-                "name": "SME Premium", 
-                "price": "TZS 350,000/month",
-                "features": ["Dedicated 50Mbps", "Advanced security", "24/7 Support"]
-            }
-        }
+    @property
+    def bundle_plans(self) -> Mapping[str, tuple]:
+        return self.catalog.snapshot.bundle_plans
 
-    def get_response(self, user_input: str) -> str:
-        user_input_lower = user_input.lower().strip()
-        
+    @property
+    def sme_services(self) -> Mapping[str, Mapping]:
+        return self.catalog.snapshot.sme_services
+
+    def get_response(self, user_input: str, state: Optional[SessionState] = None,
+                     language: Optional[str] = None) -> str:
+        """Answer ``user_input`` for the session in ``state``.
+
+        All per-conversation data lives in ``state``, so one instance can
+        serve many sessions from concurrent threads. A known ``language``
+        fixes the reply language for the session; otherwise it follows the
+        language each message is written in until the user picks one.
+        Outside a lead capture, replies come from ``response_cache`` when set.
+        """
+        if state is None:
+            state = SessionState(None, self.default_language)
+        version = self.catalog.current().version
+        if language in self.translations:
+            self.switch_language(language, state)
+        if state.lead_step is not None:
+            intent = "lead"
+            with stage("respond"):
+                response = self.continue_lead(user_input.strip(), state)
+        else:
+            text = normalize_message(user_input)
+            # Looked up before detection: text and session language decide the reply and its language
+            session_language, locked = state.language, state.language_locked
+            cached = None
+            if self.response_cache is not None:
+                with stage("cache"):
+                    cached = self.response_cache.get(text, session_language, locked, version)
+            if cached is not None:
+                state.language, intent, response = cached
+                if intent in LANGUAGE_INTENTS:
+                    self.switch_language(intent, state)
+            else:
+                if self.detector is not None and not locked:
+                    with stage("detect"):
+                        detected = self.detector.detect(text)
+                    if detected is not None:
+                        state.language = detected
+                with stage("match"):
+                    intent, keywords = self.match(text)
+                with stage("respond"):
+                    response = self.respond(intent, keywords, state, text)
+                if self.response_cache is not None and intent not in UNCACHED_INTENTS:
+                    self.response_cache.set(text, session_language, locked, version, (state.language, intent, response))
+        MESSAGES.labels(intent or "other", state.language).inc()
+        return response
+
+    def respond(self, intent: Optional[str], keywords, state: SessionState, text: str = "") -> str:
         # Language switching
-        if any(word in user_input_lower for word in ['english', 'kiingereza']):
-            self.current_language = "english"
-            return self.t("language_switched")
-        
-        if any(word in user_input_lower for word in ['swahili', 'kiswahili']):
-            self.current_language = "swahili"
-            return self.t("language_switched")
+        if intent in LANGUAGE_INTENTS:
+            self.switch_language(intent, state)
+            return self.t("language_switched", state.language)
 
         # Intent detection
-        if any(word in user_input_lower for word in ['hello', 'hi', 'mambo', 'habari']):
-            return f"{self.t('greeting')}\n\n{self.t('providers')}"
+        if intent == "lead":
+            return self.start_lead(keywords, state)
+
+        elif intent == "budget":
+            return self.show_plans_under(find_amount(text), state.language, self.find_provider(keywords),
+                                         find_gigabytes(text))
+
+        elif intent == "capacity":
+            return self.show_plans_with(find_gigabytes(text), state.language, self.find_provider(keywords))
+
+        elif intent == "cheapest":
+            return self.catalog.snapshot.responses[state.language, "cheapest"]
+
+        elif intent == "greeting":
+            return f"{self.t('greeting', state.language)}\n\n{self.t('providers', state.language)}"
         
-        elif any(word in user_input_lower for word in ['help', 'msaada']):
-            return self.t("help")
+        elif intent == "help":
+            return self.t("help", state.language)
         
-        elif any(word in user_input_lower for word in ['bundle', 'router', 'data']):
-            return self.handle_bundle_inquiry(user_input_lower)
+        elif intent == "bundle":
+            return self.handle_bundle_inquiry(keywords, state.language, text)
         
-        elif any(word in user_input_lower for word in ['sme', 'business', 'biashara']):
-            return self.handle_sme_inquiry()
+        elif intent == "sme":
+            return self.handle_sme_inquiry(state.language)
         
-        elif any(word in user_input_lower for word in ['vodacom', 'yas', 'airtel', 'halotel']):
-            return self.show_provider_bundles(user_input_lower)
+        elif intent == "provider":
+            return self.show_provider_plans(self.find_provider(keywords), text, state.language)
         
-        elif any(word in user_input_lower for word in ['contact', 'call', 'simu', 'wasiliana']):
-            return self.t("contact_info")
+        elif intent == "contact":
+            return self.t("contact_info", state.language)
         
         else:
-            return self.t("help")
-
-    def handle_bundle_inquiry(self, text: str) -> str:
-        for provider in ["vodacom", "yas", "airtel", "halotel"]:
-            if provider in text:
-                return self.show_provider_bundles(provider)
-        return self.show_all_bundles()
-
-    def show_all_bundles(self) -> str:
-        response = "📦 BUNDLE ROUTER PLANS:\n\n"
-        for provider, plans in self.bundle_plans.items():
-            response += f"**{provider.upper()}**\n"
-            for plan in plans:
-                response += f"• {plan['name']}: {plan['price']} - {plan['data']}\n"
-            response += "\n"
-        return response
+            return self.t("help", state.language)
+
+    def switch_language(self, language: str, state: SessionState) -> None:
+        state.language = language
+        state.language_locked = True
+
+    def match(self, text: str):
+        """Intent and keywords of lowercased ``text``.
+
+        Misspelt words ("vodakom", "msada") are corrected only when no
+        keyword matches exactly, so the common case stays one regex pass.
+        """
+        intent, keywords = self.matcher.match(text)
+        if intent is None and self.fuzzy is not None:
+            corrected = " ".join(filter(None, map(self.fuzzy.correct, WORDS.findall(text))))
+            if corrected:
+                intent, keywords = self.matcher.match(corrected)
+        return intent, keywords
+
+    def classify(self, user_input: str) -> Tuple[str, str]:
+        """Intent and provider of a message, as get_response would see them ("" when none)."""
+        intent, keywords = self.match(user_input.lower().strip())
+        return intent or "other", self.find_provider(keywords) or ""
+
+    def find_provider(self, keywords) -> Optional[str]:
+        for provider in PROVIDERS:
+            if provider in keywords:
+                return provider
+        return None
+
+    def find_interest(self, keywords) -> Optional[str]:
+        for interest in ("sme", "bundle"):
+            if keywords.intersection(INTENT_KEYWORDS[interest]):
+                return interest
+        return None
+
+    def start_lead(self, keywords, state: SessionState) -> str:
+        """Begin a lead capture, skipping what the opening message already said."""
+        state.lead = {}
+        provider = self.find_provider(keywords)
+        if provider:
+            state.lead["current_provider"] = provider
+        interest = self.find_interest(keywords)
+        if interest:
+            state.lead["interest"] = interest
+        return self.next_lead_question(state)
+
+    def continue_lead(self, answer: str, state: SessionState) -> str:
+        if LEAD_CANCEL_WORDS.intersection(WORDS.findall(answer.lower())):
+            state.lead_step = state.lead = None
+            return self.t("lead_cancelled", state.language)
+
+        step = state.lead_step
+        if step == "phone":
+            value = normalize_phone(answer)
+            if value is None:
+                return self.t("lead_bad_phone", state.language)
+        elif step == "current_provider":
+            value = self.find_provider(self.match(answer.lower())[1]) or ""
+        elif step == "interest":
+            value = self.find_interest(self.match(answer.lower())[1]) or answer[:50]
+        else:
+            value = answer[:100]
+        state.lead[step] = value
+        return self.next_lead_question(state)
+
+    def next_lead_question(self, state: SessionState) -> str:
+        for step in LEAD_STEPS:
+            if step not in state.lead:
+                state.lead_step = step
+                return self.t(f"lead_ask_{step}", state.language)
 
-    def show_provider_bundles(self, provider: str) -> str:
-        if provider in self.bundle_plans:
-            plans = self.bundle_plans[provider]
-            response = f"📦 {provider.upper()} PLANS:\n\n"
-            for plan in plans:
-                response += f"• {plan['name']}: {plan['price']} - {plan['data']}\n"
-            return response
-        return "Provider not found."
-
-    def handle_sme_inquiry(self) -> str:
-        response = "🏢 SME BUSINESS SOLUTIONS:\n\n"
-        for package_key, package in self.sme_services.items():
-            response += f"• {package['name']}: {package['price']}\n"
-            response += f"  Features: {', '.join(package['features'])}\n\n"
+        lead = dict(state.lead, language=state.language)
+        # Clear only once the sink has the lead; if it raises, resending the last answer retries
+        if self.lead_sink is not None:
+            try:
+                self.lead_sink(lead)
+            except Exception:
+                logger.exception("Could not save lead for %s", lead["phone"])
+                return self.t("lead_failed", state.language)
+        state.lead_step = state.lead = None
+        return self.t("lead_done", state.language).format(name=lead["name"], phone=lead["phone"])
+
+    def handle_bundle_inquiry(self, keywords, language: str, text: str = "") -> str:
+        provider = self.find_provider(keywords)
+        if provider:
+            return self.show_provider_plans(provider, text, language)
+        return self.show_all_bundles(language)
+
+    def render_listings(self, bundle_plans, sme_services, index: PlanIndex) -> Mapping[Tuple[str, str], str]:
+        """Render every listing of a catalog once per language."""
+        responses = {}
+        for language in self.translations:
+            text = self.translations[language]
+            provider_blocks = []
+            for provider, plans in bundle_plans.items():
+                lines = "".join(f"• {plan['name']}: {plan['price']} - {plan['data']}\n" for plan in plans)
+                provider_blocks.append(f"**{provider.upper()}**\n{lines}\n")
+                title = text["provider_bundles_title"].format(provider=provider.upper())
+                responses[language, f"bundles:{provider}"] = f"{title}\n\n{lines}"
+            responses[language, "bundles"] = f"{text['bundles_title']}\n\n" + "".join(provider_blocks)
+
+            packages = "".join(
+                f"• {package['name']}: {package['price']}\n"
+                f"  {text['features']}: {', '.join(package['features'])}\n\n"
+                for package in sme_services.values()
+            )
+            responses[language, "sme"] = f"{text['sme_title']}\n\n{packages}"
+
+            cheapest = f"{text['cheapest_title']}\n\n{self.plan_lines(index.cheapest(CHEAPEST_COUNT))}"
+            best = index.best_value()
+            if best is not None:
+                value = text["best_value"].format(plan=self.plan_label(best), price=f"TZS {best.price_per_gb:,.0f}")
+                cheapest += f"\n{value}"
+            responses[language, "cheapest"] = cheapest
+        return MappingProxyType(responses)
+
+    def plan_label(self, plan: PlanRecord) -> str:
+        return f"{plan.name} ({plan.provider.upper()})"
+
+    def plan_lines(self, plans) -> str:
+        return "".join(f"• {self.plan_label(plan)}: {plan.price_label} - {plan.data_label}\n" for plan in plans)
+
+    def plans_title(self, kind: str, language: str, provider: Optional[str], **values) -> str:
+        if provider:
+            return self.t(f"provider_{kind}_title", language).format(provider=provider.upper(), **values)
+        return self.t(f"{kind}_title", language).format(**values)
+
+    def show_plans_under(self, amount: Optional[int], language: str, provider: Optional[str] = None,
+                         gigabytes: Optional[float] = None) -> str:
+        if amount is None:
+            if gigabytes is not None:
+                return self.show_plans_with(gigabytes, language, provider)
+            return self.show_provider_bundles(provider, language) if provider else self.t("budget_ask", language)
+        plans = self.catalog.snapshot.plans
+        matches = plans.matching(provider, max_price=amount, min_data=gigabytes)
+        if not matches:
+            cheapest = plans.matching(provider, min_data=gigabytes)[:1]
+            return f"{self.t('budget_none', language).format(amount=f'{amount:,}')}\n\n{self.plan_lines(cheapest)}"
+        return f"{self.plans_title('budget', language, provider, amount=f'{amount:,}')}\n\n{self.plan_lines(matches)}"
+
+    def show_plans_with(self, gigabytes: Optional[float], language: str, provider: Optional[str] = None) -> str:
+        if gigabytes is None:
+            return self.show_provider_bundles(provider, language) if provider else self.t("capacity_ask", language)
+        plans = self.catalog.snapshot.plans
+        size = f"{gigabytes:g}"
+        matches = plans.at_least(gigabytes)
+        if provider:
+            matches = tuple(plan for plan in matches if plan.provider == provider)
+        if not matches:
+            return self.t("capacity_none", language).format(gb=size)
+        best = (min(matches, key=lambda plan: (plan.price, -plan.data_gb)) if provider
+                else plans.cheapest_at_least(gigabytes))
+        cheapest = self.t("capacity_cheapest", language).format(plan=self.plan_label(best))
+        title = self.plans_title("capacity", language, provider, gb=size)
+        return f"{title}\n\n{self.plan_lines(matches)}\n{cheapest}"
+
+    def show_provider_plans(self, provider: str, text: str, language: str) -> str:
+        """A provider's plans, capped by any price or data size in the message ("airtel 50,000")."""
+        amount = find_amount(text)
+        gigabytes = find_gigabytes(text)
+        if amount is not None and amount >= MIN_PRICE:
+            return self.show_plans_under(amount, language, provider, gigabytes)
+        if gigabytes is not None:
+            return self.show_plans_with(gigabytes, language, provider)
+        return self.show_provider_bundles(provider, language)
+
+    def show_all_bundles(self, language: str) -> str:
+        return self.catalog.snapshot.responses[language, "bundles"]
+
+    def show_provider_bundles(self, provider: str, language: str) -> str:
+        response = self.catalog.snapshot.responses.get((language, f"bundles:{provider}"))
+        if response is None:
+            return self.t("provider_not_found", language)
         return response
 
-    def t(self, key: str) -> str:
-        return self.translations[self.current_language].get(key, key)
\ No newline at end of file
+    def handle_sme_inquiry(self, language: str) -> str:
+        return self.catalog.snapshot.responses[language, "sme"]
+
+    def t(self, key: str, language: str) -> str:
+        return self.translations[language].get(key, key)
\ No newline at end of file
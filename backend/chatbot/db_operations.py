@@ -0,0 +1,159 @@
+from contextlib import nullcontext
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import transaction
+from django.db.migrations.operations.base import Operation
+
+from .search import SEARCH_CONFIG, SEARCH_VECTOR_COLUMN, fts_table
+
+
+class AddIndexConcurrentlyIfPostgres(AddIndexConcurrently):
+    """CREATE INDEX CONCURRENTLY on PostgreSQL, so large tables keep taking
+    writes while the index builds; a plain AddIndex on other databases."""
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            return super().database_forwards(app_label, schema_editor, from_state, to_state)
+        model = to_state.apps.get_model(app_label, self.model_name)
+        if self.allow_migrate_model(schema_editor.connection.alias, model):
+            schema_editor.add_index(model, self.index)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            return super().database_backwards(app_label, schema_editor, from_state, to_state)
+        model = from_state.apps.get_model(app_label, self.model_name)
+        if self.allow_migrate_model(schema_editor.connection.alias, model):
+            schema_editor.remove_index(model, self.index)
+
+
+class AddFullTextSearch(Operation):
+    """Full-text index over ``fields`` of ``model_name``, kept in sync by the
+    database on every write (see chatbot.search).
+
+    PostgreSQL gets a tsvector column filled by a trigger, backfilled in
+    batches and indexed with CREATE INDEX CONCURRENTLY, so the table keeps
+    taking writes throughout; the migration using it must set
+    ``atomic = False``. SQLite gets an external-content FTS5 table plus
+    triggers. Other databases, and SQLite builds without FTS5, are skipped
+    and search falls back to LIKE.
+    """
+    reversible = True
+    # Rows per backfill UPDATE, each committed on its own
+    backfill_batch = 10000
+
+    def __init__(self, model_name, fields):
+        self.model_name = model_name
+        self.fields = fields
+
+    def deconstruct(self):
+        return self.__class__.__name__, [], {'model_name': self.model_name, 'fields': self.fields}
+
+    def state_forwards(self, app_label, state):
+        pass
+
+    def describe(self):
+        return f"Add full-text search on {self.model_name} ({', '.join(self.fields)})"
+
+    def _run(self, app_label, schema_editor, state, statements):
+        model = state.apps.get_model(app_label, self.model_name)
+        if not self.allow_migrate_model(schema_editor.connection.alias, model):
+            return
+        connection = schema_editor.connection
+        # PostgreSQL statements commit one by one; elsewhere all or nothing
+        atomic = connection.vendor != 'postgresql' and not connection.in_atomic_block
+        with transaction.atomic(using=connection.alias) if atomic else nullcontext():
+            for sql in statements(schema_editor, model):
+                schema_editor.execute(sql)
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        self._run(app_label, schema_editor, to_state, self._create_sql)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        self._run(app_label, schema_editor, from_state, self._drop_sql)
+
+    def _create_sql(self, schema_editor, model):
+        connection = schema_editor.connection
+        q = schema_editor.quote_name
+        table = q(model._meta.db_table)
+        columns = [q(model._meta.get_field(name).column) for name in self.fields]
+
+        if connection.vendor == 'postgresql':
+            function, trigger, index = self._postgres_names(schema_editor, model)
+
+            def vector(row=''):
+                document = " || ' ' || ".join(f"coalesce({row}{column}, '')" for column in columns)
+                return f"to_tsvector('{SEARCH_CONFIG}'::regconfig, {document})"
+
+            # A nullable column without a default is only a catalog change, not a table rewrite
+            yield f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS {SEARCH_VECTOR_COLUMN} tsvector"
+            yield (
+                f"CREATE OR REPLACE FUNCTION {function}() RETURNS trigger LANGUAGE plpgsql AS $$ "
+                f"BEGIN NEW.{SEARCH_VECTOR_COLUMN} := {vector('NEW.')}; RETURN NEW; END $$"
+            )
+            # Statements commit one by one, so a failed run is simply run again
+            yield f"DROP TRIGGER IF EXISTS {trigger} ON {table}"
+            yield (
+                f"CREATE TRIGGER {trigger} BEFORE INSERT OR UPDATE OF {', '.join(columns)} ON {table} "
+                f"FOR EACH ROW EXECUTE FUNCTION {function}()"
+            )
+            # Rows written before the trigger existed, in short transactions
+            with connection.cursor() as cursor:
+                cursor.execute(f"SELECT min(id), max(id) FROM {table}")
+                low, high = cursor.fetchone()
+            if low is not None:
+                for start in range(low, high + 1, self.backfill_batch):
+                    yield (
+                        f"UPDATE {table} SET {SEARCH_VECTOR_COLUMN} = {vector()} "
+                        f"WHERE id >= {start} AND id < {start + self.backfill_batch} AND {SEARCH_VECTOR_COLUMN} IS NULL"
+                    )
+            yield f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {index} ON {table} USING GIN ({SEARCH_VECTOR_COLUMN})"
+
+        elif connection.vendor == 'sqlite' and self._has_fts5(connection):
+            index = q(fts_table(model))
+            names = ', '.join(columns)
+            new = ', '.join(f"new.{column}" for column in columns)
+            old = ', '.join(f"old.{column}" for column in columns)
+            delete = f"INSERT INTO {index}({index}, rowid, {names}) VALUES('delete', old.id, {old});"
+            insert = f"INSERT INTO {index}(rowid, {names}) VALUES (new.id, {new});"
+            trigger = fts_table(model)
+            yield from [
+                f"CREATE VIRTUAL TABLE {index} USING fts5({names}, content={table}, content_rowid='id', "
+                f"tokenize='unicode61 remove_diacritics 2')",
+                f"CREATE TRIGGER {q(trigger + '_ai')} AFTER INSERT ON {table} BEGIN {insert} END",
+                f"CREATE TRIGGER {q(trigger + '_ad')} AFTER DELETE ON {table} BEGIN {delete} END",
+                f"CREATE TRIGGER {q(trigger + '_au')} AFTER UPDATE ON {table} BEGIN {delete} {insert} END",
+                f"INSERT INTO {index}({index}) VALUES('rebuild')",
+            ]
+
+    def _drop_sql(self, schema_editor, model):
+        connection = schema_editor.connection
+        q = schema_editor.quote_name
+        table = q(model._meta.db_table)
+        if connection.vendor == 'postgresql':
+            function, trigger, index = self._postgres_names(schema_editor, model)
+            return [
+                f"DROP INDEX CONCURRENTLY IF EXISTS {index}",
+                f"DROP TRIGGER IF EXISTS {trigger} ON {table}",
+                f"DROP FUNCTION IF EXISTS {function}()",
+                f"ALTER TABLE {table} DROP COLUMN IF EXISTS {SEARCH_VECTOR_COLUMN}",
+            ]
+        if connection.vendor == 'sqlite':
+            trigger = fts_table(model)
+            return [
+                *(f"DROP TRIGGER IF EXISTS {q(trigger + suffix)}" for suffix in ('_ai', '_ad', '_au')),
+                f"DROP TABLE IF EXISTS {q(fts_table(model))}",
+            ]
+        return []
+
+    @staticmethod
+    def _postgres_names(schema_editor, model):
+        """Quoted names of the trigger function, trigger and GIN index."""
+        q = schema_editor.quote_name
+        table = model._meta.db_table
+        return q(table + '_search_update'), q(table + '_search_trigger'), q(table + '_search')
+
+    @staticmethod
+    def _has_fts5(connection):
+        with connection.cursor() as cursor:
+            cursor.execute("PRAGMA compile_options")
+            return ('ENABLE_FTS5',) in cursor.fetchall()
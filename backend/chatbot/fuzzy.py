@@ -0,0 +1,92 @@
+"""
+Typo-tolerant lookup of single words against the intent keywords.
+
+The index maps every string reachable from a keyword by up to
+``max_distance`` character deletions back to that keyword. Two words within
+``k`` edits always share such a string (a substitution is a deletion on each
+side, and so is a swap of adjacent characters), so a lookup only generates
+the query's own deletions, probes the index, and checks the few candidates
+it finds with an exact edit distance. The cost depends on the query length,
+not on the number of keywords, and recent corrections are cached.
+"""
+from collections import defaultdict
+from functools import lru_cache
+from typing import Dict, Iterable, Optional, Set
+
+
+def osa_distance(a: str, b: str) -> int:
+    """Edit distance where swapping two adjacent characters ("bundel") is one edit, like a substitution."""
+    # A shared prefix or suffix never costs an edit
+    prefix = 0
+    shortest = min(len(a), len(b))
+    while prefix < shortest and a[prefix] == b[prefix]:
+        prefix += 1
+    a, b = a[prefix:], b[prefix:]
+    while a and b and a[-1] == b[-1]:
+        a, b = a[:-1], b[:-1]
+    if len(a) < len(b):
+        a, b = b, a
+    if not b:
+        return len(a)
+
+    before = None
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            distance = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b))
+            if i > 1 and j > 1 and char_a == b[j - 2] and a[i - 2] == char_b:
+                distance = min(distance, before[j - 2] + 1)
+            current.append(distance)
+        before, previous = previous, current
+    return previous[-1]
+
+
+def deletions(word: str, depth: int) -> Set[str]:
+    """``word`` and every string left after deleting up to ``depth`` of its characters."""
+    found = {word}
+    frontier = {word}
+    for _ in range(depth):
+        frontier = {variant[:i] + variant[i + 1:] for variant in frontier for i in range(len(variant))}
+        found |= frontier
+    return found
+
+
+class FuzzyKeywordIndex:
+    """Maps a misspelt word to the nearest keyword.
+
+    Words shorter than five letters are never corrected, since most are a
+    single edit from some keyword ("tall" and "ball" from "call", "date"
+    from "data"), and five letter words allow one edit. Longer words allow
+    up to ``max_distance`` edits. Ties go to the keyword listed first (the
+    higher-priority intent).
+    """
+
+    MIN_LENGTH = 5
+
+    def __init__(self, keywords: Iterable[str], max_distance: int = 2, cache_size: int = 1024):
+        keywords = list(dict.fromkeys(keywords))
+        self.max_distance = max_distance
+        self._priority = {word: rank for rank, word in enumerate(keywords)}
+        self._index: Dict[str, Set[str]] = defaultdict(set)
+        for keyword in keywords:
+            for variant in deletions(keyword, max_distance):
+                self._index[variant].add(keyword)
+        self._index = dict(self._index)
+        self.correct = lru_cache(maxsize=cache_size)(self._correct)
+
+    def _correct(self, word: str) -> Optional[str]:
+        if len(word) < self.MIN_LENGTH:
+            return None
+        limit = min(self.max_distance, 1 if len(word) <= 5 else 2)
+        candidates = set()
+        for variant in deletions(word, limit):
+            candidates.update(self._index.get(variant, ()))
+        best = None
+        for keyword in candidates:
+            distance = osa_distance(word, keyword)
+            if distance <= limit:
+                key = (distance, self._priority[keyword])
+                if best is None or key < best[0]:
+                    best = (key, keyword)
+        return best[1] if best else None
@@ -0,0 +1,121 @@
+import logging
+import os
+import threading
+import time
+from collections import deque
+from typing import Dict, Optional, Sequence
+
+from django.db import close_old_connections, connections
+
+from .sharding import conversation_shards
+
+logger = logging.getLogger(__name__)
+
+
+def percentile(sorted_values: Sequence[float], fraction: float) -> Optional[float]:
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return round(sorted_values[index], 2)
+
+
+class HealthProber:
+    """Checks the databases, catalog and write queue from a background thread.
+
+    Health endpoints only read the last report, so probe traffic never
+    reaches the database; the prober issues one ``SELECT 1`` per database
+    every ``interval`` seconds no matter how often the platform asks. Like
+    WriteBehindQueue, the thread starts on first use and again after a fork.
+    The first readiness check probes inline, so it never answers "starting",
+    and a report older than three intervals (a stuck or dead prober) is
+    served as unhealthy.
+    """
+
+    def __init__(self, chatbot, write_queue, interval: float = 10.0, window: int = 60):
+        self.chatbot = chatbot
+        self.write_queue = write_queue
+        self.interval = interval
+        self.stale_after = 3 * interval
+        self.started_at = time.time()
+        self.report: Optional[Dict] = None
+        self._latencies = deque(maxlen=window)
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+        self._probe_lock = threading.Lock()
+
+    def ensure_started(self) -> None:
+        pid = os.getpid()
+        if self._pid == pid and self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._pid == pid and self._thread is not None and self._thread.is_alive():
+                return
+            self._pid = pid
+            self._thread = threading.Thread(target=self._run, name="health-prober", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            try:
+                self.report = self.probe()
+            except Exception:
+                logger.exception("Health probe failed")
+            time.sleep(self.interval)
+
+    def probe(self) -> Dict:
+        databases = {}
+        for alias in dict.fromkeys(['default', *conversation_shards()]):
+            start = time.perf_counter()
+            try:
+                with connections[alias].cursor() as cursor:
+                    cursor.execute('SELECT 1')
+                elapsed = (time.perf_counter() - start) * 1000
+                self._latencies.append(elapsed)
+                databases[alias] = {'status': 'connected', 'latency_ms': round(elapsed, 2)}
+            except Exception as e:
+                databases[alias] = {'status': 'error', 'error': str(e)}
+        close_old_connections()
+
+        latencies = sorted(self._latencies)
+        queue_stats = self.write_queue.stats()
+        catalog = self.chatbot.catalog.current()
+        checks = {
+            'database': all(db['status'] == 'connected' for db in databases.values()),
+            'catalog': bool(catalog.bundle_plans),
+            'write_queue': queue_stats['pending'] < self.write_queue.max_size,
+        }
+        return {
+            'status': 'healthy' if all(checks.values()) else 'unhealthy',
+            'checks': checks,
+            'databases': databases,
+            'db_latency_ms': {
+                'p50': percentile(latencies, 0.50),
+                'p95': percentile(latencies, 0.95),
+                'p99': percentile(latencies, 0.99),
+                'samples': len(latencies),
+            },
+            'catalog_version': catalog.version,
+            'write_queue': queue_stats,
+            'checked_at': time.time(),
+        }
+
+    def liveness(self) -> Dict:
+        self.ensure_started()
+        return {'status': 'alive', 'uptime_s': round(time.time() - self.started_at, 1)}
+
+    def readiness(self) -> Optional[Dict]:
+        """The last report; None only if the first probe failed."""
+        self.ensure_started()
+        report = self.report
+        if report is None:
+            with self._probe_lock:
+                if self.report is None:
+                    try:
+                        self.report = self.probe()
+                    except Exception:
+                        logger.exception("Health probe failed")
+                report = self.report
+        if report is not None and time.time() - report['checked_at'] > self.stale_after:
+            report = dict(report, status='unhealthy', checks=dict(report['checks'], fresh=False))
+        return report
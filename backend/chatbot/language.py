@@ -0,0 +1,82 @@
+"""
+Swahili/English detection from character trigram log-probabilities.
+
+The tables in data/language_ngrams.json are built from the sample texts in
+data/language_corpus/ by ``python manage.py build_language_tables``; at run
+time they are only loaded and looked up, one dict lookup per trigram and
+language.
+"""
+import json
+import math
+import os
+import re
+from collections import Counter
+from itertools import repeat
+from typing import Dict, Iterable, List, Mapping, Optional
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+DEFAULT_TABLES_PATH = os.path.join(DATA_DIR, "language_ngrams.json")
+CORPUS_DIR = os.path.join(DATA_DIR, "language_corpus")
+N = 3
+
+_WORDS = re.compile(r"[^\W\d_]+")
+
+
+def ngrams(text: str, ignore: Iterable[str] = ()) -> List[str]:
+    """Character trigrams of the lowercased words of ``text``, each word padded with spaces."""
+    words = [word for word in _WORDS.findall(text.lower()) if word not in ignore]
+    padded = f" {' '.join(words)} "
+    return [padded[i:i + N] for i in range(len(padded) - N + 1)] if words else []
+
+
+def build_tables(corpus: Mapping[str, Iterable[str]]) -> Dict:
+    """Add-one smoothed trigram log-probabilities per language from sample lines."""
+    counts = {language: Counter(gram for line in lines for gram in ngrams(line)) for language, lines in corpus.items()}
+    vocabulary = set().union(*counts.values())
+    tables = {}
+    for language, grams in counts.items():
+        total = sum(grams.values()) + len(vocabulary)
+        tables[language] = {
+            "unseen": round(math.log(1 / total), 4),
+            "ngrams": {gram: round(math.log((count + 1) / total), 4) for gram, count in sorted(grams.items())},
+        }
+    return {"n": N, "languages": tables}
+
+
+class LanguageDetector:
+    """Picks the language whose trigram model best explains a message.
+
+    Returns None when the message has fewer than ``min_ngrams`` trigrams
+    (after dropping ``ignore`` words such as brand names) or the average
+    log-probability margin is below ``min_margin``, so "ok" or "vodacom"
+    leave the session's language alone.
+    """
+
+    def __init__(self, tables: Dict, ignore: Iterable[str] = (), min_ngrams: int = 5, min_margin: float = 0.1):
+        if tables.get("n") != N:
+            raise ValueError(f"Language tables must hold {N}-grams")
+        self.languages = tuple(tables["languages"])
+        self._lookups = [
+            (table["ngrams"].get, table["unseen"]) for table in tables["languages"].values()
+        ]
+        self.ignore = frozenset(ignore)
+        self.min_ngrams = min_ngrams
+        self.min_margin = min_margin
+
+    @classmethod
+    def load(cls, path: Optional[str] = None, **options) -> "LanguageDetector":
+        with open(path or DEFAULT_TABLES_PATH, encoding="utf-8") as f:
+            return cls(json.load(f), **options)
+
+    def detect(self, text: str) -> Optional[str]:
+        grams = ngrams(text, self.ignore)
+        if len(grams) < self.min_ngrams:
+            return None
+        scores = sorted(
+            (sum(map(lookup, grams, repeat(unseen))), language)
+            for language, (lookup, unseen) in zip(self.languages, self._lookups)
+        )
+        (second, _), (best, language) = scores[-2], scores[-1]
+        if (best - second) / len(grams) < self.min_margin:
+            return None
+        return language
@@ -0,0 +1,25 @@
+"""
+Upserting leads on their E.164 phone number.
+
+Lead.phone is unique, so a number seen again updates its lead instead of
+adding a duplicate. Used by the chat lead sink and by import_leads.
+"""
+from typing import Iterable, Sequence
+
+from .models import Lead
+
+# Chat captures don't ask for budget/needs, so they must not blank them
+CHAT_UPDATE_FIELDS = ['name', 'location', 'current_provider', 'interest', 'language']
+UPDATABLE_FIELDS = ['name', 'location', 'current_provider', 'interest', 'budget', 'needs', 'language', 'status']
+
+
+def upsert_options(update_fields: Sequence[str]) -> dict:
+    return {'update_conflicts': True, 'unique_fields': ['phone'], 'update_fields': list(update_fields)}
+
+
+def upsert_leads(leads: Iterable[Lead], update_fields: Sequence[str] = CHAT_UPDATE_FIELDS) -> int:
+    """Insert or update ``leads`` in one statement; the last lead per phone wins."""
+    unique = list({lead.phone: lead for lead in leads}.values())
+    if unique:
+        Lead.objects.bulk_create(unique, **upsert_options(update_fields))
+    return len(unique)
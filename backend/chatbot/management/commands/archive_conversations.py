@@ -0,0 +1,41 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from chatbot.archive import archive_chunk, archive_dir
+from chatbot.models import Conversation
+from chatbot.sharding import conversation_shards
+
+
+class Command(BaseCommand):
+    help = "Move conversations older than --days into monthly gzip JSONL files and delete them (run from cron)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=settings.CHATBOT_ARCHIVE_AFTER_DAYS)
+        parser.add_argument('--chunk-size', type=int, default=5000, help="Rows read and written per chunk")
+        parser.add_argument('--delete-batch', type=int, default=500, help="Rows deleted per transaction")
+        parser.add_argument('--pause', type=float, default=0.0, help="Seconds to sleep between chunks")
+        parser.add_argument('--dry-run', action='store_true', help="Only count the rows that would move")
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        total = 0
+        for source in conversation_shards():
+            if options['dry_run']:
+                count = Conversation.objects.using(source).filter(timestamp__lt=cutoff).count()
+            else:
+                count = 0
+                while True:
+                    archived = archive_chunk(source, cutoff, options['chunk_size'], options['delete_batch'])
+                    count += archived
+                    if archived < options['chunk_size']:
+                        break
+                    time.sleep(options['pause'])
+            total += count
+            self.stdout.write(f"{source}: {count} rows before {cutoff:%Y-%m-%d}")
+
+        verb = "Would archive" if options['dry_run'] else "Archived"
+        self.stdout.write(self.style.SUCCESS(f"{verb} {total} rows to {archive_dir()}"))
@@ -0,0 +1,57 @@
+import json
+import platform
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from chatbot import benchmarks
+
+
+class Command(BaseCommand):
+    help = "Run chat-path benchmarks and print the time per message of each variant."
+
+    def add_arguments(self, parser):
+        parser.add_argument('names', nargs='*', help=f"Benchmarks to run (default: all of {', '.join(benchmarks.BENCHMARKS)})")
+        parser.add_argument('--rounds', type=int, default=2000, help="Passes over the message corpus per timing")
+        parser.add_argument('--json', dest='json_path', help="Save the results to this JSON file")
+        parser.add_argument('--baseline', help="JSON file from an earlier --json run to compare against")
+        parser.add_argument('--threshold', type=float, default=0.2,
+                            help="Fail when a variant is slower than the baseline by more than this fraction")
+
+    def handle(self, *args, **options):
+        names = options['names'] or list(benchmarks.BENCHMARKS)
+        unknown = [name for name in names if name not in benchmarks.BENCHMARKS]
+        if unknown:
+            raise CommandError(f"Unknown benchmark(s): {', '.join(unknown)}")
+
+        results = benchmarks.run(names, options['rounds'])
+        for name, variants in results.items():
+            baseline = next(iter(variants.values()))['seconds']
+            self.stdout.write(self.style.MIGRATE_HEADING(name))
+            for label, stats in variants.items():
+                line = f"  {label:<12} {stats['seconds'] * 1e6:9.2f} µs/msg"
+                if name in benchmarks.COMPARISONS:
+                    line += f"  {baseline / stats['seconds']:5.2f}x"
+                if 'p50' in stats:
+                    line += (f"  {stats['throughput']:9.0f} msg/s  p50 {stats['p50'] * 1e3:7.3f}"
+                             f"  p95 {stats['p95'] * 1e3:7.3f}  p99 {stats['p99'] * 1e3:7.3f} ms")
+                self.stdout.write(line)
+
+        if options['json_path']:
+            with open(options['json_path'], 'w') as f:
+                json.dump({
+                    'created': time.time(),
+                    'python': sys.version.split()[0],
+                    'machine': platform.platform(),
+                    'rounds': options['rounds'],
+                    'results': results,
+                }, f, indent=2)
+
+        if options['baseline']:
+            with open(options['baseline']) as f:
+                baseline_results = json.load(f)['results']
+            failures = benchmarks.regressions(results, baseline_results, options['threshold'])
+            if failures:
+                raise CommandError("Performance regressed:\n  " + "\n  ".join(failures))
+            self.stdout.write(self.style.SUCCESS(f"No regressions beyond {options['threshold']:.0%}"))
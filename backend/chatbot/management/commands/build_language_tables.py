@@ -0,0 +1,31 @@
+import json
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from chatbot.language import CORPUS_DIR, DEFAULT_TABLES_PATH, build_tables
+
+
+class Command(BaseCommand):
+    help = "Rebuild the language-detection trigram tables from data/language_corpus/<language>.txt."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--corpus', default=CORPUS_DIR, help="Directory with one <language>.txt per language")
+        parser.add_argument('--output', default=DEFAULT_TABLES_PATH)
+
+    def handle(self, *args, **options):
+        corpus = {}
+        for name in sorted(os.listdir(options['corpus'])):
+            if name.endswith('.txt'):
+                with open(os.path.join(options['corpus'], name), encoding='utf-8') as f:
+                    corpus[name[:-len('.txt')]] = [line for line in f if line.strip()]
+        if len(corpus) < 2:
+            raise CommandError(f"Need sample texts for at least two languages in {options['corpus']}")
+
+        tables = build_tables(corpus)
+        with open(options['output'], 'w', encoding='utf-8') as f:
+            json.dump(tables, f, ensure_ascii=False, separators=(',', ':'), sort_keys=True)
+            f.write('\n')
+        for language, table in tables['languages'].items():
+            self.stdout.write(f"{language}: {len(corpus[language])} lines, {len(table['ngrams'])} trigrams")
+        self.stdout.write(self.style.SUCCESS(f"Wrote {options['output']}"))
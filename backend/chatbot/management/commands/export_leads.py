@@ -0,0 +1,52 @@
+import csv
+import json
+import sys
+
+from django.core.management.base import BaseCommand
+from django.utils.dateparse import parse_datetime
+
+from chatbot.models import Lead
+
+FIELDS = [field.attname for field in Lead._meta.concrete_fields]
+
+
+class Command(BaseCommand):
+    help = "Stream leads to a CSV or JSONL file (or '-' for stdout)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', nargs='?', default='-', help="Output file, or '-' for stdout")
+        parser.add_argument('--format', choices=['csv', 'jsonl'], help="Defaults to the file extension, else csv")
+        parser.add_argument('--status', choices=[choice for choice, _ in Lead.STATUS_CHOICES])
+        parser.add_argument('--since', type=parse_datetime, help="Only leads created at or after this ISO datetime")
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or ('jsonl' if path.lower().endswith('.jsonl') else 'csv')
+
+        leads = Lead.objects.order_by('id')
+        if options['status']:
+            leads = leads.filter(status=options['status'])
+        if options['since']:
+            leads = leads.filter(timestamp__gte=options['since'])
+        rows = leads.values_list(*FIELDS).iterator(chunk_size=options['chunk_size'])
+
+        target = sys.stdout if path == '-' else open(path, 'w', newline='', encoding='utf-8')
+        count = 0
+        try:
+            if fmt == 'csv':
+                writer = csv.writer(target)
+                writer.writerow(FIELDS)
+                for row in rows:
+                    writer.writerow(row)
+                    count += 1
+            else:
+                for row in rows:
+                    target.write(json.dumps(dict(zip(FIELDS, row)), ensure_ascii=False, default=str) + '\n')
+                    count += 1
+        finally:
+            if target is not sys.stdout:
+                target.close()
+
+        if target is not sys.stdout:
+            self.stdout.write(self.style.SUCCESS(f"Exported {count} leads to {path}"))
@@ -0,0 +1,102 @@
+import csv
+import json
+import sys
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand, CommandError
+
+from chatbot.leads import UPDATABLE_FIELDS, upsert_leads
+from chatbot.models import Lead
+from chatbot.serializers import LeadSerializer
+
+
+def read_csv(f):
+    for line, row in enumerate(csv.DictReader(f), start=2):
+        # Spreadsheet exports leave empty cells for optional columns; they are not written
+        yield line, {key: value for key, value in row.items() if key and value not in (None, '')}
+
+
+def read_jsonl(f):
+    for line, text in enumerate(f, start=1):
+        if not text.strip():
+            continue
+        try:
+            row = json.loads(text)
+        except ValueError as e:
+            yield line, e
+            continue
+        yield line, row if isinstance(row, dict) else ValueError("expected a JSON object")
+
+
+class Command(BaseCommand):
+    help = "Validate and upsert leads from a CSV or JSONL file (or '-' for stdin), matched on phone."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Input file, or '-' for stdin")
+        parser.add_argument('--format', choices=['csv', 'jsonl'], help="Defaults to the file extension")
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--rejects', help="Write rejected rows with their errors to this JSONL file")
+        parser.add_argument('--dry-run', action='store_true', help="Validate only")
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or ('csv' if path.lower().endswith('.csv') else 'jsonl' if path != '-' else None)
+        if fmt is None:
+            raise CommandError("Pass --format when reading from stdin")
+
+        source = sys.stdin if path == '-' else open(path, newline='', encoding='utf-8-sig')
+        rejects = open(options['rejects'], 'w', encoding='utf-8') if options['rejects'] else None
+        counts = {'read': 0, 'rejected': 0}
+        # A phone can be written by several upserts (other columns, later batches); count it once
+        saved = set()
+        # Update columns -> leads: each row only overwrites the columns it provides
+        batch = defaultdict(list)
+        batched = {}  # phone -> its update columns in this batch
+        try:
+            rows = read_csv(source) if fmt == 'csv' else read_jsonl(source)
+            for line, row in rows:
+                counts['read'] += 1
+                if not isinstance(row, dict):
+                    counts['rejected'] += 1
+                    self.reject(rejects, line, None, str(row))
+                    continue
+                serializer = LeadSerializer(data=row)
+                if not serializer.is_valid():
+                    counts['rejected'] += 1
+                    self.reject(rejects, line, row, serializer.errors)
+                    continue
+
+                lead = Lead(**serializer.validated_data)
+                columns = tuple(name for name in UPDATABLE_FIELDS if name in row)
+                if batched.get(lead.phone, columns) != columns:
+                    # The same number with other columns: write the earlier row first so the later one wins
+                    saved |= self.save(batch, options['dry_run'])
+                    batch, batched = defaultdict(list), {}
+                batch[columns].append(lead)
+                batched[lead.phone] = columns
+                if sum(map(len, batch.values())) >= options['batch_size']:
+                    saved |= self.save(batch, options['dry_run'])
+                    batch, batched = defaultdict(list), {}
+                    self.stdout.write(f"{counts['read']} read, {len(saved)} saved, {counts['rejected']} rejected")
+            saved |= self.save(batch, options['dry_run'])
+        finally:
+            if source is not sys.stdin:
+                source.close()
+            if rejects is not None:
+                rejects.close()
+
+        verb = "Would save" if options['dry_run'] else "Saved"
+        self.stdout.write(self.style.SUCCESS(
+            f"Read {counts['read']} rows: {verb.lower()} {len(saved)}, rejected {counts['rejected']}"
+        ))
+
+    def reject(self, rejects, line, row, errors):
+        if rejects is not None:
+            rejects.write(json.dumps({'line': line, 'row': row, 'errors': errors}, ensure_ascii=False) + '\n')
+
+    def save(self, batch, dry_run):
+        """Upsert ``batch`` (update columns -> leads), one statement per column set; return the phones."""
+        if not dry_run:
+            for columns, leads in batch.items():
+                upsert_leads(leads, columns or ['name'])
+        return {lead.phone for leads in batch.values() for lead in leads}
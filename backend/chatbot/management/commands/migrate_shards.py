@@ -0,0 +1,17 @@
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+
+from chatbot.sharding import conversation_shards, is_sharded
+
+
+class Command(BaseCommand):
+    help = "Apply migrations to every Conversation shard database."
+
+    def handle(self, *args, **options):
+        if not is_sharded():
+            self.stdout.write("CONVERSATION_SHARD_URLS is empty; conversations live on 'default'.")
+            return
+        for alias in conversation_shards():
+            self.stdout.write(self.style.MIGRATE_HEADING(f"Migrating {alias}"))
+            call_command('migrate', database=alias, interactive=False, verbosity=options['verbosity'],
+                         stdout=self.stdout, stderr=self.stderr)
@@ -0,0 +1,27 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from chatbot.archive import archived_months, read_archive
+
+
+class Command(BaseCommand):
+    help = "Stream an archived month of conversations to stdout as JSON lines."
+
+    def add_arguments(self, parser):
+        parser.add_argument('month', nargs='?', help="YYYY-MM; omit to list the archived months")
+        parser.add_argument('--session', help="Only rows of this session_id")
+        parser.add_argument('--shard', action='append', help="Only this database (repeatable)")
+
+    def handle(self, *args, **options):
+        if not options['month']:
+            for month in archived_months():
+                self.stdout.write(month)
+            return
+        if options['month'] not in archived_months():
+            raise CommandError(f"No archive for {options['month']}")
+
+        for row in read_archive(options['month'], options['shard']):
+            if options['session'] and row['session_id'] != options['session']:
+                continue
+            self.stdout.write(json.dumps(row, ensure_ascii=False))
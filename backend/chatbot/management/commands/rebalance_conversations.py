@@ -0,0 +1,58 @@
+from collections import Counter
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from chatbot.models import Conversation
+from chatbot.rollups import classifier, recount_hours
+from chatbot.sharding import conversation_shards, group_by_shard
+
+
+class Command(BaseCommand):
+    help = "Move Conversation rows to the shard their session_id hashes to, e.g. after adding a shard."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--dry-run', action='store_true', help="Only count the rows that would move")
+
+    def handle(self, *args, **options):
+        shards = conversation_shards()
+        fields = [field.attname for field in Conversation._meta.concrete_fields if not field.primary_key]
+        chatbot = None if options['dry_run'] else classifier()
+        moved = Counter()
+
+        for source in shards:
+            last_id = 0
+            while True:
+                rows = list(
+                    Conversation.objects.using(source).filter(id__gt=last_id).order_by('id')[:options['batch_size']]
+                )
+                if not rows:
+                    break
+                last_id = rows[-1].id
+
+                for target, misplaced in group_by_shard(rows, shards).items():
+                    if target == source:
+                        continue
+                    moved[source, target] += len(misplaced)
+                    if options['dry_run']:
+                        continue
+                    # Copy first, then delete: a crash in between leaves duplicates, never losses
+                    copies = [Conversation(**{name: getattr(row, name) for name in fields}) for row in misplaced]
+                    with transaction.atomic(using=target):
+                        Conversation.objects.using(target).bulk_create(copies)
+                        # auto_now_add stamped the copies with the current time
+                        for copy, row in zip(copies, misplaced):
+                            copy.timestamp = row.timestamp
+                        Conversation.objects.using(target).bulk_update(copies, ['timestamp'])
+                    # The copies get new ids, so their hours are recounted without the originals
+                    with transaction.atomic(), transaction.atomic(using=source):
+                        Conversation.objects.using(source).filter(id__in=[row.id for row in misplaced]).delete()
+                        recount_hours(chatbot, [row.timestamp for row in misplaced])
+
+        verb = "Would move" if options['dry_run'] else "Moved"
+        for (source, target), count in sorted(moved.items()):
+            self.stdout.write(f"{verb} {count} rows {source} -> {target}")
+        if moved and not options['dry_run']:
+            self.stdout.write("Recounted the rollups of the moved rows' hours; update_rollups counts them again")
+        self.stdout.write(self.style.SUCCESS(f"{verb} {sum(moved.values())} rows in total"))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from chatbot.rollups import classifier, update_rollups
+
+
+class Command(BaseCommand):
+    help = "Fold conversations added since the last run into the hourly analytics rollups (run from cron)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        counted = update_rollups(classifier(), options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Counted {counted} new conversations"))
@@ -0,0 +1,92 @@
+import re
+from itertools import chain
+from typing import Dict, FrozenSet, Iterable, Optional, Sequence, Tuple
+
+# Whole-word keywords must not touch another letter; digits may ("50gb")
+LETTER_BEFORE = r"(?<![^\W\d_])"
+LETTER_AFTER = r"(?![^\W\d_])"
+
+
+def _trie_pattern(words: Iterable[str]) -> str:
+    """Build a regex alternation shaped like a trie so shared prefixes are tested once."""
+    trie: Dict[str, dict] = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def emit(node: Dict[str, dict]) -> str:
+        branches = [re.escape(char) + emit(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        # Optional tails are greedy, so each position yields its longest keyword.
+        return f"(?:{body})?" if "" in node else body
+
+    return emit(trie)
+
+
+def whole_word_pattern(word: str) -> str:
+    return f"{LETTER_BEFORE}{re.escape(word)}{LETTER_AFTER}"
+
+
+class KeywordMatcher:
+    """Single-pass substring matcher over the keyword lists of every intent.
+
+    Keywords keep the semantics of ``word in text``: they match anywhere,
+    including inside other words. The lookahead pattern reports the longest
+    keyword starting at each position and every keyword contained in it is
+    implied, so overlapping hits ("yasme" -> "yas", "sme") are not lost.
+    Keywords in ``whole_words`` only match as whole words or phrases, so
+    "order" is not found in "border"; they are looked up in a second pass.
+    """
+
+    def __init__(self, intents: Dict[str, Sequence[str]], whole_words: Iterable[str] = ()):
+        # Dict order is the priority order: the first intent wins.
+        self.intents: Tuple[str, ...] = tuple(intents)
+        owners: Dict[str, int] = {}
+        for rank, words in enumerate(intents.values()):
+            for word in words:
+                owners[word] = min(rank, owners.get(word, rank))
+
+        whole_words = frozenset(whole_words) & owners.keys()
+        substrings = [word for word in owners if word not in whole_words]
+
+        self._implied: Dict[str, FrozenSet[str]] = {
+            word: frozenset(
+                other for other in owners
+                if (re.search(whole_word_pattern(other), word) if other in whole_words else other in word)
+            )
+            for word in owners
+        }
+        self._rank: Dict[str, int] = {
+            word: min(owners[other] for other in implied) for word, implied in self._implied.items()
+        }
+        self._pattern = re.compile(f"(?=({_trie_pattern(substrings)}))")
+        self._word_pattern = (
+            re.compile(f"(?={LETTER_BEFORE}({_trie_pattern(whole_words)}){LETTER_AFTER})") if whole_words else None
+        )
+
+    def _hits(self, text: str) -> Iterable[str]:
+        hits = self._pattern.findall(text)
+        return chain(hits, self._word_pattern.findall(text)) if self._word_pattern is not None else hits
+
+    def keywords(self, text: str) -> FrozenSet[str]:
+        """Return every keyword that occurs in ``text``."""
+        found = frozenset()
+        for word in self._hits(text):
+            found |= self._implied[word]
+        return found
+
+    def match(self, text: str) -> Tuple[Optional[str], FrozenSet[str]]:
+        """Return the highest-priority intent and all keywords found in ``text``."""
+        best = len(self.intents)
+        found = frozenset()
+        for word in self._hits(text):
+            found |= self._implied[word]
+            rank = self._rank[word]
+            if rank < best:
+                best = rank
+        intent = self.intents[best] if best < len(self.intents) else None
+        return intent, found
@@ -0,0 +1,76 @@
+"""
+Request metrics in the Prometheus text format, kept with prometheus_client.
+
+Every worker process keeps its own numbers; scrape each worker, or run one
+worker per container, to see them all.
+"""
+from typing import Callable, Dict, Sequence, Tuple
+
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Histogram, generate_latest
+from prometheus_client.core import GaugeMetricFamily
+
+# Seconds; chat stages run in microseconds, whole requests in milliseconds
+BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+           0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+CONTENT_TYPE = CONTENT_TYPE_LATEST
+
+REGISTRY = CollectorRegistry()
+
+
+class CallbackGauge:
+    """Gauge whose samples come from ``read()`` ({labels: value}) at scrape time."""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str],
+                 read: Callable[[], Dict[Tuple[str, ...], float]]):
+        self.name = name
+        self.help = help
+        self.labelnames = list(labelnames)
+        self.read = read
+
+    def collect(self):
+        family = GaugeMetricFamily(self.name, self.help, labels=self.labelnames)
+        for labels, value in sorted(self.read().items()):
+            family.add_metric(list(labels), value)
+        yield family
+
+
+def gauge(name: str, help: str, labelnames: Sequence[str], read: Callable[[], Dict]) -> None:
+    REGISTRY.register(CallbackGauge(name, help, labelnames, read))
+
+
+def render() -> bytes:
+    return generate_latest(REGISTRY)
+
+
+REQUEST_SECONDS = Histogram(
+    "chatbot_request_seconds", "Time spent handling HTTP requests.", ["view", "method", "status"],
+    buckets=BUCKETS, registry=REGISTRY,
+)
+STAGE_SECONDS = Histogram(
+    "chatbot_stage_seconds", "Time spent in each stage of a chat message.", ["stage"],
+    buckets=BUCKETS, registry=REGISTRY,
+)
+MESSAGES = Counter(
+    "chatbot_messages", "Chat messages answered, by intent and language.", ["intent", "language"],
+    registry=REGISTRY,
+)
+RESPONSE_CACHE = Counter(
+    "chatbot_response_cache", "Response cache lookups, by result (hit or miss).", ["result"],
+    registry=REGISTRY,
+)
+WRITE_BATCH_SECONDS = Histogram(
+    "chatbot_write_batch_seconds", "Time spent writing one write-behind batch.", ["model"],
+    buckets=BUCKETS, registry=REGISTRY,
+)
+
+
+def stage(name: str):
+    """Context manager recording the time spent in its block as stage ``name``."""
+    return STAGE_SECONDS.labels(name).time()
+
+
+def reset() -> None:
+    """Forget everything recorded so far, e.g. warm-up traffic before workers fork."""
+    for metric in (REQUEST_SECONDS, STAGE_SECONDS, MESSAGES, RESPONSE_CACHE, WRITE_BATCH_SECONDS):
+        metric.clear()
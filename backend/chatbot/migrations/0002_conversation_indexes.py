@@ -0,0 +1,26 @@
+# Generated by Django 4.2.7 on 2026-10-18 13:46
+
+from django.db import migrations, models
+
+from chatbot.db_operations import AddIndexConcurrentlyIfPostgres
+
+
+class Migration(migrations.Migration):
+
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('chatbot', '0001_initial'),
+    ]
+
+    operations = [
+        AddIndexConcurrentlyIfPostgres(
+            model_name='conversation',
+            index=models.Index(fields=['session_id', 'timestamp'], name='conversation_session_time'),
+        ),
+        AddIndexConcurrentlyIfPostgres(
+            model_name='conversation',
+            index=models.Index(fields=['timestamp'], name='conversation_time'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+from django.db import migrations
+
+from chatbot.db_operations import AddFullTextSearch
+
+
+class Migration(migrations.Migration):
+
+    # The PostgreSQL backfill commits per batch and the index is built CONCURRENTLY
+    atomic = False
+
+    dependencies = [
+        ('chatbot', '0003_conversation_rollups'),
+    ]
+
+    operations = [
+        AddFullTextSearch(model_name='conversation', fields=['user_message', 'bot_response']),
+    ]
@@ -0,0 +1,20 @@
+from django.db import migrations, models
+
+from chatbot.db_operations import AddIndexConcurrentlyIfPostgres
+
+
+class Migration(migrations.Migration):
+
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('chatbot', '0004_conversation_search'),
+    ]
+
+    operations = [
+        AddIndexConcurrentlyIfPostgres(
+            model_name='lead',
+            index=models.Index(fields=['timestamp'], name='lead_time'),
+        ),
+    ]
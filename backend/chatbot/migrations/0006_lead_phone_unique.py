@@ -0,0 +1,106 @@
+# Generated by Django 4.2.7 on 2026-10-18 13:53
+
+import json
+import os
+import re
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import migrations, models
+from django.forms.models import model_to_dict
+from django.utils import timezone
+
+# Frozen copy of chatbot.phones.normalize_phone as of this migration
+COUNTRY_CODE = "255"
+SEPARATORS = re.compile(r"[\s\-().]")
+
+MERGED_FIELDS = ['name', 'location', 'current_provider', 'interest', 'budget', 'language']
+# Later stages win when duplicates disagree
+STATUS_ORDER = ['new', 'contacted', 'lost', 'converted']
+
+
+def normalize_phone(raw):
+    number = SEPARATORS.sub("", raw or "")
+    if number.startswith("+"):
+        digits = number[1:]
+    elif number.startswith("00"):
+        digits = number[2:]
+    elif number.startswith(COUNTRY_CODE) and len(number) == len(COUNTRY_CODE) + 9:
+        digits = number
+    elif number.startswith("0") and len(number) == 10:
+        digits = COUNTRY_CODE + number[1:]
+    elif len(number) == 9 and number[0] in "67":
+        digits = COUNTRY_CODE + number
+    else:
+        return None
+    if not digits.isdigit() or not 8 <= len(digits) <= 15 or digits[0] == "0":
+        return None
+    if digits.startswith(COUNTRY_CODE) and len(digits) != len(COUNTRY_CODE) + 9:
+        return None
+    return "+" + digits
+
+
+def merge(leads):
+    """Fold ``leads`` (newest first) into the first: its non-empty values win, older ones fill the gaps."""
+    keep = leads[0]
+    for field in MERGED_FIELDS:
+        if not getattr(keep, field):
+            setattr(keep, field, next((getattr(lead, field) for lead in leads if getattr(lead, field)), ''))
+    needs = [lead.needs for lead in leads if lead.needs]
+    keep.needs = "\n\n".join(dict.fromkeys(needs))
+    keep.status = max((lead.status for lead in leads),
+                      key=lambda status: STATUS_ORDER.index(status) if status in STATUS_ORDER else -1)
+    return keep
+
+
+def record(rows):
+    """Append the leads merged away to a JSONL file, so nothing is lost without a trace."""
+    directory = getattr(settings, 'CHATBOT_ARCHIVE_DIR', None) or settings.BASE_DIR
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"lead_merges-{timezone.now():%Y%m%dT%H%M%S}.jsonl")
+    with open(path, 'a', encoding='utf-8') as f:
+        for row in rows:
+            f.write(json.dumps(row, ensure_ascii=False, default=str) + '\n')
+
+
+def normalize_and_merge(apps, schema_editor):
+    """Store phones in E.164 and merge leads sharing a number into the newest of them."""
+    Lead = apps.get_model('chatbot', 'Lead')
+    groups = defaultdict(list)
+    for lead_id, phone in Lead.objects.order_by('-timestamp', '-id').values_list('id', 'phone').iterator():
+        groups[normalize_phone(phone) or phone.strip()].append(lead_id)
+
+    merged_away = []
+    for phone, ids in groups.items():
+        if len(ids) == 1:
+            Lead.objects.filter(id=ids[0]).exclude(phone=phone).update(phone=phone)
+            continue
+        leads = sorted(Lead.objects.filter(id__in=ids), key=lambda lead: ids.index(lead.id))
+        merged_away += [
+            dict(model_to_dict(lead), id=lead.id, timestamp=lead.timestamp, merged_into=ids[0])
+            for lead in leads[1:]
+        ]
+        keep = merge(leads)
+        keep.phone = phone
+        Lead.objects.filter(id__in=ids[1:]).delete()
+        keep.save()
+
+    if merged_away:
+        record(merged_away)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chatbot', '0005_lead_time_index'),
+    ]
+
+    operations = [
+        # Merged leads cannot be split again; their original rows are in the lead_merges-*.jsonl file
+        migrations.RunPython(normalize_and_merge, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='lead',
+            name='phone',
+            field=models.CharField(max_length=20, unique=True),
+        ),
+    ]
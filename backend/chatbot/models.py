@@ -9,10 +9,40 @@ class Conversation(models.Model):
     
     class Meta:
         ordering = ['-timestamp']
+        indexes = [
+            models.Index(fields=['session_id', 'timestamp'], name='conversation_session_time'),
+            models.Index(fields=['timestamp'], name='conversation_time'),
+        ]
     
     def __str__(self):
         return f"{self.user_message[:50]}..."
 
+class ConversationRollup(models.Model):
+    """Hourly message counts per intent, language and provider"""
+    bucket = models.DateTimeField()
+    intent = models.CharField(max_length=20)
+    language = models.CharField(max_length=10)
+    provider = models.CharField(max_length=20, blank=True)
+    count = models.PositiveIntegerField(default=0)
+    
+    class Meta:
+        ordering = ['-bucket']
+        constraints = [
+            models.UniqueConstraint(fields=['bucket', 'intent', 'language', 'provider'], name='rollup_unique_key'),
+        ]
+    
+    def __str__(self):
+        return f"{self.bucket:%Y-%m-%d %H:00} {self.intent}/{self.language}/{self.provider}: {self.count}"
+
+class RollupCheckpoint(models.Model):
+    """Highest Conversation.id already counted into the rollups, per database"""
+    source = models.CharField(max_length=100, unique=True)
+    last_id = models.BigIntegerField(default=0)
+    updated = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.source}: {self.last_id}"
+
 class Lead(models.Model):
     STATUS_CHOICES = [
         ('new', 'New'),
@@ -22,7 +52,7 @@ class Lead(models.Model):
     ]
     
     name = models.CharField(max_length=100)
-    phone = models.CharField(max_length=20)
+    phone = models.CharField(max_length=20, unique=True)  # E.164, see chatbot.phones
     location = models.CharField(max_length=100)
     current_provider = models.CharField(max_length=50, blank=True)
     interest = models.CharField(max_length=50)
@@ -34,6 +64,9 @@ class Lead(models.Model):
     
     class Meta:
         ordering = ['-timestamp']
+        indexes = [
+            models.Index(fields=['timestamp'], name='lead_time'),
+        ]
     
     def __str__(self):
         return f"{self.name} - {self.interest}"
\ No newline at end of file
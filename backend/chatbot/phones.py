@@ -0,0 +1,32 @@
+import re
+from typing import Optional
+
+DEFAULT_COUNTRY_CODE = "255"  # Tanzania
+
+_SEPARATORS = re.compile(r"[\s\-().]")
+
+
+def normalize_phone(raw: str, country_code: str = DEFAULT_COUNTRY_CODE) -> Optional[str]:
+    """Return ``raw`` in E.164 form ("+255757315593"), or None if it is not a phone number.
+
+    Local Tanzanian forms ("0757 315 593", "757315593") get ``country_code``;
+    numbers already carrying a country code ("+...", "00...", "255...") keep it.
+    """
+    number = _SEPARATORS.sub("", raw or "")
+    if number.startswith("+"):
+        digits = number[1:]
+    elif number.startswith("00"):
+        digits = number[2:]
+    elif number.startswith(country_code) and len(number) == len(country_code) + 9:
+        digits = number
+    elif number.startswith("0") and len(number) == 10:
+        digits = country_code + number[1:]
+    elif len(number) == 9 and number[0] in "67":
+        digits = country_code + number
+    else:
+        return None
+    if not digits.isdigit() or not 8 <= len(digits) <= 15 or digits[0] == "0":
+        return None
+    if digits.startswith(country_code) and len(digits) != len(country_code) + 9:
+        return None
+    return "+" + digits
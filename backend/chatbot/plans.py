@@ -0,0 +1,140 @@
+"""
+Typed bundle plans and the sorted indexes behind price questions.
+
+The catalog stores prices and data caps as display strings ("TZS 15,000",
+"10GB", "Unlimited"). They are parsed once per catalog version into
+PlanRecords, and PlanIndex keeps them sorted by price, by data and by price
+per GB, so "cheapest", "under 50,000" and "at least 60GB" are answered with
+a bisect and a slice instead of a sort per message.
+"""
+import math
+import re
+from bisect import bisect_left, bisect_right
+from typing import Iterable, Mapping, NamedTuple, Optional, Tuple
+
+UNLIMITED_WORDS = frozenset({"unlimited", "bila kikomo"})
+
+_PRICE = re.compile(r"\d[\d,]*")
+_DATA = re.compile(r"(\d+(?:\.\d+)?)\s*(mb|gb|tb)")
+_DATA_UNITS = {"mb": 1 / 1024, "gb": 1, "tb": 1024}
+
+# Amounts in messages: "50,000", "50000", "50k", "elfu 50" (Swahili puts the thousand first)
+_AMOUNT = re.compile(r"\belfu\s*(\d+)|(\d{1,3}(?:[,.]\d{3})+|\d+)\s*(k\b)?")
+# Data sizes: "60gb", "1 tb", "gb 20"; not speeds ("10mbps")
+_GIGABYTES = re.compile(r"(\d+(?:\.\d+)?)\s*(mb|gb|tb)(?![a-z])|\b(mb|gb|tb)\s*(\d+(?:\.\d+)?)")
+
+
+def parse_price(text: str) -> int:
+    """Whole TZS in a price label: "TZS 15,000" -> 15000."""
+    match = _PRICE.search(text)
+    if match is None:
+        raise ValueError(f"No price in {text!r}")
+    return int(match.group().replace(",", ""))
+
+
+def parse_data(text: str) -> float:
+    """Gigabytes in a data label; unlimited plans get ``math.inf``."""
+    text = text.strip().lower()
+    if text in UNLIMITED_WORDS:
+        return math.inf
+    match = _DATA.fullmatch(text)
+    if match is None:
+        raise ValueError(f"Unrecognised data allowance {text!r}")
+    return float(match.group(1)) * _DATA_UNITS[match.group(2)]
+
+
+def find_amount(text: str) -> Optional[int]:
+    """First TZS amount in lowercased ``text``, ignoring data sizes."""
+    match = _AMOUNT.search(_GIGABYTES.sub(" ", text))
+    if match is None:
+        return None
+    thousands, digits, k = match.groups()
+    if thousands:
+        return int(thousands) * 1000
+    amount = int(re.sub(r"[,.]", "", digits))
+    return amount * 1000 if k else amount
+
+
+def find_gigabytes(text: str) -> Optional[float]:
+    """First data size in lowercased ``text``, in GB."""
+    match = _GIGABYTES.search(text)
+    if match is None:
+        return None
+    size, unit, unit_first, size_after = match.groups()
+    return float(size or size_after) * _DATA_UNITS[unit or unit_first]
+
+
+class PlanRecord(NamedTuple):
+    provider: str
+    name: str
+    price: int
+    data_gb: float
+    price_label: str
+    data_label: str
+
+    @property
+    def price_per_gb(self) -> float:
+        return self.price / self.data_gb
+
+    @property
+    def unlimited(self) -> bool:
+        return self.data_gb == math.inf
+
+
+def plan_records(bundle_plans: Mapping[str, Iterable[Mapping]]) -> Tuple[PlanRecord, ...]:
+    return tuple(
+        PlanRecord(provider, plan["name"], parse_price(plan["price"]), parse_data(plan["data"]),
+                   plan["price"], plan["data"])
+        for provider, plans in bundle_plans.items()
+        for plan in plans
+    )
+
+
+class PlanIndex:
+    """Plans of one catalog version, pre-sorted for range queries.
+
+    Ties keep catalog order. ``by_value`` leaves out unlimited plans, whose
+    price per GB is not meaningful.
+    """
+
+    def __init__(self, records: Iterable[PlanRecord]):
+        records = tuple(records)
+        self.by_price = tuple(sorted(records, key=lambda plan: plan.price))
+        self.prices = tuple(plan.price for plan in self.by_price)
+        self.by_data = tuple(sorted(records, key=lambda plan: (plan.data_gb, plan.price)))
+        self.data = tuple(plan.data_gb for plan in self.by_data)
+        self.by_value = tuple(sorted((plan for plan in records if not plan.unlimited),
+                                     key=lambda plan: plan.price_per_gb))
+        # cheapest_from[i]: the cheapest plan in by_data[i:]
+        cheapest = []
+        for plan in reversed(self.by_data):
+            cheapest.append(plan if not cheapest or plan.price < cheapest[-1].price else cheapest[-1])
+        self.cheapest_from = tuple(reversed(cheapest))
+
+    def cheapest(self, count: int = 3) -> Tuple[PlanRecord, ...]:
+        return self.by_price[:count]
+
+    def best_value(self) -> Optional[PlanRecord]:
+        return self.by_value[0] if self.by_value else None
+
+    def under(self, amount: int) -> Tuple[PlanRecord, ...]:
+        """Plans costing at most ``amount``, cheapest first."""
+        return self.by_price[:bisect_right(self.prices, amount)]
+
+    def at_least(self, gigabytes: float) -> Tuple[PlanRecord, ...]:
+        """Plans with at least ``gigabytes`` of data, smallest allowance first."""
+        return self.by_data[bisect_left(self.data, gigabytes):]
+
+    def matching(self, provider: Optional[str] = None, max_price: Optional[int] = None,
+                 min_data: Optional[float] = None) -> Tuple[PlanRecord, ...]:
+        """Plans of ``provider`` (any when None) within the limits, cheapest first."""
+        plans = self.by_price if max_price is None else self.under(max_price)
+        return tuple(
+            plan for plan in plans
+            if (provider is None or plan.provider == provider) and (min_data is None or plan.data_gb >= min_data)
+        )
+
+    def cheapest_at_least(self, gigabytes: float) -> Optional[PlanRecord]:
+        """The cheapest plan with at least ``gigabytes``; of equal prices, the most data."""
+        start = bisect_left(self.data, gigabytes)
+        return self.cheapest_from[start] if start < len(self.cheapest_from) else None
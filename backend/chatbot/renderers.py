@@ -0,0 +1,11 @@
+from rest_framework.renderers import JSONRenderer
+
+from .metrics import stage
+
+
+class TimedJSONRenderer(JSONRenderer):
+    """JSONRenderer that records its time as the chat "serialize" stage."""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        with stage("serialize"):
+            return super().render(data, accepted_media_type, renderer_context)
@@ -0,0 +1,63 @@
+import hashlib
+from typing import Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+
+from .metrics import RESPONSE_CACHE
+
+# Reply language, intent and response
+Entry = Tuple[str, Optional[str], str]
+
+
+def normalize_message(text: str) -> str:
+    """Lowercase ``text``, collapse whitespace and drop trailing ! ? and full stops."""
+    return " ".join(text.lower().split()).rstrip("!?.")
+
+
+class ResponseCache:
+    """Chat replies keyed by normalized message, session language and catalog version.
+
+    The key holds the session's language, and whether it is locked, as they
+    were before the message, so a hit skips language detection too; entries
+    are (reply language, intent, response), kept ``ttl`` seconds in the Django
+    cache ``cache_alias``. The 'replies' alias from settings is a LocMemCache
+    (an LRU of CHATBOT_RESPONSE_CACHE_SIZE entries per worker); a shared
+    backend such as Redis lets workers reuse each other's replies. A new
+    catalog version changes every key, so stale prices are never served.
+    """
+
+    key_prefix = "chatbot:reply:"
+
+    def __init__(self, cache_alias: str = "default", ttl: float = 300):
+        self.cache = caches[cache_alias]
+        self.ttl = ttl
+
+    @classmethod
+    def from_settings(cls) -> Optional["ResponseCache"]:
+        if getattr(settings, 'CHATBOT_RESPONSE_CACHE_SIZE', 1024) <= 0:
+            return None
+        return cls(
+            cache_alias=getattr(settings, 'CHATBOT_RESPONSE_CACHE', None) or 'default',
+            ttl=getattr(settings, 'CHATBOT_RESPONSE_CACHE_TTL', 300),
+        )
+
+    @property
+    def shared(self) -> bool:
+        """Whether lookups leave the process (and so may block on the network)."""
+        return not isinstance(self.cache, (LocMemCache, DummyCache))
+
+    def get(self, text: str, language: str, locked: bool, version: str) -> Optional[Entry]:
+        entry = self.cache.get(self._key(text, language, locked, version))
+        RESPONSE_CACHE.labels("miss" if entry is None else "hit").inc()
+        return tuple(entry) if entry is not None else None
+
+    def set(self, text: str, language: str, locked: bool, version: str, entry: Entry) -> None:
+        self.cache.set(self._key(text, language, locked, version), entry, self.ttl)
+
+    def _key(self, text: str, language: str, locked: bool, version: str) -> str:
+        # Hashing keeps keys short and free of spaces, as memcached requires
+        digest = hashlib.blake2b(text.encode(), digest_size=16).hexdigest()
+        return f"{self.key_prefix}{version}:{language}:{int(locked)}:{digest}"
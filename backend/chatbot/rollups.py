@@ -0,0 +1,120 @@
+"""
+Incremental maintenance of ConversationRollup.
+
+Each run counts only conversations above the per-database high-water mark in
+RollupCheckpoint, so its cost follows the new rows, not the table size.
+"""
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .chatbot_logic import FrechaServicesChatbot
+from .models import Conversation, ConversationRollup, RollupCheckpoint
+from .sharding import conversation_shards
+
+# Rows younger than this are left for the next run: concurrent inserts can
+# commit out of id order, and a committed higher id must not hide a lower one
+# that becomes visible a moment later.
+SETTLE_DELAY = timedelta(seconds=60)
+
+
+def classifier() -> FrechaServicesChatbot:
+    """A chatbot for ``classify()`` only, without the language detector or the queues of chatbot.views."""
+    return FrechaServicesChatbot(
+        catalog_path=settings.CHATBOT_CATALOG_PATH,
+        fuzzy_max_distance=settings.CHATBOT_FUZZY_MAX_DISTANCE,
+        fuzzy_cache_size=settings.CHATBOT_FUZZY_CACHE_SIZE,
+        language_detection=False,
+    )
+
+
+def _add_counts(counts: Counter) -> None:
+    for (bucket, intent, language, provider), amount in counts.items():
+        key = dict(bucket=bucket, intent=intent, language=language, provider=provider)
+        if ConversationRollup.objects.filter(**key).update(count=F('count') + amount):
+            continue
+        try:
+            with transaction.atomic():
+                ConversationRollup.objects.create(count=amount, **key)
+        except IntegrityError:
+            # Another run created the bucket first
+            ConversationRollup.objects.filter(**key).update(count=F('count') + amount)
+
+
+def _bucket(timestamp):
+    return timestamp.replace(minute=0, second=0, microsecond=0)
+
+
+def recount_hours(chatbot, timestamps) -> int:
+    """Rebuild the rollups of the hours ``timestamps`` fall in from the rows every checkpoint covers.
+
+    Used when rows change shard and id, e.g. by rebalance_conversations. Call
+    inside a transaction on ``default`` that also covers the change on the
+    databases involved; the locked checkpoints keep update_source out in
+    between. Returns the number of rows counted.
+    """
+    buckets = {_bucket(timestamp) for timestamp in timestamps}
+    if not buckets:
+        return 0
+    checkpoints = dict(RollupCheckpoint.objects.select_for_update()
+                       .filter(source__in=conversation_shards())
+                       .values_list('source', 'last_id'))
+    counts = Counter()
+    for source, last_id in checkpoints.items():
+        rows = (Conversation.objects.using(source)
+                .filter(id__lte=last_id, timestamp__gte=min(buckets), timestamp__lt=max(buckets) + timedelta(hours=1))
+                .values_list('user_message', 'language', 'timestamp'))
+        for message, language, timestamp in rows.iterator():
+            if _bucket(timestamp) in buckets:
+                intent, provider = chatbot.classify(message)
+                counts[_bucket(timestamp), intent, language, provider] += 1
+
+    ConversationRollup.objects.filter(bucket__in=buckets).delete()
+    ConversationRollup.objects.bulk_create([
+        ConversationRollup(bucket=bucket, intent=intent, language=language, provider=provider, count=amount)
+        for (bucket, intent, language, provider), amount in counts.items()
+    ])
+    return sum(counts.values())
+
+
+def update_source(chatbot, source: str, batch_size: int = 5000) -> int:
+    """Fold one batch of new conversations from database ``source`` into the rollups."""
+    cutoff = timezone.now() - SETTLE_DELAY
+    with transaction.atomic():
+        checkpoint, _ = RollupCheckpoint.objects.select_for_update().get_or_create(source=source)
+        rows = (Conversation.objects.using(source)
+                .filter(id__gt=checkpoint.last_id)
+                .order_by('id')
+                .values_list('id', 'user_message', 'language', 'timestamp')[:batch_size])
+
+        counts = Counter()
+        last_id = checkpoint.last_id
+        for conversation_id, message, language, timestamp in rows:
+            if timestamp > cutoff:
+                break
+            intent, provider = chatbot.classify(message)
+            counts[_bucket(timestamp), intent, language, provider] += 1
+            last_id = conversation_id
+
+        if last_id == checkpoint.last_id:
+            return 0
+        _add_counts(counts)
+        checkpoint.last_id = last_id
+        checkpoint.save(update_fields=['last_id', 'updated'])
+        return sum(counts.values())
+
+
+def update_rollups(chatbot, batch_size: int = 5000) -> int:
+    """Catch the rollups up with every conversation database; return the rows counted."""
+    total = 0
+    for source in conversation_shards():
+        while True:
+            counted = update_source(chatbot, source, batch_size)
+            total += counted
+            if counted < batch_size:
+                break
+    return total
@@ -0,0 +1,43 @@
+from .sharding import conversation_shards, is_sharded, shard_for_session
+
+
+def _is_conversation(model=None, app_label=None, model_name=None) -> bool:
+    if model is not None:
+        return model._meta.label_lower == 'chatbot.conversation'
+    return app_label == 'chatbot' and model_name == 'conversation'
+
+
+class ConversationShardRouter:
+    """Sends each Conversation row to the shard of its session_id.
+
+    Writes and instance-bound reads are routed automatically. Querysets have
+    no session to route by, so they must pick a shard with
+    ``.using(shard_for_session(...))`` or query each of
+    ``conversation_shards()`` in turn. Every other model stays on ``default``.
+    """
+
+    def db_for_read(self, model, **hints):
+        return self._db_for_instance(model, hints)
+
+    def db_for_write(self, model, **hints):
+        return self._db_for_instance(model, hints)
+
+    def _db_for_instance(self, model, hints):
+        instance = hints.get('instance')
+        if is_sharded() and instance is not None and _is_conversation(model):
+            return shard_for_session(instance.session_id)
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if not is_sharded():
+            return None
+        shard_db = db in conversation_shards()
+        if _is_conversation(app_label=app_label, model_name=model_name):
+            return shard_db
+        if shard_db:
+            # Shards hold Conversation tables (and migration bookkeeping) only
+            return False
+        return None
@@ -0,0 +1,69 @@
+"""
+Full-text search over Conversation messages.
+
+The index lives in the database and is kept current by the database itself
+on every insert, update and delete (see AddFullTextSearch in db_operations):
+
+* PostgreSQL: a ``tsvector`` column filled by a trigger, with a GIN index
+* SQLite: an external-content FTS5 table maintained by triggers
+
+Both use a language-neutral configuration (lowercased words, no stemming),
+since messages mix Swahili and English. Terms match whole words and all of
+them must be present.
+"""
+import re
+from typing import Dict
+
+from django.db import connections
+from django.db.models.expressions import RawSQL
+
+SEARCH_VECTOR_COLUMN = 'search_vector'
+SEARCH_CONFIG = 'simple'
+FTS_SUFFIX = '_fts'
+
+_available: Dict[str, bool] = {}
+
+
+def fts_table(model) -> str:
+    return model._meta.db_table + FTS_SUFFIX
+
+
+def full_text_available(model, alias: str) -> bool:
+    """Whether the search index exists for ``model`` on database ``alias``."""
+    key = f"{alias}:{model._meta.label_lower}"
+    if key not in _available:
+        connection = connections[alias]
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                columns = connection.introspection.get_table_description(cursor, model._meta.db_table)
+            _available[key] = any(column.name == SEARCH_VECTOR_COLUMN for column in columns)
+        elif connection.vendor == 'sqlite':
+            _available[key] = fts_table(model) in connection.introspection.table_names()
+        else:
+            _available[key] = False
+    return _available[key]
+
+
+def _fts5_query(search_term: str) -> str:
+    # Quote every word so user input is never parsed as FTS5 syntax
+    words = re.findall(r'\w+', search_term)
+    return ' '.join('"%s"' % word for word in words)
+
+
+def search(queryset, search_term: str):
+    """Filter ``queryset`` to rows whose messages contain every word of ``search_term``."""
+    model = queryset.model
+    connection = connections[queryset.db]
+    table = connection.ops.quote_name(model._meta.db_table)
+    if connection.vendor == 'postgresql':
+        matches = RawSQL(
+            f"SELECT id FROM {table} WHERE {SEARCH_VECTOR_COLUMN} @@ plainto_tsquery(%s::regconfig, %s)",
+            [SEARCH_CONFIG, search_term],
+        )
+    else:
+        index = connection.ops.quote_name(fts_table(model))
+        query = _fts5_query(search_term)
+        if not query:
+            return queryset.none()
+        matches = RawSQL(f"SELECT rowid FROM {index} WHERE {index} MATCH %s", [query])
+    return queryset.filter(id__in=matches)
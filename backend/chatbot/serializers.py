@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from .models import Conversation, Lead
+from .phones import normalize_phone
 
 class ConversationSerializer(serializers.ModelSerializer):
     class Meta:
@@ -10,6 +11,22 @@ class LeadSerializer(serializers.ModelSerializer):
     class Meta:
         model = Lead
         fields = '__all__'
+        # Known numbers are upserted (chatbot.leads), not rejected with a query per row
+        extra_kwargs = {'phone': {'validators': []}}
+
+    def validate_phone(self, value):
+        phone = normalize_phone(value)
+        if phone is None:
+            raise serializers.ValidationError("Enter a valid phone number, e.g. 0757 315 593 or +255757315593.")
+        return phone
+
+class StatsQuerySerializer(serializers.Serializer):
+    DIMENSIONS = ['intent', 'language', 'provider']
+
+    since = serializers.DateTimeField(required=False)
+    until = serializers.DateTimeField(required=False)
+    interval = serializers.ChoiceField(choices=['hour', 'day'], default='hour')
+    by = serializers.MultipleChoiceField(choices=DIMENSIONS, required=False)
 
 class ChatRequestSerializer(serializers.Serializer):
     message = serializers.CharField(max_length=1000)
@@ -0,0 +1,142 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+
+DEFAULT_LANGUAGE = "swahili"
+
+
+class SessionState:
+    """Conversation state of one chat session.
+
+    ``lead_step`` is the lead-capture question awaiting an answer (None when
+    no capture is running) and ``lead`` the answers collected so far.
+    ``language_locked`` is set once the user picks a language explicitly, so
+    detection stops changing it.
+    """
+
+    __slots__ = ("session_id", "language", "lead_step", "lead", "language_locked", "last_seen")
+
+    def __init__(self, session_id: Optional[str], language: str = DEFAULT_LANGUAGE,
+                 lead_step: Optional[str] = None, lead: Optional[dict] = None,
+                 language_locked: bool = False, last_seen: float = 0.0):
+        self.session_id = session_id
+        self.language = language
+        self.lead_step = lead_step
+        self.lead = lead
+        self.language_locked = language_locked
+        self.last_seen = last_seen
+
+    def dump(self) -> tuple:
+        return (self.language, self.lead_step, self.lead, self.language_locked)
+
+    @classmethod
+    def load(cls, session_id: str, data: tuple) -> "SessionState":
+        return cls(session_id, *data)
+
+    def __repr__(self):
+        return f"SessionState({self.session_id!r}, language={self.language!r})"
+
+
+class SessionStore:
+    """Bounded in-memory session states with LRU and idle-TTL eviction.
+
+    With a Django cache alias configured, states are written through to the
+    cache and read from it on every request, so a session keeps its state
+    after local eviction or when it lands on another worker; the local copy
+    only covers a cache miss. Sharing needs a cache that outlives the
+    process (see ``shared``).
+    """
+
+    key_prefix = "chatbot:session:"
+
+    def __init__(self, max_sessions: int = 10000, ttl: float = 1800, cache_alias: Optional[str] = None):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.cache = caches[cache_alias] if cache_alias else None
+        self._states: "OrderedDict[str, SessionState]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls) -> "SessionStore":
+        return cls(
+            max_sessions=getattr(settings, 'CHATBOT_SESSION_MAX', 10000),
+            ttl=getattr(settings, 'CHATBOT_SESSION_TTL', 1800),
+            cache_alias=getattr(settings, 'CHATBOT_SESSION_CACHE', None) or None,
+        )
+
+    @property
+    def shared(self) -> bool:
+        """Whether other worker processes see these states."""
+        return self.cache is not None and not isinstance(self.cache, (LocMemCache, DummyCache))
+
+    def get(self, session_id: Optional[str]) -> SessionState:
+        """Return the state of ``session_id``, creating it if unknown.
+
+        Requests without a session id get a fresh state that is never stored,
+        so anonymous clients cannot see each other's state.
+        """
+        now = time.monotonic()
+        if not session_id:
+            return SessionState(None, last_seen=now)
+
+        with self._lock:
+            self._expire(now)
+            state = self._states.get(session_id)
+            if state is not None and self.cache is None:
+                self._states.move_to_end(session_id)
+                state.last_seen = now
+                return state
+
+        # Another worker may have moved the session on since it was last here
+        state = self._load(session_id) or state or SessionState(session_id)
+        state.last_seen = now
+        with self._lock:
+            if self.cache is None:
+                # Another thread may have created the same session meanwhile.
+                state = self._states.setdefault(session_id, state)
+            else:
+                self._states[session_id] = state
+            self._states.move_to_end(session_id)
+            while len(self._states) > self.max_sessions:
+                self._states.popitem(last=False)
+        return state
+
+    def save(self, state: SessionState) -> None:
+        if self.cache is not None and state.session_id:
+            self.cache.set(self.key_prefix + state.session_id, state.dump(), self.ttl)
+
+    # For async views: with a cache configured, get() and save() wait on it in a worker thread
+
+    async def aget(self, session_id: Optional[str]) -> SessionState:
+        if self.cache is None:
+            return self.get(session_id)
+        return await sync_to_async(self.get, thread_sensitive=False)(session_id)
+
+    async def asave(self, state: SessionState) -> None:
+        if self.cache is not None and state.session_id:
+            await sync_to_async(self.save, thread_sensitive=False)(state)
+
+    def _load(self, session_id: str) -> Optional[SessionState]:
+        if self.cache is None:
+            return None
+        data = self.cache.get(self.key_prefix + session_id)
+        return SessionState.load(session_id, data) if data is not None else None
+
+    def _expire(self, now: float) -> None:
+        # Oldest entries come first, so stop at the first live one.
+        deadline = now - self.ttl
+        while self._states:
+            state = next(iter(self._states.values()))
+            if state.last_seen > deadline:
+                break
+            self._states.popitem(last=False)
+
+    def __len__(self):
+        return len(self._states)
@@ -0,0 +1,99 @@
+"""
+Placement of Conversation rows across the databases in CONVERSATION_SHARDS.
+
+Rows are placed by rendezvous hashing of ``session_id``: every shard scores
+the session and the highest score wins. A session's history therefore lives
+on one shard, and adding a shard only moves the sessions it now wins.
+Without configured shards everything stays on ``default``.
+"""
+import hashlib
+import heapq
+import itertools
+from collections import defaultdict
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence
+
+from django.conf import settings
+
+
+def conversation_shards() -> List[str]:
+    return list(getattr(settings, 'CONVERSATION_SHARDS', None) or ['default'])
+
+
+def is_sharded() -> bool:
+    return bool(getattr(settings, 'CONVERSATION_SHARDS', None))
+
+
+def _score(alias: str, session_id: str) -> int:
+    digest = hashlib.blake2b(f"{alias}:{session_id}".encode(), digest_size=8).digest()
+    return int.from_bytes(digest, 'big')
+
+
+def shard_for_session(session_id: Optional[str], shards: Optional[Sequence[str]] = None) -> str:
+    shards = shards or conversation_shards()
+    if len(shards) == 1:
+        return shards[0]
+    session_id = session_id or ''
+    return max(shards, key=lambda alias: _score(alias, session_id))
+
+
+def shard_for_conversation(conversation) -> str:
+    return shard_for_session(conversation.session_id)
+
+
+def group_by_shard(conversations: Iterable, shards: Optional[Sequence[str]] = None) -> Dict[str, list]:
+    groups = defaultdict(list)
+    for conversation in conversations:
+        groups[shard_for_session(conversation.session_id, shards)].append(conversation)
+    return groups
+
+
+class _Descending:
+    """Sort key wrapper that reverses the order of ``value``."""
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __lt__(self, other):
+        return other.value < self.value
+
+    def __eq__(self, other):
+        return self.value == other.value
+
+
+def _ordering_key(model, ordering: Sequence[str]) -> Callable:
+    fields = []
+    for field in ordering:
+        name = field.lstrip('-')
+        fields.append((model._meta.pk.attname if name == 'pk' else name, field.startswith('-')))
+    return lambda obj: tuple(_Descending(getattr(obj, name)) if descending else getattr(obj, name)
+                             for name, descending in fields)
+
+
+def fan_out(queryset, limit: Optional[int] = None, shards: Optional[Sequence[str]] = None) -> Iterator:
+    """Evaluate ``queryset`` on every shard and merge the rows in its ordering.
+
+    For admin and analytics reads that span sessions; the ordering must be
+    plain field names. With ``limit``, each shard returns at most ``limit``
+    rows and the merged stream stops after ``limit``. Rows keep their shard
+    in ``row._state.db``.
+    """
+    ordering = list(queryset.query.order_by or queryset.model._meta.ordering)
+    per_shard = [
+        (queryset.using(alias)[:limit] if limit is not None else queryset.using(alias)).iterator()
+        for alias in shards or conversation_shards()
+    ]
+    if ordering:
+        merged = heapq.merge(*per_shard, key=_ordering_key(queryset.model, ordering))
+    else:
+        merged = itertools.chain(*per_shard)
+    return itertools.islice(merged, limit)
+
+
+def fan_out_count(queryset, shards: Optional[Sequence[str]] = None) -> int:
+    return sum(fan_out_map(lambda alias: queryset.using(alias).count(), shards).values())
+
+
+def fan_out_map(func: Callable[[str], object], shards: Optional[Sequence[str]] = None) -> Dict[str, object]:
+    """Run ``func(alias)`` for every shard, e.g. an aggregate per shard."""
+    return {alias: func(alias) for alias in shards or conversation_shards()}
@@ -1,3 +1,1168 @@
-from django.test import TestCase
+import atexit
+import csv
+import importlib
+import json
+import math
+import queue
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from io import StringIO
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache, caches
+from django.core.management import CommandError, call_command
+from django.db import DatabaseError, connection, connections, router
+from django.db.migrations.executor import MigrationExecutor
+from django.db.models import Sum
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.urls import clear_url_caches, resolve
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from frecha_api import urls as root_urls
+
+from . import archive, async_views, urls, views
+from .chatbot_logic import FUZZY_KEYWORDS, NEUTRAL_WORDS, FrechaServicesChatbot
+from .fuzzy import FuzzyKeywordIndex
+from .health import HealthProber
+from .language import LanguageDetector
+from .models import Conversation, ConversationRollup, Lead, RollupCheckpoint
+from .phones import normalize_phone
+from .plans import PlanIndex, PlanRecord, find_amount, find_gigabytes, parse_data, parse_price
+from .response_cache import ResponseCache
+from .rollups import classifier, update_rollups
+from .sessions import SessionState, SessionStore
+from .search import fts_table, full_text_available, search
+from .sharding import fan_out, fan_out_count, shard_for_session
+from .writebehind import BLOCK, WriteBehindQueue
+
+# Spare databases for ShardingTests, which point CONVERSATION_SHARDS at two or three of them
+TEST_SHARDS = ["test_shard_0", "test_shard_1", "test_shard_2"]
+for alias in TEST_SHARDS:
+    settings.DATABASES.setdefault(alias, {"ENGINE": "django.db.backends.sqlite3", "NAME": ":memory:"})
+connections.configure_settings(settings.DATABASES)
+
+# Held out from data/language_corpus/; keep it that way when adding sentences there.
+LABELLED_MESSAGES = [
+    ("how much is the cheapest plan", "english"),
+    ("I want to buy a router for my office", "english"),
+    ("what are your prices", "english"),
+    ("can you call me tomorrow", "english"),
+    ("is there a plan for small businesses", "english"),
+    ("my internet is very slow today", "english"),
+    ("where can I find your shop", "english"),
+    ("thank you for the help", "english"),
+    ("good evening, is anyone there", "english"),
+    ("please send me the airtel packages", "english"),
+    ("do you deliver to Arusha", "english"),
+    ("which one is best for streaming videos", "english"),
+    ("nataka kununua router kwa ofisi yangu", "swahili"),
+    ("bei ya kifurushi ni shilingi ngapi", "swahili"),
+    ("nipigie simu kesho asubuhi", "swahili"),
+    ("mnapatikana wapi", "swahili"),
+    ("asante sana kwa msaada", "swahili"),
+    ("naomba maelezo zaidi kuhusu huduma zenu", "swahili"),
+    ("intaneti yangu ni polepole sana leo", "swahili"),
+    ("je mna mpango wa biashara ndogo", "swahili"),
+    ("mko wazi siku ya jumapili", "swahili"),
+    ("nitumie vifurushi vya airtel tafadhali", "swahili"),
+    ("mnaleta mpaka Arusha", "swahili"),
+    ("ipi ni bora kwa kutazama video", "swahili"),
+]
+
+
+class FuzzyKeywordIndexTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.index = FuzzyKeywordIndex(FUZZY_KEYWORDS)
+
+    def test_corrects_misspelt_keywords(self):
+        for typo, keyword in (("vodakom", "vodacom"), ("msada", "msaada"), ("halotell", "halotel"),
+                              ("bundel", "bundle"), ("biashra", "biashara"), ("kiingreza", "kiingereza")):
+            self.assertEqual(self.index.correct(typo), keyword, typo)
+
+    def test_leaves_short_and_unrelated_words_alone(self):
+        for word in ("tall", "ball", "date", "yes", "simba", "asante", "internet", "nyumbani"):
+            self.assertIsNone(self.index.correct(word), word)
+
+    def test_whole_word_keywords_are_not_targets(self):
+        for word in ("unsubscribe", "wonder", "budgets"):
+            self.assertIsNone(self.index.correct(word), word)
+
+
+class LanguageDetectorTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.detector = LanguageDetector.load(ignore=NEUTRAL_WORDS)
+
+    def test_accuracy_on_labelled_sample(self):
+        correct = sum(self.detector.detect(text) == language for text, language in LABELLED_MESSAGES)
+        self.assertGreaterEqual(correct / len(LABELLED_MESSAGES), 0.9)
+
+    def test_short_and_neutral_messages_are_undecided(self):
+        for text in ("ok", "hi", "vodacom", "bundle router", "0757 315 593"):
+            self.assertIsNone(self.detector.detect(text), text)
+
+
+class ReplyLanguageTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.chatbot = FrechaServicesChatbot()
+
+    def test_reply_follows_message_language(self):
+        state = SessionState(None, "swahili")
+        self.chatbot.get_response("can you help me choose a plan please", state)
+        self.assertEqual(state.language, "english")
+        self.chatbot.get_response("naomba msaada wa kuchagua kifurushi", state)
+        self.assertEqual(state.language, "swahili")
+
+    def test_undecided_message_keeps_language(self):
+        state = SessionState(None, "english")
+        self.chatbot.get_response("vodacom", state)
+        self.assertEqual(state.language, "english")
+
+    def test_explicit_switch_locks_language(self):
+        state = SessionState(None, "swahili")
+        self.chatbot.get_response("kiswahili", state)
+        self.chatbot.get_response("can you help me choose a plan please", state)
+        self.assertEqual(state.language, "swahili")
+
+    def test_request_language_overrides_detection(self):
+        state = SessionState(None, "swahili")
+        self.chatbot.get_response("naomba msaada wa kuchagua kifurushi", state, language="english")
+        self.assertEqual(state.language, "english")
+        self.assertTrue(state.language_locked)
+
+
+class SessionStoreTests(SimpleTestCase):
+    def test_least_recently_used_session_is_evicted(self):
+        store = SessionStore(max_sessions=2)
+        store.get("a").language = "english"
+        store.get("b").language = "english"
+        store.get("a")
+        store.get("c")
+        self.assertEqual(len(store), 2)
+        self.assertEqual(store.get("a").language, "english")
+        self.assertEqual(store.get("b").language, SessionState(None).language)
+
+    def test_idle_sessions_expire(self):
+        store = SessionStore(ttl=60)
+        with mock.patch("chatbot.sessions.time.monotonic", return_value=1000.0):
+            store.get("a").lead_step = "phone"
+        with mock.patch("chatbot.sessions.time.monotonic", return_value=1059.0):
+            self.assertEqual(store.get("a").lead_step, "phone")
+        with mock.patch("chatbot.sessions.time.monotonic", return_value=1120.0):
+            self.assertIsNone(store.get("a").lead_step)
+
+    def test_anonymous_requests_are_not_stored(self):
+        store = SessionStore()
+        store.get(None).lead_step = "phone"
+        self.assertIsNone(store.get(None).lead_step)
+        self.assertEqual(len(store), 0)
+
+
+class PhoneTests(SimpleTestCase):
+    def test_normalizes_to_e164(self):
+        for raw in ("0757 315 593", "0757-315-593", "757315593", "255757315593", "+255 757 315 593", "00255757315593"):
+            self.assertEqual(normalize_phone(raw), "+255757315593", raw)
+        self.assertEqual(normalize_phone("+254 712 345 678"), "+254712345678")
+
+    def test_rejects_non_numbers(self):
+        for raw in ("", "12", "hello", "0757 315", "+255 757 315 5930", "0000000000"):
+            self.assertIsNone(normalize_phone(raw), raw)
+
+
+class LeadCaptureTests(SimpleTestCase):
+    def setUp(self):
+        self.leads = []
+        self.chatbot = FrechaServicesChatbot(lead_sink=self.leads.append)
+
+    def reply(self, state, message):
+        return self.chatbot.get_response(message, state, language="english")
+
+    def test_collects_the_missing_fields(self):
+        state = SessionState("s1")
+        self.reply(state, "I want to buy a bundle router")
+        self.assertEqual(state.lead_step, "name")
+        self.reply(state, "Asha")
+        self.assertIn("phone number", self.reply(state, "12"))
+        self.assertEqual(state.lead_step, "phone")
+        self.reply(state, "0757 315 593")
+        self.reply(state, "Dodoma")
+        self.assertIn("Asha", self.reply(state, "vodacom"))
+        self.assertIsNone(state.lead_step)
+        self.assertEqual(self.leads, [{
+            "name": "Asha", "phone": "+255757315593", "location": "Dodoma",
+            "current_provider": "vodacom", "interest": "bundle", "language": "english",
+        }])
+
+    def test_cancel_word_ends_capture(self):
+        state = SessionState("s1")
+        self.reply(state, "place an order")
+        self.reply(state, "please cancel that")
+        self.assertIsNone(state.lead_step)
+        self.assertEqual(self.leads, [])
+
+    def test_ordinary_words_do_not_start_capture(self):
+        for message in ("I live in a border town", "in order to compare", "unsubscribe me"):
+            state = SessionState("s1")
+            self.reply(state, message)
+            self.assertIsNone(state.lead_step, message)
+
+    def test_failed_sink_keeps_capture(self):
+        self.chatbot.lead_sink = mock.Mock(side_effect=RuntimeError)
+        state = SessionState("s1", lead={"name": "Asha", "phone": "+255757315593", "location": "Dodoma",
+                                         "current_provider": "vodacom"}, lead_step="interest")
+        with self.assertLogs("chatbot.chatbot_logic", "ERROR"):
+            self.assertIn("could not save your details", self.reply(state, "sme"))
+        self.assertEqual(state.lead_step, "interest")
+
+        self.chatbot.lead_sink = self.leads.append
+        self.assertIn("Asha", self.reply(state, "sme"))
+        self.assertIsNone(state.lead_step)
+        self.assertEqual(len(self.leads), 1)
+
+
+class LeadPhoneMigrationTests(TransactionTestCase):
+    before = [('chatbot', '0005_lead_time_index')]
+    after = [('chatbot', '0006_lead_phone_unique')]
+
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+    def test_merges_leads_sharing_a_number(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.before)
+        Lead = executor.loader.project_state(self.before).apps.get_model('chatbot', 'Lead')
+        older = Lead.objects.create(name="Asha", phone="0757 315 593", location="Dodoma", interest="bundle",
+                                    needs="fast wifi", status="contacted")
+        newer = Lead.objects.create(name="Asha M", phone="+255757315593", location="", interest="router",
+                                    needs="office", status="new")
+        Lead.objects.filter(id=older.id).update(timestamp=newer.timestamp - timedelta(days=1))
+        other = Lead.objects.create(name="Juma", phone="0712 345 678", location="Arusha", interest="sme")
+
+        with tempfile.TemporaryDirectory() as directory, override_settings(CHATBOT_ARCHIVE_DIR=directory):
+            executor = MigrationExecutor(connection)
+            executor.migrate(self.after)
+            dumps = list(Path(directory).glob("lead_merges-*.jsonl"))
+            self.assertEqual(len(dumps), 1)
+            rows = [json.loads(line) for line in dumps[0].read_text().splitlines()]
+
+        Lead = executor.loader.project_state(self.after).apps.get_model('chatbot', 'Lead')
+        self.assertEqual(Lead.objects.count(), 2)
+        merged = Lead.objects.get(id=newer.id)
+        self.assertEqual((merged.phone, merged.name, merged.location, merged.interest, merged.status),
+                         ("+255757315593", "Asha M", "Dodoma", "router", "contacted"))
+        self.assertEqual(merged.needs, "office\n\nfast wifi")
+        self.assertEqual(Lead.objects.get(id=other.id).phone, "+255712345678")
+        self.assertEqual([(row["id"], row["phone"], row["merged_into"]) for row in rows],
+                         [(older.id, "0757 315 593", newer.id)])
+
+
+class ChatLeadTests(TestCase):
+    def setUp(self):
+        patcher = mock.patch.object(views.conversation_log, "enabled", False)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def capture(self, session_id, *answers):
+        for message in ("I want to buy a bundle router",) + answers:
+            response = self.client.post("/api/chat/", {"message": message, "session_id": session_id,
+                                                       "language": "english"}, content_type="application/json")
+            self.assertEqual(response.status_code, 200)
+        return response.json()["response"]
+
+    def test_lead_is_saved_before_the_reply(self):
+        self.assertIn("Asha", self.capture("lead-1", "Asha", "0757 315 593", "Dodoma", "vodacom"))
+        self.assertIn("Amina", self.capture("lead-2", "Amina", "+255 757 315 593", "Arusha", "airtel"))
+        lead = Lead.objects.get()
+        self.assertEqual((lead.phone, lead.name, lead.location), ("+255757315593", "Amina", "Arusha"))
+
+    def test_failed_save_is_reported_in_the_reply(self):
+        with mock.patch.object(views, "upsert_leads", side_effect=DatabaseError), self.assertLogs("chatbot", "ERROR"):
+            reply = self.capture("lead-3", "Asha", "0757 315 593", "Dodoma", "vodacom")
+        self.assertIn("could not save your details", reply)
+        self.assertFalse(Lead.objects.exists())
+
+
+class ChatBatchTests(TestCase):
+    def post(self, items):
+        return self.client.post("/api/chat/batch/", items, content_type="application/json")
+
+    def test_rejects_invalid_batches(self):
+        self.assertEqual(self.post([]).json()["errors"], {"non_field_errors": ["This list may not be empty."]})
+        self.assertIn("non_field_errors", self.post({"message": "hi"}).json()["errors"])
+        response = self.post([{"message": "hi"}, {"session_id": "b"}])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["errors"], [{}, {"message": ["This field is required."]}])
+        with override_settings(CHATBOT_BATCH_MAX_ITEMS=2):
+            self.assertEqual(self.post([{"message": "hi"}] * 3).status_code, 400)
+        self.assertFalse(Conversation.objects.exists())
+
+    def test_replies_in_order_and_keeps_sessions_apart(self):
+        response = self.post([
+            {"message": "english please", "session_id": "batch-1"},
+            {"message": "naomba msaada wa kuchagua kifurushi", "session_id": "batch-1"},
+            {"message": "naomba msaada wa kuchagua kifurushi", "session_id": "batch-2"},
+        ])
+        self.assertEqual(response.status_code, 200)
+        results = response.json()["results"]
+        self.assertEqual([result["session_id"] for result in results], ["batch-1", "batch-1", "batch-2"])
+        # The first item locks batch-1 to English; batch-2 follows its own message
+        self.assertEqual([result["language"] for result in results], ["english", "english", "swahili"])
+        self.assertTrue(response.json()["saved"])
+        self.assertEqual(
+            list(Conversation.objects.order_by("id").values_list("session_id", "language")),
+            [("batch-1", "english"), ("batch-1", "english"), ("batch-2", "swahili")],
+        )
+
+    def test_failing_item_does_not_fail_the_batch(self):
+        get_response = views.chatbot.get_response
+
+        def flaky(message, *args):
+            if message == "boom":
+                raise RuntimeError("catalog unavailable")
+            return get_response(message, *args)
+
+        with mock.patch.object(views.chatbot, "get_response", side_effect=flaky), \
+                self.assertLogs("chatbot.views", "ERROR"):
+            response = self.post([
+                {"message": "hello", "session_id": "batch-3"},
+                {"message": "boom", "session_id": "batch-3"},
+                {"message": "hello", "session_id": "batch-4"},
+            ])
+        self.assertEqual(response.status_code, 200)
+        results = response.json()["results"]
+        self.assertIn("response", results[0])
+        self.assertEqual(results[1], {"session_id": "batch-3", "error": "Service temporarily unavailable",
+                                      "message": "catalog unavailable"})
+        self.assertIn("response", results[2])
+        self.assertEqual(Conversation.objects.count(), 2)
+
+
+class LeadImportExportTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+
+    def import_file(self, name, content, *args):
+        path = self.directory / name
+        path.write_text(content, encoding="utf-8")
+        out = StringIO()
+        call_command("import_leads", str(path), *args, stdout=out)
+        return out.getvalue().splitlines()[-1]
+
+    def test_csv_import_counts_distinct_phones_and_writes_rejects(self):
+        rejects = self.directory / "rejects.jsonl"
+        summary = self.import_file("agents.csv", (
+            "name,phone,location,interest,budget,status\n"
+            "Asha,0757 315 593,Dodoma,router,,new\n"
+            "Asha K,+255757315593,Dodoma,router,50000,contacted\n"
+            "Bad,123,Mbeya,bundle,,\n"
+            "Juma,0712 345 678,Arusha,bundle,,\n"
+        ), "--rejects", str(rejects))
+        self.assertEqual(summary, "Read 4 rows: saved 2, rejected 1")
+
+        lead = Lead.objects.get(phone="+255757315593")
+        self.assertEqual((lead.name, lead.budget, lead.status), ("Asha K", "50000", "contacted"))
+        self.assertTrue(Lead.objects.filter(phone="+255712345678").exists())
+        [reject] = [json.loads(line) for line in rejects.read_text(encoding="utf-8").splitlines()]
+        self.assertEqual((reject["line"], reject["row"]["name"], list(reject["errors"])), (4, "Bad", ["phone"]))
+
+    def test_jsonl_import_only_overwrites_the_columns_given(self):
+        Lead(name="Asha", phone="+255757315593", location="Dodoma", interest="router", budget="50000",
+             needs="fibre at home", status="contacted").save()
+        summary = self.import_file("leads.jsonl", "\n".join([
+            '{"name": "Asha M", "phone": "0757 315 593", "location": "Dodoma", "interest": "bundle"}',
+            '{"name": "Asha M", "phone": "0757315593", "location": "Dodoma", "interest": "bundle"}',
+            'not json',
+            '["a list"]',
+            "",
+        ]), "--batch-size", "1")
+        self.assertEqual(summary, "Read 4 rows: saved 1, rejected 2")
+        lead = Lead.objects.get()
+        self.assertEqual((lead.name, lead.interest), ("Asha M", "bundle"))
+        self.assertEqual((lead.budget, lead.needs, lead.status), ("50000", "fibre at home", "contacted"))
+
+    def test_dry_run_saves_nothing(self):
+        summary = self.import_file("agents.csv", "name,phone,location,interest\nAsha,0757 315 593,Dodoma,router\n",
+                                   "--dry-run")
+        self.assertEqual(summary, "Read 1 rows: would save 1, rejected 0")
+        self.assertFalse(Lead.objects.exists())
+
+    def test_export_filters_on_status_and_time(self):
+        for name, phone, status, age in (("Asha", "+255757315593", "new", 1), ("Juma", "+255712345678", "new", 10),
+                                         ("Neema", "+255688000111", "lost", 1)):
+            lead = Lead(name=name, phone=phone, location="Dodoma", interest="router", status=status)
+            lead.save()
+            Lead.objects.filter(id=lead.id).update(timestamp=timezone.now() - timedelta(days=age))
+
+        path = self.directory / "new.csv"
+        call_command("export_leads", str(path), status="new", stdout=StringIO())
+        with open(path, newline="", encoding="utf-8") as f:
+            self.assertEqual([row["name"] for row in csv.DictReader(f)], ["Asha", "Juma"])
+
+        path = self.directory / "recent.jsonl"
+        call_command("export_leads", str(path), since=timezone.now() - timedelta(days=2), stdout=StringIO())
+        rows = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+        self.assertEqual([row["name"] for row in rows], ["Asha", "Neema"])
+
+
+class PlanTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.plans = PlanIndex([
+            PlanRecord("yas", "Yas Home", 50000, 60.0, "TZS 50,000", "60GB"),
+            PlanRecord("halotel", "Halo Business", 38000, 50.0, "TZS 38,000", "50GB"),
+            PlanRecord("vodacom", "Unlimited Home", 240000, math.inf, "TZS 240,000", "Unlimited"),
+            PlanRecord("halotel", "Halo Home", 46000, 60.0, "TZS 46,000", "60GB"),
+        ])
+
+    def test_parses_catalog_labels(self):
+        self.assertEqual(parse_price("TZS 15,000"), 15000)
+        self.assertEqual(parse_data("10GB"), 10)
+        self.assertEqual(parse_data("512 MB"), 0.5)
+        self.assertEqual(parse_data("Unlimited"), math.inf)
+        with self.assertRaises(ValueError):
+            parse_data("lots")
+
+    def test_finds_amounts_and_sizes_in_messages(self):
+        self.assertEqual(find_amount("under 50,000"), 50000)
+        self.assertEqual(find_amount("below 45k"), 45000)
+        self.assertEqual(find_amount("chini ya elfu 50"), 50000)
+        self.assertEqual(find_amount("60gb under 50000"), 50000)
+        self.assertIsNone(find_amount("at least 60gb"))
+        self.assertEqual(find_gigabytes("at least 60gb"), 60)
+        self.assertEqual(find_gigabytes("angalau gb 20"), 20)
+        self.assertEqual(find_gigabytes("at least 1tb"), 1024)
+        self.assertIsNone(find_gigabytes("10mbps fibre"))
+        self.assertIsNone(find_gigabytes("under 50,000"))
+
+    def test_price_and_data_queries(self):
+        self.assertEqual([plan.name for plan in self.plans.under(46000)], ["Halo Business", "Halo Home"])
+        self.assertEqual(self.plans.under(1000), ())
+        self.assertEqual([plan.name for plan in self.plans.at_least(60)], ["Halo Home", "Yas Home", "Unlimited Home"])
+        self.assertEqual(self.plans.cheapest_at_least(55).name, "Halo Home")
+        self.assertIsNone(PlanIndex(self.plans.by_price[:2]).cheapest_at_least(100))
+        self.assertEqual(self.plans.cheapest(1)[0].name, "Halo Business")
+        self.assertEqual(self.plans.best_value().name, "Halo Business")
+        self.assertEqual([plan.name for plan in self.plans.matching("halotel", max_price=45000)], ["Halo Business"])
+        self.assertEqual([plan.name for plan in self.plans.matching(min_data=60, max_price=50000)],
+                         ["Halo Home", "Yas Home"])
+
+    def test_replies_to_price_questions(self):
+        chatbot = FrechaServicesChatbot()
+
+        def reply(message):
+            return chatbot.get_response(message, SessionState(None), language="english")
+
+        for message in ("plans under 50,000", "data bundle under 50,000", "bundle chini ya 50000"):
+            self.assertIn("PLANS UP TO TZS 50,000", reply(message), message)
+            self.assertNotIn("60,000", reply(message), message)
+        self.assertIn("PLANS WITH AT LEAST 50GB", reply("at least 50GB data"))
+        self.assertNotIn("10GB", reply("at least 50GB data"))
+        self.assertIn("PLANS WITH AT LEAST 1024GB", reply("at least 1TB"))
+
+    def test_provider_replies_apply_price_and_size(self):
+        chatbot = FrechaServicesChatbot()
+
+        def reply(message):
+            return chatbot.get_response(message, SessionState(None), language="english")
+
+        capped = reply("yas under 60,000")
+        self.assertIn("YAS PLANS UP TO TZS 60,000", capped)
+        self.assertNotIn("HALOTEL", capped)
+        self.assertIn("No plan costs TZS 50,000 or less", reply("airtel under 50,000"))
+        self.assertNotIn("Halo", reply("airtel under 50,000"))
+        self.assertIn("AIRTEL PLANS UP TO TZS 80,000", reply("airtel 80,000"))
+        self.assertIn("HALOTEL PLANS WITH AT LEAST 55GB", reply("halotel router 55gb"))
+        self.assertIn("AIRTEL PLANS", reply("how many gb in airtel home"))
+        # Small numbers are not prices
+        self.assertIn("VODACOM PLANS", reply("vodacom 4g router"))
+
+
+class ResponseCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.cache = ResponseCache()
+        self.cache.cache.clear()
+        self.chatbot = FrechaServicesChatbot(response_cache=self.cache)
+        # Every miss stores one entry
+        patcher = mock.patch.object(self.cache.cache, "set", wraps=self.cache.cache.set)
+        self.stored = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_hit_replays_language_switch(self):
+        first, second = SessionState("a", "swahili"), SessionState("b", "swahili")
+        reply = self.chatbot.get_response("english", first)
+        self.assertEqual(self.chatbot.get_response("English!", second), reply)
+        self.assertEqual(self.stored.call_count, 1)
+        self.assertEqual((second.language, second.language_locked), ("english", True))
+
+    def test_hit_replays_detected_language(self):
+        message = "can you help me choose a plan please"
+        first, second = SessionState("a", "swahili"), SessionState("b", "swahili")
+        reply = self.chatbot.get_response(message, first)
+        self.assertEqual(self.chatbot.get_response(message, second), reply)
+        self.assertEqual(self.stored.call_count, 1)
+        self.assertEqual(second.language, "english")
+
+    def test_locked_session_keeps_its_language(self):
+        message = "can you help me choose a plan please"
+        self.chatbot.get_response(message, SessionState("a", "swahili"))
+        locked = SessionState("b", "swahili", language_locked=True)
+        self.chatbot.get_response(message, locked)
+        self.assertEqual(self.stored.call_count, 2)
+        self.assertEqual(locked.language, "swahili")
+
+    def test_caches_on_one_alias_share_replies(self):
+        self.cache.set("hello", "swahili", False, "v1", ("english", "greeting", "Welcome"))
+        self.assertEqual(ResponseCache().get("hello", "swahili", False, "v1"), ("english", "greeting", "Welcome"))
+        self.assertIsNone(ResponseCache().get("hello", "swahili", False, "v2"))
+
+    def test_settings_pick_the_alias(self):
+        self.assertIs(ResponseCache.from_settings().cache, caches["replies"])
+        self.assertFalse(ResponseCache.from_settings().shared)
+        with override_settings(CHATBOT_RESPONSE_CACHE_SIZE=0):
+            self.assertIsNone(ResponseCache.from_settings())
+
+
+class SessionHistoryTests(TestCase):
+    def test_keyset_pages_cover_every_message_once(self):
+        now = timezone.now()
+        for i in range(5):
+            Conversation.objects.create(session_id="s1", user_message=f"m{i}", bot_response="r", language="english")
+        Conversation.objects.create(session_id="s2", user_message="other", bot_response="r", language="english")
+        # Equal timestamps fall back to id order
+        Conversation.objects.filter(user_message__in=["m1", "m2", "m3"]).update(timestamp=now)
+        Conversation.objects.filter(user_message="m0").update(timestamp=now - timedelta(minutes=1))
+        Conversation.objects.filter(user_message="m4").update(timestamp=now + timedelta(minutes=1))
+
+        messages, cursor = [], None
+        while True:
+            response = self.client.get("/api/sessions/s1/history/", {"limit": 2, **({"cursor": cursor} if cursor else {})})
+            self.assertEqual(response.status_code, 200)
+            messages += [row["user_message"] for row in response.json()["results"]]
+            cursor = response.json()["next_cursor"]
+            if cursor is None:
+                break
+        self.assertEqual(messages, ["m4", "m3", "m2", "m1", "m0"])
+
+    def test_rejects_bad_cursor(self):
+        response = self.client.get("/api/sessions/s1/history/", {"cursor": "not-a-cursor"})
+        self.assertEqual(response.status_code, 400)
+
+
+class SearchTests(TestCase):
+    def add(self, user_message, bot_response="r"):
+        conversation = Conversation(session_id="fts", user_message=user_message, bot_response=bot_response,
+                                    language="english")
+        conversation.save()
+        return conversation
+
+    def indexed(self, word):
+        """Row ids the FTS5 table itself returns for ``word``."""
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT rowid FROM {fts_table(Conversation)} WHERE {fts_table(Conversation)} MATCH %s',
+                           [f'"{word}"'])
+            return {row[0] for row in cursor.fetchall()}
+
+    def found(self, search_term):
+        return set(search(Conversation.objects.all(), search_term).values_list("id", flat=True))
+
+    def test_index_follows_inserts_updates_and_deletes(self):
+        self.assertTrue(full_text_available(Conversation, "default"))
+        first = self.add("vodacom bundle please")
+        second = self.add("halotel router", bot_response="Our Vodacom plans start at 10,000")
+        self.assertEqual(self.indexed("vodacom"), {first.id, second.id})
+
+        Conversation.objects.filter(id=first.id).update(user_message="airtel bundle please")
+        self.assertEqual(self.indexed("vodacom"), {second.id})
+        self.assertEqual(self.indexed("airtel"), {first.id})
+
+        Conversation.objects.filter(id=second.id).delete()
+        self.assertEqual(self.indexed("vodacom"), set())
+        self.assertEqual(self.indexed("router"), set())
+
+    def test_every_word_must_match(self):
+        both = self.add("vodacom bundle please")
+        self.add("vodacom router")
+        split = self.add("bundle please", bot_response="Vodacom has three")
+        self.assertEqual(self.found("VODACOM bundle"), {both.id, split.id})
+        self.assertEqual(self.found("vodacom bundle router"), set())
+        # Search syntax in the input is matched as words, never parsed
+        self.assertEqual(self.found('bundle" OR "router'), set())
+        self.assertEqual(self.found("?!"), set())
+
+    @override_settings(STATICFILES_STORAGE="django.contrib.staticfiles.storage.StaticFilesStorage")
+    def test_admin_search_uses_the_index(self):
+        user = get_user_model().objects.create_superuser("admin", "admin@example.com", "password")
+        self.client.force_login(user)
+        match = self.add("vodacom bundle please")
+        self.add("vodacom router")
+        with mock.patch("chatbot.admin.search", wraps=search) as indexed_search:
+            response = self.client.get("/admin/chatbot/conversation/", {"q": "bundle vodacom"})
+        indexed_search.assert_called_once()
+        self.assertEqual([row.id for row in response.context["cl"].result_list], [match.id])
+
+
+class ArchiveTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        override = self.settings(CHATBOT_ARCHIVE_DIR=directory.name)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def add(self, session_id, message, timestamp):
+        conversation = Conversation(session_id=session_id, user_message=message, bot_response="r", language="english")
+        conversation.save()
+        Conversation.objects.filter(id=conversation.id).update(timestamp=timestamp)
+        return conversation
+
+    def test_archived_month_reads_back(self):
+        march = timezone.make_aware(datetime(2025, 3, 10, 12))
+        self.add("a", "first", march)
+        self.add("b", "other", march + timedelta(hours=1))
+        self.add("a", "second", march + timedelta(days=1))
+        self.add("a", "april", march + timedelta(days=30))
+        kept = self.add("a", "recent", timezone.now())
+
+        written = []
+        append = archive._append
+
+        def checked_append(path, rows):
+            # The chunk's rows are still in the table while it is written
+            self.assertEqual(Conversation.objects.filter(id__in=[row["id"] for row in rows]).count(), len(rows))
+            append(path, rows)
+            written.append(len(rows))
+
+        with mock.patch("chatbot.archive._append", side_effect=checked_append):
+            call_command("archive_conversations", days=30, chunk_size=2, stdout=StringIO())
+        self.assertEqual(sum(written), 4)
+        self.assertEqual(list(Conversation.objects.values_list("id", flat=True)), [kept.id])
+
+        out = StringIO()
+        call_command("read_archive", stdout=out)
+        self.assertEqual(out.getvalue().split(), ["2025-03", "2025-04"])
+
+        out = StringIO()
+        call_command("read_archive", "2025-03", session="a", stdout=out)
+        rows = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual([row["user_message"] for row in rows], ["first", "second"])
+        self.assertEqual(parse_datetime(rows[0]["timestamp"]), march)
+
+        with self.assertRaises(CommandError):
+            call_command("read_archive", "2024-01", stdout=StringIO())
+
+    def test_failed_write_keeps_the_rows(self):
+        self.add("a", "old", timezone.now() - timedelta(days=400))
+        with mock.patch("chatbot.archive._append", side_effect=OSError("disk full")), self.assertRaises(OSError):
+            archive.archive_chunk("default", timezone.now() - timedelta(days=30))
+        self.assertEqual(Conversation.objects.count(), 1)
+
+
+class RollupTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.chatbot = classifier()
+
+    def add(self, message, age=timedelta(hours=2)):
+        conversation = Conversation(session_id="r", user_message=message, bot_response="r", language="english")
+        conversation.save()
+        Conversation.objects.filter(id=conversation.id).update(timestamp=timezone.now() - age)
+        return conversation
+
+    def counted(self):
+        return ConversationRollup.objects.aggregate(total=Sum("count"))["total"] or 0
+
+    def test_incremental_runs_count_each_row_once(self):
+        self.add("what are your prices")
+        self.add("vodacom bundles")
+        self.assertEqual(update_rollups(self.chatbot, batch_size=1), 2)
+        self.assertEqual(update_rollups(self.chatbot), 0)
+        last = self.add("what are your prices")
+        self.assertEqual(update_rollups(self.chatbot), 1)
+        self.assertEqual(self.counted(), 3)
+        self.assertEqual(RollupCheckpoint.objects.get(source="default").last_id, last.id)
+
+        intent, provider = self.chatbot.classify("what are your prices")
+        rollup = ConversationRollup.objects.get(intent=intent, provider=provider)
+        self.assertEqual(rollup.count, 2)
+
+    def test_recent_rows_wait_for_the_next_run(self):
+        settled = self.add("hello")
+        self.add("hello", age=timedelta(seconds=10))
+        # Older than the holdback, but behind a recent id
+        self.add("hello")
+        self.assertEqual(update_rollups(self.chatbot), 1)
+        self.assertEqual(RollupCheckpoint.objects.get(source="default").last_id, settled.id)
+
+        later = timezone.now() + timedelta(minutes=1)
+        with mock.patch("chatbot.rollups.timezone.now", return_value=later):
+            self.assertEqual(update_rollups(self.chatbot), 2)
+        self.assertEqual(self.counted(), 3)
+
+    def test_command_reports_the_rows_counted(self):
+        self.add("hello")
+        out = StringIO()
+        call_command("update_rollups", stdout=out)
+        self.assertIn("Counted 1 new conversations", out.getvalue())
+
+
+class StatsTests(TestCase):
+    def setUp(self):
+        day = timezone.make_aware(datetime(2026, 10, 1))
+        for hours, intent, language, count in ((9, "pricing", "english", 3), (10, "pricing", "swahili", 2),
+                                               (10, "greeting", "english", 1), (24 + 9, "pricing", "english", 4)):
+            ConversationRollup.objects.create(bucket=day + timedelta(hours=hours), intent=intent,
+                                              language=language, provider="", count=count)
+        self.since = day.isoformat()
+
+    def get(self, **params):
+        response = self.client.get("/api/stats/", {"since": self.since, **params})
+        self.assertEqual(response.status_code, 200)
+        return [dict(row, period=parse_datetime(row["period"])) for row in response.json()["results"]]
+
+    def test_totals_per_hour(self):
+        self.assertEqual([row["count"] for row in self.get()], [3, 3, 4])
+
+    def test_totals_per_day(self):
+        day = timezone.make_aware(datetime(2026, 10, 1))
+        self.assertEqual(self.get(interval="day"), [
+            {"period": day, "count": 6},
+            {"period": day + timedelta(days=1), "count": 4},
+        ])
+
+    def test_repeated_by_groups_on_every_dimension(self):
+        rows = self.get(interval="day", by=["language", "intent"])
+        self.assertEqual([(row["intent"], row["language"], row["count"]) for row in rows], [
+            ("greeting", "english", 1), ("pricing", "english", 3), ("pricing", "swahili", 2), ("pricing", "english", 4),
+        ])
+        self.assertNotIn("provider", rows[0])
+
+    def test_reports_rows_not_counted_yet(self):
+        RollupCheckpoint.objects.create(source="default", last_id=0)
+        Conversation(session_id="s", user_message="hi", bot_response="r", language="english").save()
+        body = self.client.get("/api/stats/").json()
+        self.assertEqual((body["checkpoints"], body["pending"]), ({"default": 0}, {"default": 1}))
+
+    def test_rejects_unknown_dimension(self):
+        self.assertEqual(self.client.get("/api/stats/", {"by": "country"}).status_code, 400)
+
+
+@override_settings(STATICFILES_STORAGE="django.contrib.staticfiles.storage.StaticFilesStorage",
+                   CHATBOT_ADMIN_EXACT_COUNT_LIMIT=100)
+class AdminTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        user = get_user_model().objects.create_superuser("admin", "admin@example.com", "password")
+        self.client.force_login(user)
+
+    def changelist(self, model, **params):
+        response = self.client.get(f"/admin/chatbot/{model}/", params)
+        self.assertEqual(response.status_code, 200)
+        return response.context["cl"]
+
+    def add(self, message, language="english"):
+        Conversation(session_id="admin", user_message=message, bot_response="r", language=language).save()
+
+    def test_every_admin_lists_its_rows(self):
+        self.add("hello")
+        Lead(name="Asha", phone="+255757315593", location="Dodoma", interest="router").save()
+        ConversationRollup.objects.create(bucket=timezone.now(), intent="greeting", language="english", count=1)
+        for model in ("conversation", "lead", "conversationrollup"):
+            self.assertEqual(self.changelist(model).result_count, 1, model)
+
+    def test_paginator_estimates_only_unfiltered_lists(self):
+        self.add("hello")
+        self.add("habari", language="swahili")
+        with mock.patch("chatbot.admin.estimated_count", return_value=50000) as estimated_count:
+            self.assertEqual(self.changelist("conversation").paginator.count, 50000)
+            self.assertEqual(self.changelist("conversation", language__exact="swahili").paginator.count, 1)
+            self.assertEqual(self.changelist("conversation", q="habari").paginator.count, 1)
+        estimated_count.assert_called_once_with(Conversation, "default")
+
+        # Small estimates are not trusted either
+        with mock.patch("chatbot.admin.estimated_count", return_value=50):
+            self.assertEqual(self.changelist("conversation").paginator.count, 2)
+
+    def test_facet_values_are_cached(self):
+        self.add("hello")
+        language_filter = lambda cl: next(f for f in cl.filter_specs if f.field_path == "language")
+        self.assertEqual(language_filter(self.changelist("conversation")).lookup_choices, ["english"])
+        self.add("habari", language="swahili")
+        # Served from the cache until CHATBOT_ADMIN_FACET_TTL runs out
+        self.assertEqual(language_filter(self.changelist("conversation")).lookup_choices, ["english"])
+        cache.clear()
+        self.assertEqual(language_filter(self.changelist("conversation")).lookup_choices, ["english", "swahili"])
+
+
+class WriteBehindQueueTests(TestCase):
+    def make_log(self, worker=True, **options):
+        log = WriteBehindQueue(Conversation, **options)
+        atexit.unregister(log.close)
+        self.addCleanup(log._stopping.set)
+        if not worker:
+            log._ensure_worker = lambda: None
+        return log
+
+    def record_batches(self, log):
+        batches = queue.Queue()
+        log.write = lambda batch: batches.put(batch) or True
+        return batches
+
+    def conversation(self, message="hello"):
+        return Conversation(session_id="wb", user_message=message, bot_response="r", language="english")
+
+    def test_flushes_when_a_batch_is_full(self):
+        log = self.make_log(batch_size=3, flush_interval=30)
+        batches = self.record_batches(log)
+        rows = [self.conversation(f"m{i}") for i in range(4)]
+        log.submit_many(rows)
+        self.assertEqual(batches.get(timeout=5), rows[:3])
+        self.assertTrue(batches.empty())
+
+    def test_flushes_after_the_interval(self):
+        log = self.make_log(batch_size=100, flush_interval=0.2)
+        batches = self.record_batches(log)
+        rows = [self.conversation(), self.conversation()]
+        started = time.monotonic()
+        log.submit_many(rows)
+        self.assertEqual(batches.get(timeout=5), rows)
+        self.assertGreaterEqual(time.monotonic() - started, 0.15)
+
+    def test_drop_policy_drops_when_full(self):
+        log = self.make_log(worker=False, max_size=1)
+        self.assertTrue(log.submit(self.conversation()))
+        self.assertFalse(log.submit(self.conversation()))
+        self.assertEqual(log.stats(), {"queued": 1, "flushed": 0, "dropped": 1, "failed": 0, "pending": 1})
+
+    def test_block_policy_waits_for_room(self):
+        log = self.make_log(worker=False, max_size=1, policy=BLOCK, block_timeout=0.05)
+        log.submit(self.conversation())
+        started = time.monotonic()
+        self.assertFalse(log.submit(self.conversation()))
+        self.assertGreaterEqual(time.monotonic() - started, 0.05)
+
+        log.block_timeout = 5
+        threading.Timer(0.05, log._queue.get).start()
+        self.assertTrue(log.submit(self.conversation()))
+        self.assertEqual(log.stats()["dropped"], 1)
+
+    def test_restarts_the_worker_after_a_fork(self):
+        log = self.make_log(flush_interval=0.05)
+        self.record_batches(log)
+        log.submit(self.conversation())
+        parent, parent_pid = log._thread, log._pid
+        # A forked child inherits the queue but not the parent's thread
+        with mock.patch("chatbot.writebehind.os.getpid", return_value=parent_pid + 1):
+            log.submit(self.conversation())
+        self.assertIsNot(log._thread, parent)
+        self.assertEqual(log._pid, parent_pid + 1)
+        self.assertTrue(log._thread.is_alive())
+
+    def test_counts_failed_batches_and_keeps_flushing(self):
+        log = self.make_log(batch_size=2, flush_interval=0.05)
+        batches = queue.Queue()
+
+        def write(batch):
+            if len(batch) == 2:
+                raise DatabaseError("down")
+            batches.put(batch)
+            return True
+
+        log.write = write
+        with self.assertLogs("chatbot.writebehind", "ERROR"):
+            log.submit_many([self.conversation(), self.conversation()])
+            deadline = time.monotonic() + 5
+            while log.stats()["failed"] < 2 and time.monotonic() < deadline:
+                time.sleep(0.01)
+        self.assertEqual(log.stats()["failed"], 2)
+        row = self.conversation()
+        log.submit(row)
+        self.assertEqual(batches.get(timeout=5), [row])
+
+    def test_write_counts_failed_rows(self):
+        log = self.make_log(worker=False)
+        with mock.patch("django.db.models.query.QuerySet.bulk_create", side_effect=DatabaseError), \
+                self.assertLogs("chatbot.writebehind", "ERROR"):
+            self.assertFalse(log.write([self.conversation(), self.conversation()]))
+        self.assertEqual(log.stats()["failed"], 2)
+
+    def test_close_writes_everything_pending(self):
+        log = self.make_log(worker=False, batch_size=2)
+        log.submit_many([self.conversation(f"m{i}") for i in range(5)])
+        log.close()
+        self.assertEqual(Conversation.objects.filter(session_id="wb").count(), 5)
+        self.assertEqual(log.stats(), {"queued": 5, "flushed": 5, "dropped": 0, "failed": 0, "pending": 0})
+
+    def test_chat_returns_the_conversation_id_once_written(self):
+        with mock.patch.object(views.conversation_log, "enabled", False):
+            response = self.client.post("/api/chat/", {"message": "hello", "session_id": "wb"},
+                                        content_type="application/json")
+        self.assertEqual(response.json()["conversation_id"], Conversation.objects.get(session_id="wb").id)
+
+        with mock.patch.object(views.conversation_log, "submit", return_value=True):
+            response = self.client.post("/api/chat/", {"message": "hello", "session_id": "wb"},
+                                        content_type="application/json")
+        self.assertIsNone(response.json()["conversation_id"])
+
+
+@override_settings(CONVERSATION_SHARDS=TEST_SHARDS[:2])
+class ShardingTests(TestCase):
+    databases = {"default", *TEST_SHARDS}
+    two, three = TEST_SHARDS[:2], TEST_SHARDS
+
+    def add(self, session_id, message, timestamp=None):
+        # save(), not objects.create(): the router places rows by their instance
+        conversation = Conversation(session_id=session_id, user_message=message, bot_response="r", language="english")
+        conversation.save()
+        if timestamp is not None:
+            Conversation.objects.using(conversation._state.db).filter(pk=conversation.pk).update(timestamp=timestamp)
+        return conversation
+
+    def rollups(self):
+        return {(row.bucket, row.intent, row.language, row.provider): row.count
+                for row in ConversationRollup.objects.all()}
+
+    def test_placement_is_stable(self):
+        sessions = [f"s{i}" for i in range(200)]
+        placed = {session: shard_for_session(session, self.two) for session in sessions}
+        self.assertEqual(placed, {session: shard_for_session(session, list(self.two)) for session in sessions})
+        self.assertEqual(set(placed.values()), set(self.two))
+        # A third shard only takes sessions over, it never moves them between the old two
+        for session in sessions:
+            self.assertIn(shard_for_session(session, self.three), (placed[session], self.three[2]))
+
+    def test_router_places_rows_and_migrations(self):
+        conversation = self.add("s1", "hi")
+        self.assertEqual(conversation._state.db, shard_for_session("s1"))
+        self.assertEqual(Conversation.objects.using(shard_for_session("s1")).get().pk, conversation.pk)
+        self.assertFalse(Conversation.objects.using("default").exists())
+        for alias in self.two:
+            self.assertTrue(router.allow_migrate_model(alias, Conversation))
+            self.assertFalse(router.allow_migrate_model(alias, Lead))
+        self.assertFalse(router.allow_migrate_model("default", Conversation))
+        self.assertTrue(router.allow_migrate_model("default", Lead))
+
+    def test_batch_and_history_use_the_session_shard(self):
+        sessions = [f"shard-{i}" for i in range(12)]
+        items = [{"message": message, "session_id": session, "language": "english"}
+                 for message in ("hello", "airtel") for session in sessions]
+        response = self.client.post("/api/chat/batch/", items, content_type="application/json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual({shard_for_session(session) for session in sessions}, set(self.two))
+        for session in sessions:
+            home = shard_for_session(session)
+            for alias in self.two:
+                self.assertEqual(Conversation.objects.using(alias).filter(session_id=session).count(),
+                                 2 if alias == home else 0)
+            history = self.client.get(f"/api/sessions/{session}/history/").json()["results"]
+            self.assertEqual([row["user_message"] for row in history], ["airtel", "hello"])
+        self.assertEqual(fan_out_count(Conversation.objects.all()), 24)
+
+    def test_migrate_shards_runs_on_every_shard(self):
+        out = StringIO()
+        call_command("migrate_shards", stdout=out)
+        for alias in self.two:
+            self.assertIn(f"Migrating {alias}", out.getvalue())
+        with override_settings(CONVERSATION_SHARDS=[]):
+            out = StringIO()
+            call_command("migrate_shards", stdout=out)
+            self.assertIn("CONVERSATION_SHARD_URLS is empty", out.getvalue())
+
+    def test_rebalance_moves_only_remapped_sessions(self):
+        sessions = [f"rebalance-{i}" for i in range(30)]
+        start = timezone.now().replace(minute=0, second=0, microsecond=0) - timedelta(days=1)
+        for i, session in enumerate(sessions):
+            for j, message in enumerate(("airtel bundle", "hello", "vodacom under 50,000")):
+                self.add(session, message, start + timedelta(minutes=20 * j + i))
+        chatbot = classifier()
+        self.assertEqual(update_rollups(chatbot), 90)
+        counted = self.rollups()
+        timestamps = {(row.session_id, row.user_message): row.timestamp for row in fan_out(Conversation.objects.all())}
+
+        with override_settings(CONVERSATION_SHARDS=self.three):
+            remapped = {session for session in sessions if shard_for_session(session) != shard_for_session(session, self.two)}
+            self.assertTrue(0 < len(remapped) < len(sessions))
+            out = StringIO()
+            call_command("rebalance_conversations", "--batch-size", "7", stdout=out)
+            self.assertIn(f"Moved {3 * len(remapped)} rows in total", out.getvalue())
+
+            rows = list(fan_out(Conversation.objects.order_by("timestamp")))
+            self.assertEqual(len(rows), 90)
+            self.assertEqual([row.timestamp for row in rows], sorted(timestamps.values()))
+            for row in rows:
+                self.assertEqual(row._state.db, shard_for_session(row.session_id))
+                self.assertEqual(row.timestamp, timestamps[row.session_id, row.user_message])
+            self.assertEqual({row.session_id for row in rows if row._state.db == self.three[2]}, remapped)
+
+            # The moved rows leave the rollups until update_rollups counts them under their new ids
+            self.assertEqual(sum(self.rollups().values()), 90 - 3 * len(remapped))
+            self.assertEqual(update_rollups(chatbot), 3 * len(remapped))
+            self.assertEqual(self.rollups(), counted)
+            self.assertEqual(update_rollups(chatbot), 0)
+
+    @override_settings(STATICFILES_STORAGE="django.contrib.staticfiles.storage.StaticFilesStorage")
+    def test_admin_lists_every_shard(self):
+        user = get_user_model().objects.create_superuser("admin", "admin@example.com", "password")
+        self.client.force_login(user)
+        sessions = [f"admin-{i}" for i in range(12)]
+        for session in sessions:
+            self.add(session, f"message from {session}")
+
+        response = self.client.get("/admin/chatbot/conversation/")
+        self.assertEqual(response.status_code, 200)
+        for session in sessions:
+            conversation = Conversation.objects.using(shard_for_session(session)).get(session_id=session)
+            self.assertContains(response, f"/admin/chatbot/conversation/{conversation.pk}/change/?shard={shard_for_session(session)}")
+
+        one = self.client.get("/admin/chatbot/conversation/", {"shard": self.two[0]})
+        self.assertEqual(len(one.context["cl"].result_list),
+                         sum(shard_for_session(session) == self.two[0] for session in sessions))
+
+    @override_settings(STATICFILES_STORAGE="django.contrib.staticfiles.storage.StaticFilesStorage")
+    def test_admin_opens_rows_by_shard(self):
+        user = get_user_model().objects.create_superuser("admin", "admin@example.com", "password")
+        self.client.force_login(user)
+        sessions = {}
+        for i in range(50):
+            sessions.setdefault(shard_for_session(f"open-{i}"), f"open-{i}")
+        first, second = (sessions[alias] for alias in self.two)
+        # Both shards number their rows from 1
+        self.add(first, "on the first shard")
+        self.add(second, "on the second shard")
+        unique = self.add(first, "only here")
+
+        response = self.client.get(f"/admin/chatbot/conversation/{unique.pk}/change/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["original"].user_message, "only here")
+
+        response = self.client.get("/admin/chatbot/conversation/1/change/", follow=True)
+        self.assertEqual(response.redirect_chain[0][1], 302)
+        self.assertIn("exists on 2 shards", " ".join(str(m) for m in response.context["messages"]))
+
+        response = self.client.get("/admin/chatbot/conversation/1/change/", {"shard": self.two[1]})
+        self.assertEqual(response.context["original"].user_message, "on the second shard")
+
+
+@override_settings(CHATBOT_ASYNC_VIEWS=True)
+class AsyncViewTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        # Registered first, so it runs after the settings override is undone
+        cls.addClassCleanup(cls.load_urls)
+        super().setUpClass()
+        # chatbot.urls picks its views when imported, as under frecha_api.asgi
+        cls.load_urls()
+
+    @staticmethod
+    def load_urls():
+        importlib.reload(urls)
+        importlib.reload(root_urls)
+        clear_url_caches()
+
+    def setUp(self):
+        patcher = mock.patch.object(views.conversation_log, "enabled", False)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def post(self, message, session_id):
+        return await self.async_client.post("/api/chat/", {"message": message, "session_id": session_id},
+                                            content_type="application/json")
+
+    async def test_urls_serve_the_async_views(self):
+        self.assertIs(resolve("/api/chat/").func, async_views.chat)
+        self.assertIs(resolve("/api/health/").func, async_views.health)
+        response = await self.async_client.get("/api/chat/")
+        self.assertEqual(response.status_code, 405)
+
+    async def test_chat_keeps_session_state_in_the_cache(self):
+        with mock.patch.object(async_views, "sessions", SessionStore(cache_alias="default")):
+            response = await self.post("english please", "async-1")
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.json()["language"], "english")
+            response = await self.post("what are your prices", "async-1")
+            self.assertEqual(response.json()["language"], "english")
+        last = await Conversation.objects.filter(session_id="async-1").alatest("id")
+        self.assertEqual(response.json()["conversation_id"], last.id)
+
+    async def test_rejects_empty_message(self):
+        response = await self.post("", "async-2")
+        self.assertEqual(response.status_code, 400)
+
+    async def test_lead_answers_run_off_the_event_loop(self):
+        threads = []
+        sink = lambda lead: threads.append(threading.get_ident())
+        with mock.patch.object(views.chatbot, "lead_sink", sink):
+            for message in ("I want to buy a bundle router", "Asha", "0757 315 593", "Dodoma", "vodacom"):
+                response = await self.post(message, "async-3")
+        self.assertIn("Asha", response.json()["response"])
+        self.assertEqual(len(threads), 1)
+        self.assertNotIn(threads[0], (threading.get_ident(), threading.main_thread().ident))
+
+    async def test_health_serves_the_prober_report(self):
+        report = {"status": "healthy", "checks": {}}
+        with mock.patch.object(async_views.prober, "readiness", return_value=report):
+            response = await self.async_client.get("/api/health/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {"service": "Frecha Django API", **report})
+
+        with mock.patch.object(async_views.prober, "readiness", return_value=dict(report, status="unhealthy")):
+            response = await self.async_client.get("/api/health/")
+        self.assertEqual(response.status_code, 503)
+
+
+class HealthProberTests(TestCase):
+    def setUp(self):
+        self.prober = HealthProber(views.chatbot, WriteBehindQueue(Conversation, enabled=False), interval=10)
+        # The tests drive probe() themselves
+        patcher = mock.patch.object(self.prober, "ensure_started")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_first_check_probes_inline(self):
+        with mock.patch.object(views, "prober", self.prober):
+            response = self.client.get("/api/health/")
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual(body["status"], "healthy")
+        self.assertEqual(body["databases"]["default"]["status"], "connected")
+        self.assertEqual(body["db_latency_ms"]["samples"], 1)
+
+    def test_later_checks_serve_the_cached_report(self):
+        with mock.patch.object(self.prober, "probe", wraps=self.prober.probe) as probe:
+            first = self.prober.readiness()
+            self.assertEqual(self.prober.readiness(), first)
+            with mock.patch.object(views, "prober", self.prober):
+                self.assertEqual(self.client.get("/api/health/ready/").json()["checked_at"], first["checked_at"])
+        probe.assert_called_once()
+
+    def test_stale_report_is_unhealthy(self):
+        self.prober.report = dict(self.prober.probe(), checked_at=time.time() - 31)
+        report = self.prober.readiness()
+        self.assertEqual(report["status"], "unhealthy")
+        self.assertFalse(report["checks"]["fresh"])
+        with mock.patch.object(views, "prober", self.prober):
+            self.assertEqual(self.client.get("/api/health/").status_code, 503)
+
+    def test_failed_first_probe_is_unhealthy(self):
+        with mock.patch.object(self.prober, "probe", side_effect=RuntimeError), self.assertLogs("chatbot.health", "ERROR"):
+            self.assertIsNone(self.prober.readiness())
+            with mock.patch.object(views, "prober", self.prober):
+                response = self.client.get("/api/health/")
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.json()["status"], "unhealthy")
@@ -1,9 +1,22 @@
+from django.conf import settings
 from django.urls import path
 from . import views
 
+if settings.CHATBOT_ASYNC_VIEWS:
+    from . import async_views
+    chat_view, health_view = async_views.chat, async_views.health
+else:
+    chat_view, health_view = views.chat, views.health
+
 urlpatterns = [
-    path('chat/', views.chat, name='chat'),
-    path('health/', views.health, name='health'),
+    path('chat/', chat_view, name='chat'),
+    path('chat/batch/', views.chat_batch, name='chat_batch'),
+    path('sessions/<str:session_id>/history/', views.session_history, name='session_history'),
+    path('stats/', views.stats, name='stats'),
+    path('metrics/', views.metrics_view, name='metrics'),
+    path('health/', health_view, name='health'),
+    path('health/live/', views.health_live, name='health_live'),
+    path('health/ready/', views.health_ready, name='health_ready'),
     # Add a simple health check without database dependency
     path('health-simple/', views.health_check, name='health_simple'),
 ]
\ No newline at end of file
@@ -1,12 +1,61 @@
-from rest_framework.decorators import api_view
+import base64
+import json
+import logging
+import time
+
+from datetime import timedelta
+
+from django.db.models import F, Q, Sum
+from django.db.models.functions import TruncDay
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework.decorators import api_view, renderer_classes
+from rest_framework.renderers import BrowsableAPIRenderer
 from rest_framework.response import Response
 from rest_framework import status
-from django.http import JsonResponse
-from django.db import connection
-from .models import Conversation, Lead
+from django.http import HttpResponse, JsonResponse
+from django.conf import settings
+from .models import Conversation, ConversationRollup, Lead, RollupCheckpoint
+from .serializers import ChatRequestSerializer, ConversationSerializer, StatsQuerySerializer
 from .chatbot_logic import FrechaServicesChatbot
+from .health import HealthProber
+from .leads import upsert_leads
+from . import metrics
+from .renderers import TimedJSONRenderer
+from .response_cache import ResponseCache
+from .sessions import SessionStore
+from .sharding import fan_out_map, shard_for_conversation, shard_for_session
+from .writebehind import WriteBehindQueue
+
+logger = logging.getLogger(__name__)
+
+def save_lead(fields):
+    """Upsert a captured lead before the chat confirms it; a failure is shown in the reply"""
+    upsert_leads([Lead(**fields)])
+
+chatbot = FrechaServicesChatbot(
+    catalog_path=settings.CHATBOT_CATALOG_PATH,
+    catalog_poll_interval=settings.CHATBOT_CATALOG_POLL_INTERVAL,
+    lead_sink=save_lead,
+    fuzzy_max_distance=settings.CHATBOT_FUZZY_MAX_DISTANCE,
+    fuzzy_cache_size=settings.CHATBOT_FUZZY_CACHE_SIZE,
+    language_detection=settings.CHATBOT_LANGUAGE_DETECTION,
+    response_cache=ResponseCache.from_settings(),
+)
+sessions = SessionStore.from_settings()
+conversation_log = WriteBehindQueue.from_settings(Conversation, route=shard_for_conversation)
+prober = HealthProber(
+    chatbot,
+    conversation_log,
+    interval=settings.CHATBOT_HEALTH_INTERVAL,
+    window=settings.CHATBOT_HEALTH_WINDOW,
+)
 
-chatbot = FrechaServicesChatbot()
+metrics.gauge(
+    'chatbot_write_queue', 'Write-behind queue counters by model.', ['model', 'counter'],
+    lambda: {('conversation', name): value for name, value in conversation_log.stats().items()},
+)
+metrics.gauge('chatbot_sessions', 'Chat sessions held in this worker.', [], lambda: {(): len(sessions)})
 
 # Simple health check that doesn't require database
 def health_check(request):
@@ -16,55 +65,196 @@ def health_check(request):
         'timestamp': time.time()
     })
 
+def health_report(report):
+    """Response body and status for a cached prober report"""
+    if report is None:
+        # Even the first probe failed; its error is in the log
+        return {'status': 'unhealthy', 'service': 'Frecha Django API'}, status.HTTP_503_SERVICE_UNAVAILABLE
+    code = status.HTTP_200_OK if report['status'] == 'healthy' else status.HTTP_503_SERVICE_UNAVAILABLE
+    return {'service': 'Frecha Django API', **report}, code
+
 @api_view(['GET'])
 def health(request):
-    """Health check with database connection test"""
-    try:
-        # Test database connection
-        connection.ensure_connection()
-        return Response({
-            'status': 'healthy', 
-            'service': 'Frecha Django API',
-            'database': 'connected'
-        })
-    except Exception as e:
-        return Response({
-            'status': 'unhealthy',
-            'service': 'Frecha Django API', 
-            'error': str(e)
-        }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+    """Health check with database connection test, served from the background prober"""
+    body, code = health_report(prober.readiness())
+    return Response(body, status=code)
+
+def health_live(request):
+    """Liveness: the process answers requests"""
+    return JsonResponse(prober.liveness())
+
+def health_ready(request):
+    """Readiness: database, catalog and write queue were healthy at the last probe"""
+    body, code = health_report(prober.readiness())
+    return JsonResponse(body, status=code)
 
 @api_view(['POST'])
+@renderer_classes([TimedJSONRenderer, BrowsableAPIRenderer])
 def chat(request):
-    user_message = request.data.get('message', '')
-    session_id = request.data.get('session_id', 'default')
+    with metrics.stage('parse'):
+        user_message = request.data.get('message', '')
+        session_id = request.data.get('session_id')
+        language = request.data.get('language')
     
     if not user_message:
         return Response({'error': 'No message provided'}, status=status.HTTP_400_BAD_REQUEST)
     
     try:
         # Get bot response
-        bot_response = chatbot.get_response(user_message)
+        state = sessions.get(session_id)
+        bot_response = chatbot.get_response(user_message, state, language)
+        sessions.save(state)
         
-        # Save conversation to database (if database is available)
-        try:
-            conversation = Conversation.objects.create(
+        # Queue the conversation for a batched insert; the response never waits on it
+        with metrics.stage('write'):
+            conversation = Conversation(
                 user_message=user_message,
                 bot_response=bot_response,
-                language=chatbot.current_language,
-                session_id=session_id
+                language=state.language,
+                session_id=session_id or 'default'
             )
-            conversation_id = conversation.id
-        except:
-            conversation_id = None
+            conversation_log.submit(conversation)
         
         return Response({
             'response': bot_response,
-            'language': chatbot.current_language,
-            'conversation_id': conversation_id,
+            'language': state.language,
+            # None while the row waits in the write-behind queue
+            'conversation_id': conversation.id,
+            'catalog_version': chatbot.catalog.snapshot.version,
         })
     except Exception as e:
         return Response({
             'error': 'Service temporarily unavailable',
             'message': str(e)
-        }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
\ No newline at end of file
+        }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+
+@api_view(['POST'])
+@renderer_classes([TimedJSONRenderer, BrowsableAPIRenderer])
+def chat_batch(request):
+    """Answer a list of {message, session_id} items in one request, e.g. gateway backlogs"""
+    with metrics.stage('parse'):
+        serializer = ChatRequestSerializer(
+            data=request.data, many=True, allow_empty=False, max_length=settings.CHATBOT_BATCH_MAX_ITEMS
+        )
+        valid = serializer.is_valid()
+    if not valid:
+        return Response({'errors': serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
+
+    results = []
+    conversations = []
+    # Items are answered in input order, so messages of one session see each other's state changes
+    for item in serializer.validated_data:
+        session_id = item.get('session_id')
+        try:
+            state = sessions.get(session_id)
+            bot_response = chatbot.get_response(item['message'], state, item.get('language'))
+            sessions.save(state)
+        except Exception as e:
+            # One failing item must not cost the others their replies
+            logger.exception("Could not answer batch item for session %s", session_id)
+            results.append({
+                'session_id': session_id,
+                'error': 'Service temporarily unavailable',
+                'message': str(e),
+            })
+            continue
+        results.append({
+            'session_id': session_id,
+            'response': bot_response,
+            'language': state.language,
+        })
+        conversations.append(Conversation(
+            user_message=item['message'],
+            bot_response=bot_response,
+            language=state.language,
+            session_id=session_id or 'default'
+        ))
+
+    with metrics.stage('write'):
+        saved = conversation_log.write(conversations)
+    return Response({
+        'results': results,
+        'saved': saved,
+        'catalog_version': chatbot.catalog.snapshot.version,
+    })
+
+
+def encode_cursor(conversation):
+    position = [conversation.timestamp.isoformat(), conversation.id]
+    return base64.urlsafe_b64encode(json.dumps(position).encode()).decode()
+
+def decode_cursor(cursor):
+    timestamp, conversation_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    timestamp = parse_datetime(timestamp)
+    if timestamp is None or not isinstance(conversation_id, int):
+        raise ValueError(cursor)
+    return timestamp, conversation_id
+
+@api_view(['GET'])
+def session_history(request, session_id):
+    """Newest-first messages of one session, paginated by a (timestamp, id) cursor"""
+    try:
+        limit = min(int(request.query_params.get('limit', settings.CHATBOT_HISTORY_PAGE_SIZE)),
+                    settings.CHATBOT_HISTORY_MAX_PAGE_SIZE)
+        cursor = request.query_params.get('cursor')
+        position = decode_cursor(cursor) if cursor else None
+    except (TypeError, ValueError):
+        return Response({'error': 'Invalid limit or cursor'}, status=status.HTTP_400_BAD_REQUEST)
+    if limit < 1:
+        return Response({'error': 'Invalid limit or cursor'}, status=status.HTTP_400_BAD_REQUEST)
+
+    # Served by the (session_id, timestamp) index; no OFFSET, so every page costs the same
+    queryset = (Conversation.objects.using(shard_for_session(session_id))
+                .filter(session_id=session_id)
+                .order_by('-timestamp', '-id'))
+    if position:
+        timestamp, conversation_id = position
+        queryset = queryset.filter(Q(timestamp__lt=timestamp) | Q(timestamp=timestamp, id__lt=conversation_id))
+
+    page = list(queryset[:limit + 1])
+    has_more = len(page) > limit
+    page = page[:limit]
+    return Response({
+        'session_id': session_id,
+        'results': ConversationSerializer(page, many=True).data,
+        'next_cursor': encode_cursor(page[-1]) if has_more else None,
+    })
+
+@api_view(['GET'])
+def stats(request):
+    """Conversation counts from the hourly rollups (default: last 7 days, totals per period)
+
+    Query: since, until (ISO datetimes), interval=hour|day, by=intent&by=language&by=provider
+    """
+    query = StatsQuerySerializer(data=request.query_params)
+    if not query.is_valid():
+        return Response({'errors': query.errors}, status=status.HTTP_400_BAD_REQUEST)
+    params = query.validated_data
+
+    since = params.get('since') or timezone.now() - timedelta(days=7)
+    rows = ConversationRollup.objects.filter(bucket__gte=since)
+    if params.get('until'):
+        rows = rows.filter(bucket__lt=params['until'])
+    dimensions = [name for name in StatsQuerySerializer.DIMENSIONS if name in params.get('by', ())]
+    period = TruncDay('bucket') if params['interval'] == 'day' else F('bucket')
+    rows = (rows.annotate(period=period)
+            .values('period', *dimensions)
+            .annotate(count=Sum('count'))
+            .order_by('period', *dimensions))
+
+    # Rollups cover conversations up to these ids (see update_rollups)
+    checkpoints = dict(RollupCheckpoint.objects.values_list('source', 'last_id'))
+    return Response({
+        'interval': params['interval'],
+        'since': since,
+        'results': list(rows),
+        'checkpoints': checkpoints,
+        # Conversations per database that the results do not count yet
+        'pending': fan_out_map(
+            lambda alias: Conversation.objects.using(alias).filter(id__gt=checkpoints.get(alias, 0)).count()
+        ),
+    })
+
+def metrics_view(request):
+    """Prometheus text exposition of this worker's metrics"""
+    return HttpResponse(metrics.render(), content_type=metrics.CONTENT_TYPE)
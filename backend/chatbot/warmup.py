@@ -0,0 +1,32 @@
+"""
+Start-up work done once in the gunicorn master before it forks workers.
+
+See gunicorn.conf.py: with ``preload_app`` the master imports the app, and
+``warm_up()`` builds everything a worker would otherwise build on its first
+request. Workers then start ready to answer and share that memory with the
+master copy-on-write.
+"""
+from django.urls import get_resolver
+
+from . import metrics
+from .sessions import SessionState
+
+# Quick-action buttons of the web UI
+QUICK_ACTIONS = ("Habari", "bundle", "vodacom", "SME", "bei nafuu", "wasiliana", "english", "kiswahili")
+
+
+def warm_up() -> None:
+    """Load the URLconf and views (building the chatbot) and answer the quick actions in each language.
+
+    Touches no database and starts no threads, both of which must happen
+    in each worker after the fork.
+    """
+    get_resolver().resolve("/api/chat/")
+    from .views import chatbot
+
+    for language in chatbot.translations:
+        for locked in (False, True):
+            for message in QUICK_ACTIONS:
+                chatbot.get_response(message, SessionState(None, language, language_locked=locked))
+    # Warm-up answers are not traffic
+    metrics.reset()
@@ -0,0 +1,189 @@
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+from collections import defaultdict
+from typing import Callable, Dict, Iterable, Optional
+
+from django.conf import settings
+from django.db import close_old_connections
+
+from .metrics import WRITE_BATCH_SECONDS
+
+logger = logging.getLogger(__name__)
+
+DROP = "drop"
+BLOCK = "block"
+
+
+class WriteBehindQueue:
+    """Buffers unsaved model instances and inserts them with ``bulk_create``.
+
+    ``submit()`` only enqueues, so the request never waits on the database.
+    A background thread writes a batch whenever ``batch_size`` rows are
+    waiting or ``flush_interval`` seconds have passed since the first of
+    them. When the queue is full, ``policy`` decides whether new rows are
+    dropped or the caller blocks (up to ``block_timeout`` seconds, then
+    drops). Pending rows are written at interpreter exit. ``route`` maps a
+    row to its database alias; rows are inserted with one ``bulk_create``
+    per database. With ``unique_key``, only the last row per key in a batch
+    is written, as upserts (``update_conflicts``) may not touch a row twice.
+
+    The thread starts on first use, again after a fork (so the queue can be
+    created at import time in a preloading master process) and again if it
+    ever died.
+    """
+
+    def __init__(self, model, batch_size: int = 100, flush_interval: float = 1.0, max_size: int = 10000,
+                 policy: str = DROP, block_timeout: Optional[float] = None, enabled: bool = True,
+                 bulk_options: Optional[dict] = None, route: Optional[Callable] = None,
+                 unique_key: Optional[Callable] = None):
+        if policy not in (DROP, BLOCK):
+            raise ValueError(f"Unknown write-behind policy: {policy!r}")
+        self.model = model
+        self.batch_size = batch_size
+        self.max_size = max_size
+        self.flush_interval = flush_interval
+        self.policy = policy
+        self.block_timeout = block_timeout
+        self.enabled = enabled
+        self.bulk_options = bulk_options or {}
+        self.route = route
+        self.unique_key = unique_key
+        self._queue: "queue.Queue" = queue.Queue(max_size)
+        self._lock = threading.Lock()
+        self._counters = {"queued": 0, "flushed": 0, "dropped": 0, "failed": 0}
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+        self._stopping = threading.Event()
+        atexit.register(self.close)
+
+    @classmethod
+    def from_settings(cls, model, **options) -> "WriteBehindQueue":
+        return cls(
+            model,
+            batch_size=settings.CHATBOT_WRITE_BATCH_SIZE,
+            flush_interval=settings.CHATBOT_WRITE_FLUSH_INTERVAL,
+            max_size=settings.CHATBOT_WRITE_QUEUE_SIZE,
+            policy=settings.CHATBOT_WRITE_FULL_POLICY,
+            block_timeout=settings.CHATBOT_WRITE_BLOCK_TIMEOUT,
+            enabled=settings.CHATBOT_WRITE_BEHIND,
+            **options,
+        )
+
+    def submit(self, obj) -> bool:
+        """Queue ``obj`` for insertion. Returns False if it was dropped."""
+        if not self.enabled:
+            self.write([obj])
+            return True
+
+        self._ensure_worker()
+        try:
+            if self.policy == BLOCK:
+                self._queue.put(obj, timeout=self.block_timeout)
+            else:
+                self._queue.put_nowait(obj)
+        except queue.Full:
+            self._count("dropped")
+            return False
+        self._count("queued")
+        return True
+
+    def submit_many(self, objs: Iterable) -> int:
+        return sum(self.submit(obj) for obj in objs)
+
+    def flush(self) -> None:
+        """Write everything queued so far from the calling thread."""
+        batch = self._drain(self.batch_size)
+        while batch:
+            self.write(batch)
+            batch = self._drain(self.batch_size)
+
+    def close(self) -> None:
+        self._stopping.set()
+        thread = self._thread
+        if thread is not None and thread.is_alive() and self._pid == os.getpid():
+            thread.join(timeout=self.flush_interval + 5)
+        self.flush()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            counters = dict(self._counters)
+        counters["pending"] = self._queue.qsize()
+        return counters
+
+    def _count(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            self._counters[name] += amount
+
+    def _ensure_worker(self) -> None:
+        pid = os.getpid()
+        if self._pid == pid and self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._pid == pid and self._thread is not None and self._thread.is_alive():
+                return
+            self._pid = pid
+            self._thread = threading.Thread(
+                target=self._run, name=f"write-behind-{self.model._meta.model_name}", daemon=True,
+            )
+            self._thread.start()
+
+    def _drain(self, limit: int) -> list:
+        batch = []
+        while len(batch) < limit:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                first = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            batch = [first]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            try:
+                self.write(batch)
+                # Long-lived thread: drop connections that are broken or past CONN_MAX_AGE.
+                close_old_connections()
+            except Exception:
+                # Keep the flusher alive; losing it would silently drop every later row
+                self._count("failed", len(batch))
+                logger.exception("Could not write %d %s rows", len(batch), self.model._meta.model_name)
+
+    def write(self, batch: list) -> bool:
+        """Insert ``batch`` now with one ``bulk_create`` per database, bypassing the queue."""
+        if self.unique_key is not None:
+            batch = list({self.unique_key(obj): obj for obj in batch}.values())
+        groups = {None: batch}
+        if self.route is not None:
+            groups = defaultdict(list)
+            for obj in batch:
+                groups[self.route(obj)].append(obj)
+
+        ok = True
+        for using, rows in groups.items():
+            try:
+                with WRITE_BATCH_SECONDS.labels(self.model._meta.model_name).time():
+                    self.model.objects.using(using).bulk_create(rows, **self.bulk_options)
+            except Exception:
+                ok = False
+                self._count("failed", len(rows))
+                logger.exception("Could not write %d %s rows to %s", len(rows), self.model._meta.model_name, using or "default")
+            else:
+                self._count("flushed", len(rows))
+        return ok
@@ -0,0 +1,6 @@
+import os
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'frecha_api.settings')
+os.environ.setdefault('CHATBOT_ASYNC_VIEWS', 'True')
+application = get_asgi_application()
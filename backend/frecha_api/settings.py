@@ -1,6 +1,6 @@
 import os
 from pathlib import Path
-from decouple import config
+from decouple import Csv, config
 import dj_database_url
 
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -30,6 +30,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'chatbot.middleware.MetricsMiddleware',  # first, so it times the whole stack
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',  # This must be here
@@ -61,6 +62,9 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'frecha_api.wsgi:application'
 
+# Serve /api/chat/ and /api/health/ with the async views; frecha_api.asgi turns this on
+CHATBOT_ASYNC_VIEWS = config('CHATBOT_ASYNC_VIEWS', default=False, cast=bool)
+
 # Database Configuration
 DATABASE_URL = config('DATABASE_URL', default='sqlite:///db.sqlite3')
 
@@ -75,6 +79,32 @@ DATABASES = {
     )
 }
 
+# Conversation shards: comma-separated database URLs, e.g.
+# CONVERSATION_SHARD_URLS=sqlite:///shard0.sqlite3,sqlite:///shard1.sqlite3
+# Each becomes DATABASES['conversations_<n>']; keep the order stable, since the
+# alias is part of the placement hash. Empty keeps conversations on 'default'.
+CONVERSATION_SHARDS = []
+for index, shard_url in enumerate(config('CONVERSATION_SHARD_URLS', default='', cast=Csv())):
+    alias = f'conversations_{index}'
+    DATABASES[alias] = dj_database_url.parse(
+        shard_url,
+        conn_max_age=600,
+        ssl_require=not DEBUG and not shard_url.startswith('sqlite'),
+    )
+    CONVERSATION_SHARDS.append(alias)
+
+DATABASE_ROUTERS = ['chatbot.routers.ConversationShardRouter']
+
+# Default cache (admin filter choices, shared session/response caches); any Django
+# cache backend works, e.g. CACHE_BACKEND=django.core.cache.backends.redis.RedisCache
+# with CACHE_LOCATION=redis://localhost:6379 to share entries between workers
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default='frecha'),
+    }
+}
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -114,6 +144,58 @@ REST_FRAMEWORK = {
     ]
 }
 
+# Product catalog, re-read by running workers when the file changes
+CHATBOT_CATALOG_PATH = config('CHATBOT_CATALOG_PATH', default=os.path.join(BASE_DIR, 'chatbot', 'data', 'catalog.json'))
+CHATBOT_CATALOG_POLL_INTERVAL = config('CHATBOT_CATALOG_POLL_INTERVAL', default=5.0, cast=float)  # seconds
+
+# Typo tolerance for intent keywords ("vodakom"); 0 turns it off
+CHATBOT_FUZZY_MAX_DISTANCE = config('CHATBOT_FUZZY_MAX_DISTANCE', default=2, cast=int)
+CHATBOT_FUZZY_CACHE_SIZE = config('CHATBOT_FUZZY_CACHE_SIZE', default=1024, cast=int)  # recent corrections kept
+
+# Reply in the language each message is written in, until the user picks one
+CHATBOT_LANGUAGE_DETECTION = config('CHATBOT_LANGUAGE_DETECTION', default=True, cast=bool)
+
+# Replies by normalized message, language and catalog version; size 0 turns it off
+CHATBOT_RESPONSE_CACHE_SIZE = config('CHATBOT_RESPONSE_CACHE_SIZE', default=1024, cast=int)
+CHATBOT_RESPONSE_CACHE_TTL = config('CHATBOT_RESPONSE_CACHE_TTL', default=300, cast=int)  # seconds
+CHATBOT_RESPONSE_CACHE = config('CHATBOT_RESPONSE_CACHE', default='replies')  # e.g. 'default' to share replies via Redis
+CACHES['replies'] = {
+    'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    'LOCATION': 'frecha-replies',
+    'OPTIONS': {'MAX_ENTRIES': max(CHATBOT_RESPONSE_CACHE_SIZE, 1)},
+}
+
+# Chat session state, keyed by the session_id sent to /api/chat/
+CHATBOT_SESSION_MAX = config('CHATBOT_SESSION_MAX', default=10000, cast=int)
+CHATBOT_SESSION_TTL = config('CHATBOT_SESSION_TTL', default=1800, cast=int)  # seconds idle
+CHATBOT_SESSION_CACHE = config('CHATBOT_SESSION_CACHE', default='')  # cache alias to share state, empty = memory only
+
+# Write-behind logging of conversations: batched bulk inserts off the request path
+CHATBOT_WRITE_BEHIND = config('CHATBOT_WRITE_BEHIND', default=True, cast=bool)  # False = insert inline
+CHATBOT_WRITE_BATCH_SIZE = config('CHATBOT_WRITE_BATCH_SIZE', default=100, cast=int)
+CHATBOT_WRITE_FLUSH_INTERVAL = config('CHATBOT_WRITE_FLUSH_INTERVAL', default=1.0, cast=float)  # seconds
+CHATBOT_WRITE_QUEUE_SIZE = config('CHATBOT_WRITE_QUEUE_SIZE', default=10000, cast=int)
+CHATBOT_WRITE_FULL_POLICY = config('CHATBOT_WRITE_FULL_POLICY', default='drop')  # 'drop' or 'block' when full
+CHATBOT_WRITE_BLOCK_TIMEOUT = config('CHATBOT_WRITE_BLOCK_TIMEOUT', default=None, cast=lambda v: None if v in (None, '') else float(v))
+
+# /api/sessions/<id>/history/ page sizes
+CHATBOT_HISTORY_PAGE_SIZE = config('CHATBOT_HISTORY_PAGE_SIZE', default=50, cast=int)
+CHATBOT_HISTORY_MAX_PAGE_SIZE = config('CHATBOT_HISTORY_MAX_PAGE_SIZE', default=200, cast=int)
+
+# Background health prober behind /api/health/, /api/health/live/ and /api/health/ready/
+CHATBOT_HEALTH_INTERVAL = config('CHATBOT_HEALTH_INTERVAL', default=10.0, cast=float)  # seconds between probes
+CHATBOT_HEALTH_WINDOW = config('CHATBOT_HEALTH_WINDOW', default=60, cast=int)  # DB latency samples for percentiles
+
+CHATBOT_BATCH_MAX_ITEMS = config('CHATBOT_BATCH_MAX_ITEMS', default=1000, cast=int)  # per /api/chat/batch/ request
+
+# Admin changelists: estimated counts above this many rows, cached filter choices
+CHATBOT_ADMIN_EXACT_COUNT_LIMIT = config('CHATBOT_ADMIN_EXACT_COUNT_LIMIT', default=10000, cast=int)
+CHATBOT_ADMIN_FACET_TTL = config('CHATBOT_ADMIN_FACET_TTL', default=300, cast=int)  # seconds
+
+# archive_conversations: rows older than this move to monthly .jsonl.gz files
+CHATBOT_ARCHIVE_AFTER_DAYS = config('CHATBOT_ARCHIVE_AFTER_DAYS', default=180, cast=int)
+CHATBOT_ARCHIVE_DIR = config('CHATBOT_ARCHIVE_DIR', default=os.path.join(BASE_DIR, 'archive'))
+
 CORS_ALLOW_ALL_ORIGINS = True
 CORS_ALLOW_CREDENTIALS = True
 
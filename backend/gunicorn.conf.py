@@ -0,0 +1,44 @@
+"""
+Gunicorn settings for the backend, read automatically from this directory.
+
+The app is imported and warmed up once in the master (``preload_app``), so
+workers forked at start, on scale-up or after a crash answer their first
+request without importing Django or building the chatbot. Command-line
+options override these values.
+
+Chat sessions live in each worker's memory unless CHATBOT_SESSION_CACHE
+names a cache shared between processes, so more than one worker is refused
+without one: a lead capture or language choice would be lost whenever the
+next message of a session lands on another worker.
+"""
+import gc
+import os
+import sys
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+workers = int(os.environ.get('WEB_CONCURRENCY', 1))
+preload_app = True
+
+
+def on_starting(server):
+    # Runs in the master after the app is loaded and before it listens
+    if server.num_workers > 1:
+        from chatbot.views import sessions
+
+        if not sessions.shared:
+            server.log.error(
+                "%d workers need CHATBOT_SESSION_CACHE set to a cache shared between processes "
+                "(e.g. redis); set WEB_CONCURRENCY=1 or configure one", server.num_workers,
+            )
+            sys.exit(1)
+
+
+def when_ready(server):
+    # Runs in the master after the app is loaded and before the first fork
+    from chatbot.warmup import warm_up
+
+    warm_up()
+    # Move everything built so far out of the cyclic collector's reach; its
+    # passes would otherwise write to, and so copy, those pages in every worker
+    gc.collect()
+    gc.freeze()
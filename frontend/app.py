@@ -1,294 +1,125 @@
+import json
+import mimetypes
 import os
+import time
 import requests
-from flask import Flask, request, jsonify, render_template
+from flask import Flask, Response, abort, g, request, jsonify, render_template
 from flask_cors import CORS
 
+import build_assets
+import metrics
+from backend_client import BackendClient, CircuitBreaker
+
 app = Flask(__name__)
 CORS(app)
 
 # Django backend URL (will be set in Railway)
 DJANGO_BACKEND_URL = os.environ.get('DJANGO_BACKEND_URL', 'http://localhost:8000')
 
-@app.route('/')
-def home():
-    return '''
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <title>Frecha iotech</title>
-        <meta charset="UTF-8">
-        <meta name="viewport" content="width=device-width, initial-scale=1.0">
-        <style>
-            * { margin: 0; padding: 0; box-sizing: border-box; }
-            body { 
-                font-family: Arial, sans-serif; 
-                background: linear-gradient(135deg, #667eea, #764ba2);
-                min-height: 100vh; 
-                display: flex; 
-                align-items: center; 
-                justify-content: center; 
-                padding: 20px; 
-            }
-            .container { 
-                width: 100%; 
-                max-width: 800px; 
-                background: white; 
-                border-radius: 15px; 
-                box-shadow: 0 10px 30px rgba(0,0,0,0.2); 
-                overflow: hidden; 
-            }
-            .header { 
-                background: linear-gradient(135deg, #2c3e50, #3498db); 
-                color: white; 
-                text-align: center; 
-                padding: 30px 20px; 
-            }
-            .company-name { 
-                font-size: 2.5em; 
-                font-weight: bold; 
-                margin-bottom: 10px; 
-            }
-            .providers {
-                display: flex;
-                justify-content: center;
-                gap: 10px;
-                flex-wrap: wrap;
-                margin-top: 15px;
-            }
-            .provider-tag {
-                background: rgba(255,255,255,0.2);
-                padding: 5px 10px;
-                border-radius: 15px;
-                font-size: 0.9em;
-            }
-            .chat-area { 
-                padding: 20px; 
-            }
-            .quick-actions {
-                display: grid;
-                grid-template-columns: repeat(4, 1fr);
-                gap: 8px;
-                margin-bottom: 15px;
-            }
-            .quick-btn {
-                background: #667eea;
-                color: white;
-                border: none;
-                padding: 10px;
-                border-radius: 8px;
-                cursor: pointer;
-                font-size: 0.8em;
-                text-align: center;
-            }
-            .quick-btn:hover {
-                background: #5a6fd8;
-            }
-            .chat-box { 
-                height: 300px; 
-                border: 1px solid #ddd; 
-                border-radius: 10px; 
-                padding: 15px; 
-                overflow-y: auto; 
-                background: #f9f9f9; 
-                margin-bottom: 15px; 
-            }
-            .message { 
-                margin: 10px 0; 
-                padding: 10px; 
-                border-radius: 10px; 
-                max-width: 80%; 
-            }
-            .user-message { 
-                background: #667eea; 
-                color: white; 
-                margin-left: auto; 
-                text-align: right; 
-            }
-            .bot-message { 
-                background: white; 
-                border: 1px solid #ddd; 
-                white-space: pre-line; 
-            }
-            .input-area { 
-                display: flex; 
-                gap: 10px; 
-            }
-            input { 
-                flex: 1; 
-                padding: 12px; 
-                border: 1px solid #ddd; 
-                border-radius: 8px; 
-                font-size: 1em; 
-            }
-            button { 
-                background: #667eea; 
-                color: white; 
-                border: none; 
-                padding: 12px 20px; 
-                border-radius: 8px; 
-                cursor: pointer; 
-                font-size: 1em; 
-            }
-            .language-indicator {
-                position: absolute;
-                top: 15px;
-                right: 15px;
-                background: rgba(255,255,255,0.2);
-                padding: 5px 10px;
-                border-radius: 10px;
-                font-size: 0.8em;
-            }
-            @media (max-width: 600px) {
-                .quick-actions {
-                    grid-template-columns: repeat(2, 1fr);
-                }
-                .company-name {
-                    font-size: 2em;
-                }
-            }
-        </style>
-    </head>
-    <body>
-        <div class="container">
-            <div class="header">
-                <div class="language-indicator" id="lang-indicator">SW</div>
-                <div class="company-name">FRECHA IOTECH</div>
-                <div class="company-tagline">Your Trusted Internet Solutions Partner</div>
-                <div class="providers">
-                    <div class="provider-tag">🟥 Vodacom</div>
-                    <div class="provider-tag">🟦 Yas</div>
-                    <div class="provider-tag">🟥 Airtel</div>
-                    <div class="provider-tag">🟨Halotel</div>
-                </div>
-            </div>
-            
-            <div class="chat-area">
-                <div class="quick-actions">
-                    <button class="quick-btn" onclick="sendQuickMessage('Habari')">🤖 Habari</button>
-                    <button class="quick-btn" onclick="sendQuickMessage('bundle')">📦 Bundle</button>
-                    <button class="quick-btn" onclick="sendQuickMessage('vodacom')">🟥 Vodacom</button>
-                    <button class="quick-btn" onclick="sendQuickMessage('SME')">🏢 SME</button>
-                    <button class="quick-btn" onclick="sendQuickMessage('bei nafuu')">💰 Bei Nafuu</button>
-                    <button class="quick-btn" onclick="sendQuickMessage('wasiliana')">📞 Wasiliana</button>
-                    <button class="quick-btn" onclick="sendQuickMessage('english')">🔤 English</button>
-                    <button class="quick-btn" onclick="sendQuickMessage('kiswahili')">🇹🇿 Kiswahili</button>
-                </div>
-                
-                <div id="chat-box" class="chat-box">
-                    <div class="bot-message">Karibu Frecha iotech! Ninaweza kukusaidiaje kuhusu bundle router au huduma za SME leo?</div>
-                </div>
-                
-                <div class="input-area">
-                    <input type="text" id="user-input" placeholder="Andika ujumbe wako..." onkeypress="handleKeyPress(event)">
-                    <button onclick="sendMessage()">Tuma</button>
-                </div>
-            </div>
-        </div>
+# One keep-alive connection pool per worker process
+backend = BackendClient(
+    DJANGO_BACKEND_URL,
+    pool_size=int(os.environ.get('BACKEND_POOL_SIZE', 10)),
+    connect_timeout=float(os.environ.get('BACKEND_CONNECT_TIMEOUT', 3.05)),
+    read_timeout=float(os.environ.get('BACKEND_READ_TIMEOUT', 10)),
+    retries=int(os.environ.get('BACKEND_RETRIES', 2)),
+    breaker=CircuitBreaker(
+        failure_threshold=int(os.environ.get('BACKEND_BREAKER_FAILURES', 5)),
+        reset_timeout=float(os.environ.get('BACKEND_BREAKER_RESET', 30)),
+    ),
+)
+
+class StaticAsset:
+    """One built asset held in memory with its pre-compressed variants."""
+
+    def __init__(self, name, entry, immutable):
+        self.content_type = mimetypes.guess_type(entry['file'])[0]
+        if self.content_type.startswith('text/') or self.content_type.endswith('javascript'):
+            self.content_type += '; charset=utf-8'
+        self.etag = entry['etag']
+        # Hashed files never change; the page must be revalidated on every visit
+        self.cache_control = 'public, max-age=31536000, immutable' if immutable else 'no-cache'
+        self.bodies = {}
+        suffixes = {'identity': '', 'gzip': '.gz', 'br': '.br'}
+        for encoding in entry['encodings']:
+            with open(os.path.join(build_assets.DIST_DIR, entry['file'] + suffixes[encoding]), 'rb') as f:
+                self.bodies[encoding] = f.read()
+
+    def respond(self):
+        accepted = request.accept_encodings
+        encoding = next((e for e in ('br', 'gzip') if e in self.bodies and accepted[e]), 'identity')
+        # Each encoding is a different representation, so it gets its own strong ETag
+        etag = self.etag if encoding == 'identity' else f'{self.etag}-{encoding}'
 
-        <script>
-            function updateLanguageIndicator(lang) {
-                document.getElementById('lang-indicator').textContent = lang === 'swahili' ? 'SW' : 'EN';
-                const input = document.getElementById('user-input');
-                input.placeholder = lang === 'swahili' ? 'Andika ujumbe wako...' : 'Type your message...';
-            }
+        if request.if_none_match.contains(etag):
+            response = Response(status=304)
+        else:
+            response = Response(self.bodies[encoding], content_type=self.content_type)
+            if encoding != 'identity':
+                response.headers['Content-Encoding'] = encoding
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = self.cache_control
+        response.headers['Vary'] = 'Accept-Encoding'
+        return response
 
-            function sendQuickMessage(message) {
-                document.getElementById('user-input').value = message;
-                sendMessage();
-            }
 
-            function handleKeyPress(event) {
-                if (event.key === 'Enter') {
-                    sendMessage();
-                }
-            }
+def load_assets():
+    if not os.path.exists(build_assets.MANIFEST):
+        build_assets.build()
+    with open(build_assets.MANIFEST) as f:
+        manifest = json.load(f)
+    return {
+        entry['file']: StaticAsset(name, entry, immutable=name != build_assets.PAGE)
+        for name, entry in manifest.items()
+    }
 
-            async function sendMessage() {
-                const input = document.getElementById('user-input');
-                const message = input.value.trim();
-                const chatBox = document.getElementById('chat-box');
-                
-                if (!message) {
-                    alert('Tafadhali andika ujumbe!');
-                    return;
-                }
 
-                // Add user message to chat
-                const userMessage = document.createElement('div');
-                userMessage.className = 'message user-message';
-                userMessage.textContent = message;
-                chatBox.appendChild(userMessage);
-                
-                // Clear input
-                input.value = '';
-                
-                // Show loading
-                const loadingMessage = document.createElement('div');
-                loadingMessage.className = 'message bot-message';
-                loadingMessage.textContent = 'Inafikiri...';
-                chatBox.appendChild(loadingMessage);
-                chatBox.scrollTop = chatBox.scrollHeight;
+ASSETS = load_assets()
 
-                try {
-                    // Send to backend
-                    const response = await fetch('/chat', {
-                        method: 'POST',
-                        headers: {
-                            'Content-Type': 'application/json',
-                        },
-                        body: JSON.stringify({ message: message })
-                    });
-                    
-                    const data = await response.json();
-                    
-                    // Remove loading message
-                    chatBox.removeChild(loadingMessage);
-                    
-                    // Add bot response
-                    const botMessage = document.createElement('div');
-                    botMessage.className = 'message bot-message';
-                    botMessage.textContent = data.response;
-                    chatBox.appendChild(botMessage);
-                    
-                    // Update language indicator
-                    if (data.language) {
-                        updateLanguageIndicator(data.language);
-                    }
-                    
-                    chatBox.scrollTop = chatBox.scrollHeight;
-                } catch (error) {
-                    chatBox.removeChild(loadingMessage);
-                    
-                    const errorMessage = document.createElement('div');
-                    errorMessage.className = 'message bot-message';
-                    errorMessage.textContent = 'Samahani, kuna tatizo la kiufundi. Tafadhali jaribu tena.';
-                    chatBox.appendChild(errorMessage);
-                    chatBox.scrollTop = chatBox.scrollHeight;
-                }
-            }
+metrics.gauge(
+    'frontend_backend_breaker', 'Backend circuit breaker state (1 = current).', ['state'],
+    lambda: {(state,): int(backend.breaker.state == state)
+             for state in (CircuitBreaker.CLOSED, CircuitBreaker.OPEN, CircuitBreaker.HALF_OPEN)},
+)
+metrics.gauge(
+    'frontend_backend_pool', 'Backend keep-alive pool: reused (hits) and new (misses) connections.', ['counter'],
+    lambda: {(name,): value for name, value in backend.pool_stats().items()},
+)
 
-            // Initialize
-            updateLanguageIndicator('swahili');
-            document.getElementById('user-input').focus();
-        </script>
-    </body>
-    </html>
-    '''
+@app.before_request
+def start_timer():
+    g.request_start = time.perf_counter()
+
+@app.after_request
+def record_request(response):
+    metrics.REQUEST_SECONDS.labels(
+        request.endpoint or 'unmatched', request.method, str(response.status_code)
+    ).observe(time.perf_counter() - g.request_start)
+    return response
+
+@app.route('/')
+def home():
+    return ASSETS[build_assets.PAGE].respond()
+
+@app.route('/assets/<name>')
+def asset(name):
+    if name not in ASSETS or name == build_assets.PAGE:
+        abort(404)
+    return ASSETS[name].respond()
 
 @app.route('/chat', methods=['POST'])
 def chat():
     """Forward chat requests to Django backend"""
     try:
-        data = request.get_json()
+        with metrics.stage('parse'):
+            data = request.get_json()
         
         # Send to Django backend
-        response = requests.post(
-            f'{DJANGO_BACKEND_URL}/api/chat/',
-            json=data,
-            timeout=10
-        )
+        with metrics.stage('backend'):
+            response = backend.post('/api/chat/', json=data)
         
-        return jsonify(response.json())
+        with metrics.stage('serialize'):
+            return jsonify(response.json())
         
     except requests.exceptions.RequestException as e:
         return jsonify({
@@ -298,7 +129,16 @@ def chat():
 
 @app.route('/health')
 def health():
-    return jsonify({'status': 'healthy', 'service': 'Frecha Chatbot Frontend'})
+    return jsonify({
+        'status': 'healthy',
+        'service': 'Frecha Chatbot Frontend',
+        'backend_pool': backend.pool_stats(),
+        'backend_breaker': backend.breaker.stats(),
+    })
+
+@app.route('/metrics')
+def metrics_endpoint():
+    return Response(metrics.render(), content_type=metrics.CONTENT_TYPE)
 
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 5000))
@@ -0,0 +1,88 @@
+const sessionId = localStorage.getItem('frecha-session') ||
+    (crypto.randomUUID ? crypto.randomUUID() : String(Date.now()) + Math.random().toString(16).slice(2));
+localStorage.setItem('frecha-session', sessionId);
+
+function updateLanguageIndicator(lang) {
+    document.getElementById('lang-indicator').textContent = lang === 'swahili' ? 'SW' : 'EN';
+    const input = document.getElementById('user-input');
+    input.placeholder = lang === 'swahili' ? 'Andika ujumbe wako...' : 'Type your message...';
+}
+
+function sendQuickMessage(message) {
+    document.getElementById('user-input').value = message;
+    sendMessage();
+}
+
+function handleKeyPress(event) {
+    if (event.key === 'Enter') {
+        sendMessage();
+    }
+}
+
+async function sendMessage() {
+    const input = document.getElementById('user-input');
+    const message = input.value.trim();
+    const chatBox = document.getElementById('chat-box');
+
+    if (!message) {
+        alert('Tafadhali andika ujumbe!');
+        return;
+    }
+
+    // Add user message to chat
+    const userMessage = document.createElement('div');
+    userMessage.className = 'message user-message';
+    userMessage.textContent = message;
+    chatBox.appendChild(userMessage);
+
+    // Clear input
+    input.value = '';
+
+    // Show loading
+    const loadingMessage = document.createElement('div');
+    loadingMessage.className = 'message bot-message';
+    loadingMessage.textContent = 'Inafikiri...';
+    chatBox.appendChild(loadingMessage);
+    chatBox.scrollTop = chatBox.scrollHeight;
+
+    try {
+        // Send to backend
+        const response = await fetch('/chat', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+            },
+            body: JSON.stringify({ message: message, session_id: sessionId })
+        });
+
+        const data = await response.json();
+
+        // Remove loading message
+        chatBox.removeChild(loadingMessage);
+
+        // Add bot response
+        const botMessage = document.createElement('div');
+        botMessage.className = 'message bot-message';
+        botMessage.textContent = data.response;
+        chatBox.appendChild(botMessage);
+
+        // Update language indicator
+        if (data.language) {
+            updateLanguageIndicator(data.language);
+        }
+
+        chatBox.scrollTop = chatBox.scrollHeight;
+    } catch (error) {
+        chatBox.removeChild(loadingMessage);
+
+        const errorMessage = document.createElement('div');
+        errorMessage.className = 'message bot-message';
+        errorMessage.textContent = 'Samahani, kuna tatizo la kiufundi. Tafadhali jaribu tena.';
+        chatBox.appendChild(errorMessage);
+        chatBox.scrollTop = chatBox.scrollHeight;
+    }
+}
+
+// Initialize
+updateLanguageIndicator('swahili');
+document.getElementById('user-input').focus();
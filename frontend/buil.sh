@@ -4,4 +4,7 @@
 echo "Installing Python dependencies..."
 pip install -r requirements.txt
 
+echo "Building minified, pre-compressed UI assets..."
+python build_assets.py
+
 echo "Frontend build completed!"
\ No newline at end of file
@@ -0,0 +1,96 @@
+"""Build the chat UI into static/dist: minified, content-hashed and pre-compressed.
+
+Run `python build_assets.py` at build time (buil.sh does). app.py also runs it
+on startup when static/dist has no manifest yet.
+"""
+import gzip
+import hashlib
+import json
+import os
+import re
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always built
+    brotli = None
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SOURCE_DIR = os.path.join(BASE_DIR, 'assets')
+DIST_DIR = os.path.join(BASE_DIR, 'static', 'dist')
+MANIFEST = os.path.join(DIST_DIR, 'manifest.json')
+
+# Hashed names get a long-lived cache; the page itself is revalidated by ETag
+HASHED_ASSETS = ['chat.css', 'chat.js']
+PAGE = 'index.html'
+
+
+def minify_css(text):
+    text = re.sub(r'/\*.*?\*/', '', text, flags=re.S)
+    text = re.sub(r'\s+', ' ', text)
+    text = re.sub(r'\s*([{};:,>])\s*', r'\1', text)
+    return text.replace(';}', '}').strip()
+
+
+def minify_js(text):
+    # Line-based only: no renaming or statement joining, so ASI-dependent code stays intact
+    lines = (line.strip() for line in text.splitlines())
+    return '\n'.join(line for line in lines if line and not line.startswith('//'))
+
+
+def minify_html(text):
+    return re.sub(r'>\s+<', '><', text).strip()
+
+
+MINIFIERS = {'.css': minify_css, '.js': minify_js, '.html': minify_html}
+
+
+def write_variants(name, body):
+    """Write `name` plus its .gz (and .br) siblings; return the encodings built."""
+    encodings = ['identity', 'gzip']
+    with open(os.path.join(DIST_DIR, name), 'wb') as f:
+        f.write(body)
+    with open(os.path.join(DIST_DIR, name + '.gz'), 'wb') as f:
+        # mtime=0 keeps the output byte-identical across builds
+        f.write(gzip.compress(body, compresslevel=9, mtime=0))
+    if brotli is not None:
+        with open(os.path.join(DIST_DIR, name + '.br'), 'wb') as f:
+            f.write(brotli.compress(body, quality=11))
+        encodings.append('br')
+    return encodings
+
+
+def build():
+    os.makedirs(DIST_DIR, exist_ok=True)
+    manifest = {}
+
+    for name in HASHED_ASSETS:
+        stem, ext = os.path.splitext(name)
+        with open(os.path.join(SOURCE_DIR, name), encoding='utf-8') as f:
+            body = MINIFIERS[ext](f.read()).encode('utf-8')
+        digest = hashlib.sha256(body).hexdigest()[:12]
+        hashed_name = f'{stem}.{digest}{ext}'
+        manifest[name] = {
+            'file': hashed_name,
+            'etag': digest,
+            'encodings': write_variants(hashed_name, body),
+        }
+
+    with open(os.path.join(SOURCE_DIR, PAGE), encoding='utf-8') as f:
+        page = f.read()
+    for name, entry in manifest.items():
+        page = page.replace('{{ %s }}' % name, entry['file'])
+    body = minify_html(page).encode('utf-8')
+    manifest[PAGE] = {
+        'file': PAGE,
+        'etag': hashlib.sha256(body).hexdigest()[:12],
+        'encodings': write_variants(PAGE, body),
+    }
+
+    with open(MANIFEST, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+if __name__ == '__main__':
+    for name, entry in build().items():
+        print(f"{name} -> static/dist/{entry['file']} ({', '.join(entry['encodings'])})")